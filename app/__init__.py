@@ -12,20 +12,100 @@ def create_app():
     # Configuración
     app.config['SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'tu_clave_secreta')
     app.config['JSON_SORT_KEYS'] = False
+    app.config['LOTE_MAX_FILAS'] = int(os.getenv('LOTE_MAX_FILAS', 10000))
+    app.config['LOTE_CHUNK_SIZE'] = int(os.getenv('LOTE_CHUNK_SIZE', 500))
+    app.config['EXPORT_FETCH_SIZE'] = int(os.getenv('EXPORT_FETCH_SIZE', 1000))
+    app.config['MULTIGET_MAX_IDS'] = int(os.getenv('MULTIGET_MAX_IDS', 100))
+    app.config['BUSQUEDA_MIN_CARACTERES'] = int(os.getenv('BUSQUEDA_MIN_CARACTERES', 2))
+    app.config['BUSQUEDA_MAX_RESULTADOS'] = int(os.getenv('BUSQUEDA_MAX_RESULTADOS', 100))
+    app.config['JWT_CACHE_SIZE'] = int(os.getenv('JWT_CACHE_SIZE', 1024))
+    app.config['JWT_REVOCATION_TTL'] = float(os.getenv('JWT_REVOCATION_TTL', 10))
+    app.config['ESTADISTICAS_CACHE_TTL'] = float(os.getenv('ESTADISTICAS_CACHE_TTL', 30))
+    app.config['ESTADISTICAS_CACHE_STALE'] = float(os.getenv('ESTADISTICAS_CACHE_STALE', 60))
+    app.config['CALCULO_LOTE_MAX_ALUMNOS'] = int(os.getenv('CALCULO_LOTE_MAX_ALUMNOS', 50000))
+    app.config['JSON_PROVIDER'] = os.getenv('JSON_PROVIDER', 'auto')
+    app.config['JSON_DECIMAL'] = os.getenv('JSON_DECIMAL', 'str')
+    app.config['JSON_DATE_FORMAT'] = os.getenv('JSON_DATE_FORMAT', 'http')
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', 'True') == 'True'
+    app.config['METRICS_MULTIPROC_DIR'] = os.getenv('METRICS_MULTIPROC_DIR', '')
+    app.config['PROFILING_ENABLED'] = os.getenv('PROFILING_ENABLED', 'False') == 'True'
+    app.config['PROFILING_TOKEN'] = os.getenv('PROFILING_TOKEN', '')
+    app.config['PROFILING_DIR'] = os.getenv('PROFILING_DIR', 'profiles')
+    app.config['PROFILING_SAMPLE_EVERY'] = int(os.getenv('PROFILING_SAMPLE_EVERY', 0))
+    app.config['PROFILING_INTERVAL'] = float(os.getenv('PROFILING_INTERVAL', 0.001))
+    app.config['ADMIN_USERS'] = [u.strip() for u in os.getenv('ADMIN_USERS', 'admin').split(',') if u.strip()]
+    app.config['SLOW_QUERY_MS'] = float(os.getenv('SLOW_QUERY_MS', 200))
+    app.config['SLOW_QUERY_BUFFER'] = int(os.getenv('SLOW_QUERY_BUFFER', 200))
+    app.config['SLOW_QUERY_FILE'] = os.getenv('SLOW_QUERY_FILE', 'logs/slow_queries.jsonl')
+    app.config['SLOW_QUERY_EXPLAIN'] = os.getenv('SLOW_QUERY_EXPLAIN', 'False') == 'True'
+    app.config['ADMISSION_ENABLED'] = os.getenv('ADMISSION_ENABLED', 'True') == 'True'
+    # limite:cola:timeout por clase de endpoint; limite 'auto' se deriva de
+    # los hilos por worker (SERVER_THREADS, el mismo valor que usa run.py)
+    app.config['ADMISSION_HILOS'] = int(os.getenv('SERVER_THREADS', 4))
+    app.config['ADMISSION_PESADO'] = os.getenv('ADMISSION_PESADO', 'auto:auto:2')
+    app.config['ADMISSION_AUTH'] = os.getenv('ADMISSION_AUTH', 'auto:auto:5')
+    app.config['ADMISSION_NORMAL'] = os.getenv('ADMISSION_NORMAL', 'auto:auto:5')
+    app.config['ADMISSION_RETRY_AFTER'] = int(os.getenv('ADMISSION_RETRY_AFTER', 1))
+    
+    # Serialización JSON rápida (orjson si está instalado)
+    from app.utils.json_provider import crear_json_provider
+    app.json = crear_json_provider(app)
+    
+    # Caché de tokens verificados
+    from app.utils.auth import admin_required, token_cache
+    token_cache.maxsize = app.config['JWT_CACHE_SIZE']
+    token_cache.ttl = app.config['JWT_REVOCATION_TTL']
+    
+    # Registro de consultas lentas (SLOW_QUERY_MS=0 lo desactiva)
+    from app.utils.slow_query import slow_query_log
+    slow_query_log.configurar(
+        umbral=app.config['SLOW_QUERY_MS'] / 1000,
+        capacidad=app.config['SLOW_QUERY_BUFFER'],
+        archivo=app.config['SLOW_QUERY_FILE'],
+        explain=app.config['SLOW_QUERY_EXPLAIN']
+    )
     
     # Habilitar CORS
     CORS(app)
     
+    # Réplicas de lectura (DB_REPLICA_HOSTS): cada petición empieza leyendo de
+    # ellas y pasa al primario después de escribir
+    from app.utils.database import reiniciar_lecturas
+    app.before_request(reiniciar_lecturas)
+    
+    # Métricas por endpoint en /metrics
+    if app.config['METRICS_ENABLED']:
+        from app.utils.metrics import init_metrics
+        from app.utils.database import pool_existente, replicas_existentes
+        from app.routes.curso import estadisticas_cache
+        init_metrics(app, pool=pool_existente, replicas=replicas_existentes,
+                     cache=estadisticas_cache)
+    
+    # Perfilado bajo demanda (sin hooks instalados si está desactivado)
+    if app.config['PROFILING_ENABLED']:
+        from app.utils.profiling import init_profiling
+        init_profiling(app)
+    
+    # Límites de concurrencia por clase de endpoint (503 + Retry-After al saturarse)
+    if app.config['ADMISSION_ENABLED']:
+        from app.utils.admission import init_admission
+        init_admission(app)
+    
     # Registrar Blueprints
     from app.routes.auth import auth_bp
     from app.routes.alumno import alumno_bp
     from app.routes.curso import curso_bp
     from app.routes.calculo import calculo_bp
+    from app.routes.admin import admin_bp
+    from app.routes.matricula import matricula_bp
     from app.routes.views import views_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(alumno_bp, url_prefix='/api')
     app.register_blueprint(curso_bp, url_prefix='/api')
+    app.register_blueprint(calculo_bp, url_prefix='/api')
+    app.register_blueprint(admin_bp, url_prefix='/api')
+    app.register_blueprint(matricula_bp, url_prefix='/api')
     app.register_blueprint(views_bp)
     
     # Ruta de API info
@@ -37,20 +117,37 @@ def create_app():
             'version': '1.0',
             'endpoints': {
                 'auth': '/api/login',
+                'logout': 'POST /api/logout',
                 'alumnos': {
                     'registrar': 'POST /api/alumno/registrar',
+                    'registrar_lote': 'POST /api/alumnos/registrar-lote',
                     'listar': 'GET /api/alumnos',
+                    'exportar': 'GET /api/alumnos/export?format=csv|ndjson',
                     'obtener': 'GET /api/alumno/<id>',
-                    'historial': 'GET /api/historial/<id>'
+                    'obtener_varios': 'GET /api/alumnos?ids=1,2,3',
+                    'buscar': 'GET /api/alumnos/buscar?q=',
+                    'historial': 'GET /api/historial/<id>',
+                    'resumen': 'GET /api/alumno/<id>/resumen'
                 },
                 'cursos': {
                     'disponibles': 'GET /api/cursos/disponibles',
                     'estadisticas': 'GET /api/cursos/estadisticas',
-                    'obtener': 'GET /api/curso/<id>'
+                    'obtener': 'GET /api/curso/<id>',
+                    'obtener_varios': 'GET /api/cursos?ids=1,2,3'
+                },
+                'matriculas': {
+                    'registrar_lote': 'POST /api/matriculas/lote'
+                },
+                'notas': {
+                    'registrar_lote': 'POST /api/notas/lote'
                 },
                 'calculos': {
                     'simular_promedio': 'POST /api/simular-promedio',
-                    'simular_promedio_simple': 'POST /api/simular-promedio-simple'
+                    'simular_promedio_simple': 'POST /api/simular-promedio-simple',
+                    'simular_promedio_lote': 'POST /api/simular-promedio/lote'
+                },
+                'admin': {
+                    'slow_queries': 'GET /api/admin/slow-queries'
                 }
             }
         }
@@ -58,5 +155,26 @@ def create_app():
     @app.route('/health')
     def health():
         return {'status': 'healthy'}, 200
-    
+
+    # Diagnóstico con estadísticas internas: solo para ADMIN_USERS
+    @app.route('/health/pool')
+    @admin_required
+    def health_pool():
+        """Estadísticas del pool de conexiones MySQL (para dimensionarlo)"""
+        from app.utils.database import pool_stats
+        return {'success': True, 'pool': pool_stats()}, 200
+
+    @app.route('/health/replicas')
+    @admin_required
+    def health_replicas():
+        """Estado, retraso y pool de cada réplica de lectura"""
+        from app.utils.database import replicas_stats
+        return {'success': True, 'replicas': replicas_stats()}, 200
+
+    @app.route('/health/jwt-cache')
+    @admin_required
+    def health_jwt_cache():
+        """Estadísticas de la caché de tokens JWT (aciertos/fallos)"""
+        return {'success': True, 'jwt_cache': token_cache.stats()}, 200
+
     return app
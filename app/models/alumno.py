@@ -1,6 +1,25 @@
-from app.utils.database import execute_query
+import pymysql
+from app.utils.database import execute_query, get_db_connection, transaction
 
 class Alumno:
+    # Promedio mínimo de una matrícula para contarla como aprobada en el resumen
+    NOTA_MINIMA_APROBACION = 10.5
+
+    # Columnas que devuelve la API (updated_at queda fuera: solo sirve para los ETag)
+    COLUMNAS = ('id', 'codigo', 'dni', 'nombre', 'apellido', 'email',
+                'telefono', 'fecha_ingreso', 'created_at')
+
+    # Columnas de alumno_resumen que se agregan al listado con include=resumen
+    COLUMNAS_RESUMEN = """
+        COALESCE(r.cursos_matriculados, 0) as resumen_cursos_matriculados,
+        COALESCE(r.creditos_matriculados, 0) as resumen_creditos_matriculados,
+        COALESCE(r.cursos_aprobados, 0) as resumen_cursos_aprobados,
+        COALESCE(r.creditos_aprobados, 0) as resumen_creditos_aprobados,
+        CASE WHEN r.creditos_con_notas > 0
+             THEN r.suma_promedio_creditos / r.creditos_con_notas
+        END as resumen_promedio_ponderado
+    """
+
     @staticmethod
     def crear(codigo, dni, nombre, apellido, email=None, telefono=None, fecha_ingreso=None):
         """Crea un nuevo alumno en la base de datos"""
@@ -14,24 +33,435 @@ class Alumno:
         except Exception as e:
             return {'success': False, 'error': str(e)}
     
+    @staticmethod
+    def crear_lote(alumnos, chunk_size=500):
+        """
+        Inserta muchos alumnos en bloques con executemany
+
+        Cada bloque usa una sola transacción (o se une a la abierta con
+        transaction() por quien llama). Los códigos
+        y DNIs duplicados (ya existentes o repetidos dentro del lote) se
+        reportan por fila sin abortar el resto.
+
+        Args:
+            alumnos: Lista de diccionarios ya validados con las columnas de alumnos
+            chunk_size: Cantidad de filas por bloque
+
+        Returns:
+            Lista alineada con alumnos: {'success': True, 'id': ...} o
+            {'success': False, 'error': ...}
+        """
+        resultados = [None] * len(alumnos)
+        vistos_codigo = set()
+        vistos_dni = set()
+
+        for inicio in range(0, len(alumnos), chunk_size):
+            bloque = list(enumerate(alumnos[inicio:inicio + chunk_size], start=inicio))
+            pendientes = []
+
+            try:
+                with transaction() as tx:
+                    cursor = tx.cursor
+                    # Una sola consulta por bloque para detectar duplicados existentes
+                    codigos = [a['codigo'] for _, a in bloque]
+                    dnis = [a['dni'] for _, a in bloque]
+                    cursor.execute(
+                        f"""
+                        SELECT codigo, dni FROM alumnos
+                        WHERE codigo IN ({', '.join(['%s'] * len(codigos))})
+                           OR dni IN ({', '.join(['%s'] * len(dnis))})
+                        """,
+                        codigos + dnis
+                    )
+                    existentes = cursor.fetchall()
+                    existentes_codigo = {fila['codigo'] for fila in existentes}
+                    existentes_dni = {fila['dni'] for fila in existentes}
+
+                    for i, alumno in bloque:
+                        if alumno['codigo'] in existentes_codigo or alumno['codigo'] in vistos_codigo:
+                            resultados[i] = {'success': False, 'error': f"Duplicado: el código {alumno['codigo']} ya existe"}
+                            continue
+                        if alumno['dni'] in existentes_dni or alumno['dni'] in vistos_dni:
+                            resultados[i] = {'success': False, 'error': f"Duplicado: el DNI {alumno['dni']} ya existe"}
+                            continue
+                        vistos_codigo.add(alumno['codigo'])
+                        vistos_dni.add(alumno['dni'])
+                        pendientes.append(i)
+
+                    if pendientes:
+                        Alumno._insertar_bloque(cursor, [alumnos[i] for i in pendientes], pendientes, resultados)
+            except Exception as e:
+                for i in pendientes:
+                    resultados[i] = {'success': False, 'error': str(e)}
+
+        return resultados
+
+    @staticmethod
+    def _insertar_bloque(cursor, filas, indices, resultados):
+        """Inserta un bloque ya depurado; si otro proceso insertó un duplicado, reintenta fila por fila"""
+        query = """
+            INSERT INTO alumnos (codigo, dni, nombre, apellido, email, telefono, fecha_ingreso)
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
+        """
+        valores = [
+            (a['codigo'], a['dni'], a['nombre'], a['apellido'],
+             a.get('email'), a.get('telefono'), a.get('fecha_ingreso'))
+            for a in filas
+        ]
+
+        try:
+            cursor.execute("SAVEPOINT lote_alumnos")
+            cursor.executemany(query, valores)
+        except pymysql.err.IntegrityError:
+            cursor.execute("ROLLBACK TO SAVEPOINT lote_alumnos")
+            for i, fila in zip(indices, valores):
+                try:
+                    cursor.execute(query, fila)
+                    resultados[i] = {'success': True, 'id': cursor.lastrowid}
+                except pymysql.err.IntegrityError as e:
+                    resultados[i] = {'success': False, 'error': str(e)}
+            return
+
+        # Recuperar los IDs generados con una sola consulta
+        codigos = [fila[0] for fila in valores]
+        cursor.execute(
+            f"SELECT id, codigo FROM alumnos WHERE codigo IN ({', '.join(['%s'] * len(codigos))})",
+            codigos
+        )
+        ids = {fila['codigo']: fila['id'] for fila in cursor.fetchall()}
+        for i, fila in zip(indices, valores):
+            resultados[i] = {'success': True, 'id': ids.get(fila[0])}
+
     @staticmethod
     def obtener_por_id(alumno_id):
         """Obtiene un alumno por su ID"""
-        query = "SELECT * FROM alumnos WHERE id = %s"
+        query = f"SELECT {', '.join(Alumno.COLUMNAS)} FROM alumnos WHERE id = %s"
         return execute_query(query, (alumno_id,), fetch_one=True)
     
+    @staticmethod
+    def obtener_version(alumno_id):
+        """Obtiene solo el updated_at del alumno (para el ETag), o None si no existe"""
+        query = "SELECT updated_at FROM alumnos WHERE id = %s"
+        return execute_query(query, (alumno_id,), fetch_one=True)
+    
+    @staticmethod
+    def obtener_version_historial(alumno_id):
+        """
+        Marcador de versión del historial de un alumno (para el ETag)
+
+        Lee solo updated_at y conteos por los índices de alumno_id y
+        matricula_id: cualquier alta, baja o cambio en el alumno, sus
+        matrículas, sus notas o sus cursos cambia el resultado.
+        """
+        query = """
+            SELECT 
+                a.updated_at as alumno_updated_at,
+                COUNT(DISTINCT m.id) as total_matriculas,
+                MAX(m.updated_at) as matriculas_updated_at,
+                COUNT(n.id) as total_notas,
+                MAX(n.updated_at) as notas_updated_at,
+                MAX(c.updated_at) as cursos_updated_at
+            FROM alumnos a
+            LEFT JOIN matriculas m ON a.id = m.alumno_id
+            LEFT JOIN cursos c ON m.curso_id = c.id
+            LEFT JOIN notas n ON m.id = n.matricula_id
+            WHERE a.id = %s
+            GROUP BY a.id, a.updated_at
+        """
+        return execute_query(query, (alumno_id,), fetch_one=True)
+    
+    @staticmethod
+    def obtener_por_ids(ids):
+        """Obtiene varios alumnos por ID con una sola consulta IN"""
+        if not ids:
+            return []
+        query = (f"SELECT {', '.join(Alumno.COLUMNAS)} FROM alumnos "
+                 f"WHERE id IN ({', '.join(['%s'] * len(ids))})")
+        return execute_query(query, tuple(ids), fetch=True)
+    
     @staticmethod
     def obtener_por_dni(dni):
         """Obtiene un alumno por su DNI"""
-        query = "SELECT * FROM alumnos WHERE dni = %s"
+        query = f"SELECT {', '.join(Alumno.COLUMNAS)} FROM alumnos WHERE dni = %s"
         return execute_query(query, (dni,), fetch_one=True)
     
     @staticmethod
-    def obtener_todos(limit=100, offset=0):
+    def _select_alumnos(incluir_resumen):
+        """SELECT base de los listados, con o sin las columnas de alumno_resumen"""
+        if not incluir_resumen:
+            return f"SELECT {', '.join(Alumno.COLUMNAS)} FROM alumnos"
+        columnas = ', '.join(f'alumnos.{columna}' for columna in Alumno.COLUMNAS)
+        return (f"SELECT {columnas}, {Alumno.COLUMNAS_RESUMEN} FROM alumnos "
+                "LEFT JOIN alumno_resumen r ON r.alumno_id = alumnos.id")
+
+    @staticmethod
+    def anidar_resumen(alumnos):
+        """Mueve las columnas resumen_* de cada fila a un diccionario 'resumen'"""
+        for alumno in alumnos:
+            promedio = alumno.pop('resumen_promedio_ponderado')
+            alumno['resumen'] = {
+                'promedio_ponderado': round(float(promedio), 2) if promedio is not None else None,
+                'cursos_matriculados': int(alumno.pop('resumen_cursos_matriculados')),
+                'creditos_matriculados': int(alumno.pop('resumen_creditos_matriculados')),
+                'cursos_aprobados': int(alumno.pop('resumen_cursos_aprobados')),
+                'creditos_aprobados': int(alumno.pop('resumen_creditos_aprobados'))
+            }
+        return alumnos
+
+    @staticmethod
+    def obtener_todos(limit=100, offset=0, incluir_resumen=False):
         """Obtiene todos los alumnos con paginación"""
-        query = "SELECT * FROM alumnos ORDER BY apellido, nombre LIMIT %s OFFSET %s"
+        query = f"{Alumno._select_alumnos(incluir_resumen)} ORDER BY apellido, nombre, id LIMIT %s OFFSET %s"
         return execute_query(query, (limit, offset), fetch=True)
-    
+
+    @staticmethod
+    def obtener_pagina(limit=100, despues_de=None, incluir_resumen=False):
+        """
+        Obtiene una página de alumnos con paginación por clave (keyset)
+
+        Args:
+            limit: Cantidad máxima de alumnos a devolver
+            despues_de: Tupla (apellido, nombre, id) de la última fila de la
+                página anterior, o None para la primera página
+            incluir_resumen: Si True agrega las columnas de alumno_resumen
+                con un LEFT JOIN (sin consultas adicionales por fila)
+
+        Usa el índice idx_apellido_nombre_id para saltar directamente a la
+        posición del cursor en lugar de recorrer y descartar filas con OFFSET.
+        """
+        select = Alumno._select_alumnos(incluir_resumen)
+        if despues_de is None:
+            query = f"{select} ORDER BY apellido, nombre, id LIMIT %s"
+            return execute_query(query, (limit,), fetch=True)
+
+        apellido, nombre, alumno_id = despues_de
+        query = f"""
+            {select}
+            WHERE apellido >= %s
+              AND (apellido > %s OR nombre > %s OR (nombre = %s AND id > %s))
+            ORDER BY apellido, nombre, id
+            LIMIT %s
+        """
+        return execute_query(
+            query, (apellido, apellido, nombre, nombre, alumno_id, limit), fetch=True
+        )
+
+    @staticmethod
+    def _escapar_like(texto):
+        """Escapa los comodines de LIKE para buscar el texto literal como prefijo"""
+        return texto.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+    @staticmethod
+    def buscar(texto, limit=20):
+        """
+        Busca alumnos por prefijo de apellido/nombre, prefijo de código o DNI exacto
+
+        La columna usa la colación utf8mb4_unicode_ci, que ignora mayúsculas y
+        tildes también en LIKE ('Perez' encuentra 'Pérez'). Cada rama es un
+        prefijo sobre su propio índice (idx_apellido_nombre_id,
+        idx_nombre_apellido, idx_codigo, idx_dni) con su LIMIT, así que el costo
+        depende de limit y no del tamaño de la tabla.
+
+        Con dos o más palabras también busca 'apellido nombre' y 'nombre apellido'
+        (p. ej. 'perez ju' o 'juan pe').
+        """
+        columnas = "id, codigo, dni, nombre, apellido, email"
+        texto = ' '.join(texto.split())
+        prefijo = Alumno._escapar_like(texto)
+        ramas = [
+            (f"SELECT {columnas} FROM alumnos WHERE apellido LIKE %s "
+             "ORDER BY apellido, nombre, id LIMIT %s", (prefijo, limit)),
+            (f"SELECT {columnas} FROM alumnos WHERE nombre LIKE %s "
+             "ORDER BY nombre, apellido LIMIT %s", (prefijo, limit)),
+            (f"SELECT {columnas} FROM alumnos WHERE codigo LIKE %s "
+             "ORDER BY codigo LIMIT %s", (prefijo, limit))
+        ]
+        if texto.isdigit():
+            ramas.append((f"SELECT {columnas} FROM alumnos WHERE dni = %s", (texto,)))
+
+        palabras = texto.split(' ')
+        if len(palabras) >= 2:
+            primera = palabras[0]
+            resto = ' '.join(palabras[1:])
+            for apellido, nombre in ((primera, resto), (resto, primera)):
+                ramas.append((
+                    f"SELECT {columnas} FROM alumnos WHERE apellido LIKE %s AND nombre LIKE %s "
+                    "ORDER BY apellido, nombre, id LIMIT %s",
+                    (Alumno._escapar_like(apellido), Alumno._escapar_like(nombre), limit)
+                ))
+
+        query = ' UNION '.join(f'({sql})' for sql, _ in ramas) + " ORDER BY apellido, nombre, id LIMIT %s"
+        params = tuple(p for _, valores in ramas for p in valores) + (limit,)
+        return execute_query(query, params, fetch=True)
+
+    @staticmethod
+    def obtener_resumen(alumno_id):
+        """
+        Obtiene el resumen académico de un alumno desde alumno_resumen
+
+        Returns:
+            None si el alumno no existe, o un diccionario con el promedio
+            ponderado por créditos, los créditos aprobados y los cursos por
+            semestre
+        """
+        query_resumen = f"""
+            SELECT alumnos.id, alumnos.codigo, alumnos.nombre, alumnos.apellido,
+                   COALESCE(r.cursos_con_notas, 0) as cursos_con_notas,
+                   COALESCE(r.creditos_con_notas, 0) as creditos_con_notas,
+                   {Alumno.COLUMNAS_RESUMEN}
+            FROM alumnos
+            LEFT JOIN alumno_resumen r ON r.alumno_id = alumnos.id
+            WHERE alumnos.id = %s
+        """
+        query_semestres = """
+            SELECT anio, semestre, cursos, creditos
+            FROM alumno_resumen_semestre
+            WHERE alumno_id = %s AND cursos > 0
+            ORDER BY anio DESC, semestre DESC
+        """
+        connection = get_db_connection(solo_lectura=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query_resumen, (alumno_id,))
+                fila = cursor.fetchone()
+                if not fila:
+                    return None
+                cursor.execute(query_semestres, (alumno_id,))
+                semestres = cursor.fetchall()
+            connection.commit()
+        except Exception as e:
+            connection.rollback()
+            raise e
+        finally:
+            connection.close()
+
+        fila = Alumno.anidar_resumen([fila])[0]
+        resumen = fila.pop('resumen')
+        resumen['cursos_con_notas'] = int(fila.pop('cursos_con_notas'))
+        resumen['creditos_con_notas'] = int(fila.pop('creditos_con_notas'))
+        resumen['nota_minima_aprobacion'] = Alumno.NOTA_MINIMA_APROBACION
+        resumen['cursos_por_semestre'] = [
+            {
+                'anio': s['anio'],
+                'semestre': s['semestre'],
+                'cursos': s['cursos'],
+                'creditos': s['creditos']
+            }
+            for s in semestres
+        ]
+        return {'alumno': fila, 'resumen': resumen}
+
+    @staticmethod
+    def reconstruir_resumenes(cursor=None, alumno_ids=None):
+        """
+        Recalcula alumno_resumen y alumno_resumen_semestre desde matriculas y notas
+
+        Usa el mismo cálculo que los triggers (promedio de cada matrícula
+        redondeado a DECIMAL(12,6)), así que el resultado coincide con el
+        mantenido en forma incremental.
+
+        Args:
+            cursor: Cursor de una transacción abierta; si es None se usa
+                transaction() (se une a la del contexto si hay una abierta)
+            alumno_ids: Recalcular solo estos alumnos (cargas por lote con
+                los triggers de resumen omitidos); None recalcula todos
+        """
+        nota_minima = Alumno.NOTA_MINIMA_APROBACION
+        params = []
+        filtro_resumen = filtro_matriculas = filtro_notas = ''
+        join_notas = ''
+        if alumno_ids is not None:
+            alumno_ids = list(alumno_ids)
+            if not alumno_ids:
+                return
+            marcadores = ', '.join(['%s'] * len(alumno_ids))
+            filtro_resumen = f"WHERE alumno_id IN ({marcadores})"
+            filtro_matriculas = f"WHERE m.alumno_id IN ({marcadores})"
+            join_notas = "INNER JOIN matriculas mn ON mn.id = n.matricula_id"
+            filtro_notas = f"WHERE mn.alumno_id IN ({marcadores})"
+            params = alumno_ids
+
+        queries = [
+            (f"DELETE FROM alumno_resumen_semestre {filtro_resumen}", params),
+            (f"DELETE FROM alumno_resumen {filtro_resumen}", params),
+            (f"""
+            INSERT INTO alumno_resumen (alumno_id, cursos_matriculados, creditos_matriculados,
+                                        cursos_con_notas, creditos_con_notas, suma_promedio_creditos,
+                                        cursos_aprobados, creditos_aprobados)
+            SELECT 
+                m.alumno_id,
+                COUNT(*),
+                SUM(c.creditos),
+                SUM(IF(p.promedio IS NOT NULL, 1, 0)),
+                SUM(IF(p.promedio IS NOT NULL, c.creditos, 0)),
+                COALESCE(SUM(p.promedio * c.creditos), 0),
+                SUM(IF(p.promedio >= {nota_minima}, 1, 0)),
+                SUM(IF(p.promedio >= {nota_minima}, c.creditos, 0))
+            FROM matriculas m
+            INNER JOIN cursos c ON c.id = m.curso_id
+            LEFT JOIN (
+                SELECT n.matricula_id,
+                       CAST(SUM(n.nota * n.peso) / NULLIF(SUM(n.peso), 0) AS DECIMAL(12,6)) as promedio
+                FROM notas n
+                {join_notas}
+                {filtro_notas}
+                GROUP BY n.matricula_id
+            ) p ON p.matricula_id = m.id
+            {filtro_matriculas}
+            GROUP BY m.alumno_id
+            """, params + params),
+            (f"""
+            INSERT INTO alumno_resumen_semestre (alumno_id, anio, semestre, cursos, creditos)
+            SELECT m.alumno_id, m.anio, m.semestre, COUNT(*), SUM(c.creditos)
+            FROM matriculas m
+            INNER JOIN cursos c ON c.id = m.curso_id
+            {filtro_matriculas}
+            GROUP BY m.alumno_id, m.anio, m.semestre
+            """, params)
+        ]
+        if cursor is not None:
+            for query, valores in queries:
+                cursor.execute(query, valores or None)
+            return
+
+        with transaction() as tx:
+            for query, valores in queries:
+                tx.execute(query, valores or None)
+
+    COLUMNAS_EXPORT = COLUMNAS
+
+    @staticmethod
+    def exportar(tamano_lote=1000):
+        """
+        Recorre todos los alumnos por id con un cursor sin buffer (SSDictCursor)
+
+        Es un generador de listas de hasta tamano_lote filas: MySQL envía las
+        filas a medida que se leen, así que la memoria no crece con la tabla.
+        La conexión se devuelve al pool al terminar; si el generador se cierra
+        antes (el cliente cortó la descarga), la conexión se cierra en lugar
+        de leer el resto del resultado.
+        """
+        query = f"SELECT {', '.join(Alumno.COLUMNAS_EXPORT)} FROM alumnos ORDER BY id"
+        connection = get_db_connection(solo_lectura=True)
+        completo = False
+        try:
+            cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+            cursor.execute(query)
+            while True:
+                filas = cursor.fetchmany(tamano_lote)
+                if not filas:
+                    break
+                yield filas
+            cursor.close()
+            completo = True
+        finally:
+            if not completo:
+                try:
+                    connection.raw.close()
+                except Exception:
+                    pass
+            connection.close()
+
     @staticmethod
     def actualizar(alumno_id, **kwargs):
         """Actualiza los datos de un alumno"""
@@ -94,3 +524,85 @@ class Alumno:
             ORDER BY m.anio DESC, m.semestre DESC, c.nombre, n.fecha_evaluacion
         """
         return execute_query(query, (alumno_id,), fetch=True)
+    
+    @staticmethod
+    def obtener_historial_agrupado(alumno_id):
+        """
+        Obtiene el historial de un alumno con una fila por matrícula
+
+        Usa dos consultas sobre la misma conexión en lugar del JOIN de cuatro
+        tablas: una trae el alumno con sus matrículas y cursos, y otra solo las
+        columnas de las notas. Así los datos del alumno y del curso no se
+        repiten por cada nota.
+
+        Returns:
+            None si el alumno no existe, o un diccionario con 'alumno' y
+            'matriculas' (cada una con su lista de 'notas')
+        """
+        query_matriculas = """
+            SELECT 
+                a.id as alumno_id,
+                a.codigo as alumno_codigo,
+                a.nombre,
+                a.apellido,
+                a.dni,
+                m.id as matricula_id,
+                c.id as curso_id,
+                c.codigo_curso,
+                c.nombre as curso_nombre,
+                c.creditos,
+                m.semestre,
+                m.anio,
+                m.fecha_matricula
+            FROM alumnos a
+            LEFT JOIN matriculas m ON a.id = m.alumno_id
+            LEFT JOIN cursos c ON m.curso_id = c.id
+            WHERE a.id = %s
+            ORDER BY m.anio DESC, m.semestre DESC, c.nombre
+        """
+        query_notas = """
+            SELECT 
+                n.matricula_id,
+                n.tipo_evaluacion,
+                n.nota,
+                n.peso,
+                n.fecha_evaluacion
+            FROM notas n
+            INNER JOIN matriculas m ON n.matricula_id = m.id
+            WHERE m.alumno_id = %s
+            ORDER BY n.matricula_id, n.fecha_evaluacion
+        """
+        connection = get_db_connection(solo_lectura=True)
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(query_matriculas, (alumno_id,))
+                filas = cursor.fetchall()
+                if not filas:
+                    return None
+
+                notas = []
+                if any(fila['matricula_id'] for fila in filas):
+                    cursor.execute(query_notas, (alumno_id,))
+                    notas = cursor.fetchall()
+            connection.commit()
+        finally:
+            connection.close()
+
+        notas_por_matricula = {}
+        for nota in notas:
+            notas_por_matricula.setdefault(nota['matricula_id'], []).append(nota)
+
+        primera = filas[0]
+        return {
+            'alumno': {
+                'alumno_id': primera['alumno_id'],
+                'codigo': primera['alumno_codigo'],
+                'nombre': primera['nombre'],
+                'apellido': primera['apellido'],
+                'dni': primera['dni']
+            },
+            'matriculas': [
+                dict(fila, notas=notas_por_matricula.get(fila['matricula_id'], []))
+                for fila in filas if fila['curso_id']
+            ]
+        }
@@ -1,6 +1,39 @@
-from app.utils.database import execute_query
+from app.utils.database import execute_query, transaction
 
 class Curso:
+    # Columnas que devuelve la API (updated_at queda fuera: solo sirve para los ETag)
+    COLUMNAS = ('id', 'codigo_curso', 'nombre', 'creditos', 'descripcion', 'created_at')
+
+    # Upserts que suman deltas a las tablas resumen de cursos. Son la única
+    # definición: los triggers de init_db.py los usan con valores de la fila
+    # (NEW.curso_id, 1, ...) y sumar_matriculas / sumar_estadisticas con %s
+    # para un bloque. Un alumno es nuevo en el curso cuando, después de
+    # SUMAR_CURSO_ALUMNOS, su contador es igual a lo que se acaba de sumar.
+    SUMAR_CURSO_ALUMNOS = """
+        INSERT INTO curso_alumnos (curso_id, alumno_id, matriculas)
+        VALUES ({curso}, {alumno}, {matriculas})
+        ON DUPLICATE KEY UPDATE matriculas = matriculas + VALUES(matriculas)
+    """
+    SUMAR_ESTADISTICAS = """
+        INSERT INTO curso_estadisticas (curso_id, total_alumnos, total_evaluaciones, suma_notas)
+        VALUES ({curso}, {alumnos}, {evaluaciones}, {suma})
+        ON DUPLICATE KEY UPDATE
+            total_alumnos = total_alumnos + VALUES(total_alumnos),
+            total_evaluaciones = total_evaluaciones + VALUES(total_evaluaciones),
+            suma_notas = suma_notas + VALUES(suma_notas)
+    """
+
+    @staticmethod
+    def sql_sumar_curso_alumnos(curso='%s', alumno='%s', matriculas='%s'):
+        """SUMAR_CURSO_ALUMNOS con expresiones SQL (columnas de la fila) o %s"""
+        return Curso.SUMAR_CURSO_ALUMNOS.format(curso=curso, alumno=alumno, matriculas=matriculas).strip()
+
+    @staticmethod
+    def sql_sumar_estadisticas(curso='%s', alumnos='%s', evaluaciones='%s', suma='%s'):
+        """SUMAR_ESTADISTICAS con expresiones SQL (columnas de la fila) o %s"""
+        return Curso.SUMAR_ESTADISTICAS.format(curso=curso, alumnos=alumnos,
+                                               evaluaciones=evaluaciones, suma=suma).strip()
+
     @staticmethod
     def crear(codigo_curso, nombre, creditos, descripcion=None):
         """Crea un nuevo curso"""
@@ -17,18 +50,45 @@ class Curso:
     @staticmethod
     def obtener_por_id(curso_id):
         """Obtiene un curso por su ID"""
-        query = "SELECT * FROM cursos WHERE id = %s"
+        query = f"SELECT {', '.join(Curso.COLUMNAS)} FROM cursos WHERE id = %s"
         return execute_query(query, (curso_id,), fetch_one=True)
     
+    @staticmethod
+    def obtener_version(curso_id):
+        """Obtiene solo el updated_at del curso (para el ETag), o None si no existe"""
+        query = "SELECT updated_at FROM cursos WHERE id = %s"
+        return execute_query(query, (curso_id,), fetch_one=True)
+    
+    @staticmethod
+    def obtener_version_disponibles():
+        """Cantidad de cursos y último updated_at (para el ETag de la lista)"""
+        query = "SELECT COUNT(*) as total, MAX(updated_at) as updated_at FROM cursos"
+        return execute_query(query, fetch_one=True)
+    
+    @staticmethod
+    def obtener_por_ids(ids):
+        """Obtiene varios cursos por ID con una sola consulta IN"""
+        if not ids:
+            return []
+        query = (f"SELECT {', '.join(Curso.COLUMNAS)} FROM cursos "
+                 f"WHERE id IN ({', '.join(['%s'] * len(ids))})")
+        return execute_query(query, tuple(ids), fetch=True)
+    
     @staticmethod
     def obtener_disponibles():
         """Obtiene todos los cursos disponibles"""
-        query = "SELECT * FROM cursos ORDER BY nombre"
+        query = f"SELECT {', '.join(Curso.COLUMNAS)} FROM cursos ORDER BY nombre"
         return execute_query(query, fetch=True)
     
     @staticmethod
     def obtener_con_matriculas():
-        """Obtiene cursos con el conteo de alumnos matriculados (consulta pesada con JOIN)"""
+        """
+        Obtiene cursos con el conteo de alumnos matriculados
+
+        Lee la tabla resumen curso_estadisticas (mantenida por triggers al
+        escribir matriculas y notas) en lugar de agregar matriculas y notas
+        en cada consulta, por lo que el costo no crece con la tabla notas.
+        """
         query = """
             SELECT 
                 c.id,
@@ -36,13 +96,110 @@ class Curso:
                 c.nombre,
                 c.creditos,
                 c.descripcion,
-                COUNT(DISTINCT m.alumno_id) as total_alumnos,
-                COUNT(DISTINCT n.id) as total_evaluaciones,
-                AVG(n.nota) as promedio_general
+                COALESCE(ce.total_alumnos, 0) as total_alumnos,
+                COALESCE(ce.total_evaluaciones, 0) as total_evaluaciones,
+                CASE WHEN ce.total_evaluaciones > 0
+                     THEN ce.suma_notas / ce.total_evaluaciones
+                END as promedio_general
             FROM cursos c
-            LEFT JOIN matriculas m ON c.id = m.curso_id
-            LEFT JOIN notas n ON m.id = n.matricula_id
-            GROUP BY c.id, c.codigo_curso, c.nombre, c.creditos, c.descripcion
+            LEFT JOIN curso_estadisticas ce ON c.id = ce.curso_id
             ORDER BY c.nombre
         """
         return execute_query(query, fetch=True)
+    
+    @staticmethod
+    def sumar_matriculas(pares):
+        """
+        Suma matrículas nuevas a curso_alumnos (lo que hace trg_matriculas_ai
+        por fila, para un bloque insertado con los triggers omitidos)
+
+        El upsert bloquea cada fila (curso, alumno) y el contador se relee con
+        FOR UPDATE, así un alumno es nuevo en el curso solo si todas sus
+        matrículas en él son de este bloque. Se ejecuta en la transacción del
+        contexto.
+
+        Args:
+            pares: (alumno_id, curso_id) de cada matrícula insertada
+
+        Returns:
+            {curso_id: cantidad de alumnos nuevos en el curso}
+        """
+        conteo = {}
+        for alumno_id, curso_id in pares:
+            conteo[(curso_id, alumno_id)] = conteo.get((curso_id, alumno_id), 0) + 1
+        if not conteo:
+            return {}
+
+        nuevos = {}
+        with transaction() as tx:
+            tx.executemany(Curso.sql_sumar_curso_alumnos(),
+                           [clave + (cantidad,) for clave, cantidad in conteo.items()])
+            query = f"""
+                SELECT curso_id, alumno_id, matriculas FROM curso_alumnos
+                WHERE (curso_id, alumno_id) IN ({', '.join(['(%s, %s)'] * len(conteo))})
+                FOR UPDATE
+            """
+            params = tuple(valor for clave in conteo for valor in clave)
+            for fila in tx.execute(query, params, fetch=True):
+                if fila['matriculas'] == conteo[(fila['curso_id'], fila['alumno_id'])]:
+                    nuevos[fila['curso_id']] = nuevos.get(fila['curso_id'], 0) + 1
+        return nuevos
+
+    @staticmethod
+    def sumar_estadisticas(deltas):
+        """
+        Suma deltas a curso_estadisticas con un upsert por curso
+
+        Es lo que hacen los triggers por fila, aplicado una vez por bloque en
+        los registros por lote. Se ejecuta en la transacción del contexto.
+
+        Args:
+            deltas: {curso_id: (alumnos, evaluaciones, suma_notas)}
+        """
+        filas = [(curso_id,) + tuple(delta) for curso_id, delta in deltas.items() if any(delta)]
+        with transaction() as tx:
+            tx.executemany(Curso.sql_sumar_estadisticas(), filas)
+
+    @staticmethod
+    def reconstruir_estadisticas(cursor=None):
+        """
+        Recalcula curso_alumnos y curso_estadisticas desde matriculas y notas
+        (consulta pesada con JOIN)
+
+        Sirve para llenar las tablas por primera vez y para corregir cualquier
+        desviación. Se ejecuta en una sola transacción.
+
+        Args:
+            cursor: Cursor de una transacción abierta; si es None se usa
+                transaction() (se une a la del contexto si hay una abierta)
+        """
+        queries = [
+            "DELETE FROM curso_alumnos",
+            """
+            INSERT INTO curso_alumnos (curso_id, alumno_id, matriculas)
+            SELECT curso_id, alumno_id, COUNT(*)
+            FROM matriculas
+            GROUP BY curso_id, alumno_id
+            """,
+            "DELETE FROM curso_estadisticas",
+            """
+            INSERT INTO curso_estadisticas (curso_id, total_alumnos, total_evaluaciones, suma_notas)
+            SELECT 
+                c.id,
+                COUNT(DISTINCT m.alumno_id),
+                COUNT(n.id),
+                COALESCE(SUM(n.nota), 0)
+            FROM cursos c
+            LEFT JOIN matriculas m ON c.id = m.curso_id
+            LEFT JOIN notas n ON m.id = n.matricula_id
+            GROUP BY c.id
+            """
+        ]
+        if cursor is not None:
+            for query in queries:
+                cursor.execute(query)
+            return
+
+        with transaction() as tx:
+            for query in queries:
+                tx.execute(query)
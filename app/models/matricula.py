@@ -0,0 +1,196 @@
+from contextlib import contextmanager
+from app.models.alumno import Alumno
+from app.models.curso import Curso
+from app.utils.database import execute_query, transaction
+
+@contextmanager
+def omitir_resumen_por_fila(tx):
+    """
+    Omite los triggers por fila de curso_estadisticas, curso_alumnos y
+    alumno_resumen (SET @omitir_resumen_alumnos) dentro del bloque; quien lo
+    usa aplica los deltas de cursos con Curso.sumar_matriculas /
+    Curso.sumar_estadisticas y recalcula el resumen de los alumnos afectados
+    con Alumno.reconstruir_resumenes antes de salir
+
+    La variable es de la sesión y la conexión vuelve al pool: se limpia al
+    salir del bloque y, si eso falla, el pool la limpia al recibir la conexión.
+    """
+    tx.connection.marcar_variable('omitir_resumen_alumnos')
+    tx.execute("SET @omitir_resumen_alumnos = 1")
+    try:
+        yield tx
+    finally:
+        tx.execute("SET @omitir_resumen_alumnos = NULL")
+        tx.connection.olvidar_variable('omitir_resumen_alumnos')
+
+class Matricula:
+    # Máximo de valores por IN (...) al resolver códigos e IDs
+    MAX_IN = 1000
+
+    @staticmethod
+    def en_bloques(valores, tamano):
+        """Parte valores en listas de hasta tamano elementos"""
+        valores = list(valores)
+        for inicio in range(0, len(valores), tamano):
+            yield valores[inicio:inicio + tamano]
+
+    @staticmethod
+    def ids_alumnos_por_codigo(codigos):
+        """Resuelve códigos de alumno a IDs: {codigo: id}, una consulta por cada MAX_IN códigos"""
+        ids = {}
+        for bloque in Matricula.en_bloques(set(codigos), Matricula.MAX_IN):
+            query = f"SELECT id, codigo FROM alumnos WHERE codigo IN ({', '.join(['%s'] * len(bloque))})"
+            for fila in execute_query(query, tuple(bloque), fetch=True):
+                ids[fila['codigo']] = fila['id']
+        return ids
+
+    @staticmethod
+    def ids_cursos_por_codigo(codigos):
+        """Resuelve códigos de curso a IDs: {codigo_curso: id}"""
+        ids = {}
+        for bloque in Matricula.en_bloques(set(codigos), Matricula.MAX_IN):
+            query = f"SELECT id, codigo_curso FROM cursos WHERE codigo_curso IN ({', '.join(['%s'] * len(bloque))})"
+            for fila in execute_query(query, tuple(bloque), fetch=True):
+                ids[fila['codigo_curso']] = fila['id']
+        return ids
+
+    @staticmethod
+    def ids_por_clave(claves, bloquear=False):
+        """
+        Busca matrículas por (alumno_id, curso_id, semestre, anio) con el índice unique_matricula
+
+        Args:
+            claves: Claves a buscar
+            bloquear: Si True, lee con FOR UPDATE (dentro de una transacción):
+                bloquea las que existen y los huecos de las que no, así nadie
+                más puede insertarlas hasta el commit
+
+        Returns:
+            {clave: {'id': ..., 'alumno_id': ...}} solo para las que existen
+        """
+        encontradas = {}
+        for bloque in Matricula.en_bloques(set(claves), Matricula.MAX_IN):
+            query = f"""
+                SELECT id, alumno_id, curso_id, semestre, anio FROM matriculas
+                WHERE (alumno_id, curso_id, semestre, anio) IN ({', '.join(['(%s, %s, %s, %s)'] * len(bloque))})
+                {'FOR UPDATE' if bloquear else ''}
+            """
+            params = tuple(valor for clave in bloque for valor in clave)
+            for fila in execute_query(query, params, fetch=True):
+                # El semestre llega normalizado en mayúsculas; la comparación de MySQL no distingue
+                clave = (fila['alumno_id'], fila['curso_id'], fila['semestre'].upper(), fila['anio'])
+                encontradas[clave] = {'id': fila['id'], 'alumno_id': fila['alumno_id']}
+        return encontradas
+
+    @staticmethod
+    def ids_por_id(matricula_ids, bloquear=False):
+        """
+        {matricula_id: {'alumno_id': ..., 'curso_id': ...}} de las matrículas que existen
+
+        Con bloquear=True lee con FOR UPDATE, como los triggers de resumen:
+        los cambios de notas de una misma matrícula se serializan.
+        """
+        encontradas = {}
+        for bloque in Matricula.en_bloques(set(matricula_ids), Matricula.MAX_IN):
+            query = f"""
+                SELECT id, alumno_id, curso_id FROM matriculas
+                WHERE id IN ({', '.join(['%s'] * len(bloque))})
+                {'FOR UPDATE' if bloquear else ''}
+            """
+            for fila in execute_query(query, tuple(bloque), fetch=True):
+                encontradas[fila['id']] = {'alumno_id': fila['alumno_id'], 'curso_id': fila['curso_id']}
+        return encontradas
+
+    @staticmethod
+    def separar_repetidas(bloque, clave, vistas):
+        """
+        Separa las filas del bloque cuya clave ya se registró en un bloque
+        confirmado (vistas) o aparece antes en el mismo bloque
+
+        Returns:
+            Tupla ({clave: índice} de las filas a registrar, [índices repetidos])
+        """
+        unicas = {}
+        repetidas = []
+        for i in bloque:
+            k = clave(i)
+            if k in vistas or k in unicas:
+                repetidas.append(i)
+            else:
+                unicas[k] = i
+        return unicas, repetidas
+
+    @staticmethod
+    def crear_lote(matriculas, chunk_size=500):
+        """
+        Matricula en bloques con INSERT multi-fila ... ON DUPLICATE KEY
+
+        Los códigos de alumno y de curso se resuelven con una consulta por
+        lote (no por fila). Cada bloque es una transacción: busca con FOR
+        UPDATE las matrículas que ya existen, inserta el resto en un solo
+        INSERT y, con los triggers por fila omitidos, suma los alumnos nuevos
+        a curso_estadisticas con un upsert por curso y recalcula el resumen
+        de sus alumnos una vez. Una matrícula que ya existía no es un error:
+        se informa como 'existente'. Una clave repetida en el lote solo es
+        error si la primera aparición ya se confirmó o está en el mismo bloque.
+
+        Args:
+            matriculas: Lista de diccionarios ya validados con codigo,
+                codigo_curso, semestre, anio y fecha_matricula
+            chunk_size: Cantidad de filas por bloque
+
+        Returns:
+            Lista alineada con matriculas: {'success': True, 'id': ...,
+            'estado': 'creada'|'existente'} o {'success': False, 'error': ...}
+        """
+        resultados = [None] * len(matriculas)
+        alumnos = Matricula.ids_alumnos_por_codigo(m['codigo'] for m in matriculas)
+        cursos = Matricula.ids_cursos_por_codigo(m['codigo_curso'] for m in matriculas)
+
+        claves = {}
+        for i, m in enumerate(matriculas):
+            if m['codigo'] not in alumnos:
+                resultados[i] = {'success': False, 'error': f"No existe el alumno con código {m['codigo']}"}
+            elif m['codigo_curso'] not in cursos:
+                resultados[i] = {'success': False, 'error': f"No existe el curso {m['codigo_curso']}"}
+            else:
+                claves[i] = (alumnos[m['codigo']], cursos[m['codigo_curso']], m['semestre'], m['anio'])
+
+        query = """
+            INSERT INTO matriculas (alumno_id, curso_id, semestre, anio, fecha_matricula)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE id = id
+        """
+        vistas = set()
+        for bloque in Matricula.en_bloques(list(claves), chunk_size):
+            unicas, repetidas = Matricula.separar_repetidas(bloque, claves.get, vistas)
+            for i in repetidas:
+                resultados[i] = {'success': False, 'error': 'Matrícula repetida dentro del lote'}
+            try:
+                with transaction() as tx:
+                    existentes = Matricula.ids_por_clave(unicas, bloquear=True)
+                    nuevas = [i for clave, i in unicas.items() if clave not in existentes]
+                    with omitir_resumen_por_fila(tx):
+                        tx.executemany(query, [claves[i] + (matriculas[i]['fecha_matricula'],) for i in nuevas])
+                        alumnos_nuevos = Curso.sumar_matriculas(claves[i][:2] for i in nuevas)
+                        Curso.sumar_estadisticas({
+                            curso_id: (cantidad, 0, 0) for curso_id, cantidad in alumnos_nuevos.items()
+                        })
+                        Alumno.reconstruir_resumenes(tx.cursor, {claves[i][0] for i in nuevas})
+                    ids = dict(existentes)
+                    ids.update(Matricula.ids_por_clave(claves[i] for i in nuevas))
+                vistas.update(unicas)
+                for clave, i in unicas.items():
+                    if clave not in ids:
+                        resultados[i] = {'success': False, 'error': 'No se encontró la matrícula después de insertarla'}
+                        continue
+                    resultados[i] = {
+                        'success': True,
+                        'id': ids[clave]['id'],
+                        'estado': 'existente' if clave in existentes else 'creada'
+                    }
+            except Exception as e:
+                for i in unicas.values():
+                    resultados[i] = {'success': False, 'error': str(e)}
+
+        return resultados
@@ -0,0 +1,159 @@
+import unicodedata
+from decimal import Decimal
+from app.models.alumno import Alumno
+from app.models.curso import Curso
+from app.models.matricula import Matricula, omitir_resumen_por_fila
+from app.utils.database import execute_query, transaction
+
+class Nota:
+    @staticmethod
+    def _clave_tipo(tipo):
+        """Compara tipos de evaluación como utf8mb4_unicode_ci (sin mayúsculas ni tildes)"""
+        sin_tildes = unicodedata.normalize('NFKD', tipo).encode('ascii', 'ignore').decode('ascii')
+        return sin_tildes.casefold().strip()
+
+    @staticmethod
+    def notas_existentes(claves):
+        """
+        Notas que ya existen por (matricula_id, tipo_evaluacion) con el índice
+        unique_nota, leídas con FOR UPDATE (dentro de una transacción)
+
+        Returns:
+            {(matricula_id, _clave_tipo(tipo_evaluacion)): nota anterior}
+        """
+        existentes = {}
+        for bloque in Matricula.en_bloques(set(claves), Matricula.MAX_IN):
+            query = f"""
+                SELECT matricula_id, tipo_evaluacion, nota FROM notas
+                WHERE (matricula_id, tipo_evaluacion) IN ({', '.join(['(%s, %s)'] * len(bloque))})
+                FOR UPDATE
+            """
+            params = tuple(valor for clave in bloque for valor in clave)
+            for fila in execute_query(query, params, fetch=True):
+                existentes[(fila['matricula_id'], Nota._clave_tipo(fila['tipo_evaluacion']))] = fila['nota']
+        return existentes
+
+    @staticmethod
+    def _resolver_matriculas(notas):
+        """
+        Devuelve por fila el matricula_id o un mensaje de error
+
+        Las notas traen matricula_id o (codigo, codigo_curso, semestre, anio);
+        los códigos y las matrículas se resuelven con una consulta por lote.
+        """
+        por_codigo = [n for n in notas if n.get('matricula_id') is None]
+        alumnos = Matricula.ids_alumnos_por_codigo(n['codigo'] for n in por_codigo)
+        cursos = Matricula.ids_cursos_por_codigo(n['codigo_curso'] for n in por_codigo)
+        claves = {
+            (alumnos[n['codigo']], cursos[n['codigo_curso']], n['semestre'], n['anio'])
+            for n in por_codigo if n['codigo'] in alumnos and n['codigo_curso'] in cursos
+        }
+        por_clave = Matricula.ids_por_clave(claves)
+        por_id = Matricula.ids_por_id(n['matricula_id'] for n in notas if n.get('matricula_id') is not None)
+
+        resueltas = []
+        for n in notas:
+            if n.get('matricula_id') is not None:
+                if n['matricula_id'] in por_id:
+                    resueltas.append(n['matricula_id'])
+                else:
+                    resueltas.append(f"No existe la matrícula {n['matricula_id']}")
+            elif n['codigo'] not in alumnos:
+                resueltas.append(f"No existe el alumno con código {n['codigo']}")
+            elif n['codigo_curso'] not in cursos:
+                resueltas.append(f"No existe el curso {n['codigo_curso']}")
+            else:
+                clave = (alumnos[n['codigo']], cursos[n['codigo_curso']], n['semestre'], n['anio'])
+                if clave in por_clave:
+                    resueltas.append(por_clave[clave]['id'])
+                else:
+                    resueltas.append(f"El alumno {n['codigo']} no está matriculado en {n['codigo_curso']} "
+                                     f"({n['semestre']} {n['anio']})")
+        return resueltas
+
+    @staticmethod
+    def crear_lote(notas, chunk_size=500):
+        """
+        Registra notas en bloques con INSERT multi-fila ... ON DUPLICATE KEY UPDATE
+
+        Cada bloque es una transacción con un solo INSERT: si la matrícula ya
+        tiene una nota del mismo tipo de evaluación, se actualizan nota, peso
+        y fecha. El bloque bloquea sus matrículas y las notas existentes (FOR
+        UPDATE, igual que los triggers por fila) y, con esos triggers
+        omitidos, suma los cambios a curso_estadisticas con un upsert por
+        curso y recalcula el resumen de sus alumnos una vez.
+
+        Args:
+            notas: Lista de diccionarios ya validados con matricula_id (o
+                codigo, codigo_curso, semestre y anio), tipo_evaluacion, nota,
+                peso y fecha_evaluacion
+            chunk_size: Cantidad de filas por bloque
+
+        Returns:
+            Lista alineada con notas: {'success': True, 'matricula_id': ...,
+            'estado': 'creada'|'actualizada'} o {'success': False, 'error': ...}
+        """
+        resultados = [None] * len(notas)
+        matriculas = {}
+        for i, resuelta in enumerate(Nota._resolver_matriculas(notas)):
+            if isinstance(resuelta, str):
+                resultados[i] = {'success': False, 'error': resuelta}
+            else:
+                matriculas[i] = resuelta
+
+        def clave(i):
+            return (matriculas[i], Nota._clave_tipo(notas[i]['tipo_evaluacion']))
+
+        query = """
+            INSERT INTO notas (matricula_id, tipo_evaluacion, nota, peso, fecha_evaluacion)
+            VALUES (%s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                nota = VALUES(nota),
+                peso = VALUES(peso),
+                fecha_evaluacion = COALESCE(VALUES(fecha_evaluacion), fecha_evaluacion)
+        """
+        vistas = set()
+        for bloque in Matricula.en_bloques(list(matriculas), chunk_size):
+            unicas, repetidas = Matricula.separar_repetidas(bloque, clave, vistas)
+            for i in repetidas:
+                resultados[i] = {'success': False, 'error': 'Nota repetida dentro del lote (misma matrícula y tipo)'}
+            estados = {}
+            try:
+                with transaction() as tx:
+                    bloqueadas = Matricula.ids_por_id({matriculas[i] for i in unicas.values()}, bloquear=True)
+                    filas = []
+                    deltas = {}
+                    anteriores = Nota.notas_existentes(
+                        (matriculas[i], notas[i]['tipo_evaluacion'])
+                        for i in unicas.values() if matriculas[i] in bloqueadas
+                    )
+                    for k, i in unicas.items():
+                        if matriculas[i] not in bloqueadas:
+                            estados[i] = f"No existe la matrícula {matriculas[i]}"
+                            continue
+                        nota = Decimal(str(notas[i]['nota']))
+                        delta = deltas.setdefault(bloqueadas[matriculas[i]]['curso_id'], [0, 0, Decimal(0)])
+                        if k in anteriores:
+                            delta[2] += nota - anteriores[k]
+                            estados[i] = 'actualizada'
+                        else:
+                            delta[1] += 1
+                            delta[2] += nota
+                            estados[i] = 'creada'
+                        filas.append((matriculas[i], notas[i]['tipo_evaluacion'], notas[i]['nota'],
+                                      notas[i]['peso'], notas[i]['fecha_evaluacion']))
+                    with omitir_resumen_por_fila(tx):
+                        tx.executemany(query, filas)
+                        Curso.sumar_estadisticas(deltas)
+                        Alumno.reconstruir_resumenes(tx.cursor, {m['alumno_id'] for m in bloqueadas.values()})
+                vistas.update(k for k, i in unicas.items() if estados[i] in ('creada', 'actualizada'))
+                for i, estado in estados.items():
+                    if estado in ('creada', 'actualizada'):
+                        resultados[i] = {'success': True, 'matricula_id': matriculas[i], 'estado': estado}
+                    else:
+                        resultados[i] = {'success': False, 'error': estado}
+            except Exception as e:
+                for i in unicas.values():
+                    resultados[i] = {'success': False, 'error': str(e)}
+
+        return resultados
@@ -0,0 +1,38 @@
+from flask import Blueprint, request, jsonify
+from app.utils.auth import admin_required
+from app.utils.slow_query import slow_query_log
+
+admin_bp = Blueprint('admin', __name__)
+
+@admin_bp.route('/admin/slow-queries', methods=['GET'])
+@admin_required
+def listar_consultas_lentas():
+    """
+    Últimas consultas que superaron SLOW_QUERY_MS (la más reciente primero)
+
+    Query params:
+        limit: máximo de entradas a devolver
+    """
+    try:
+        limite = request.args.get('limit', type=int)
+        entradas = slow_query_log.entradas(limite)
+
+        return jsonify({
+            'success': True,
+            'config': slow_query_log.stats(),
+            'consultas': entradas,
+            'total': len(entradas)
+        }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al obtener consultas lentas: {str(e)}'
+        }), 500
+
+@admin_bp.route('/admin/slow-queries', methods=['DELETE'])
+@admin_required
+def limpiar_consultas_lentas():
+    """Vacía el buffer en memoria (el archivo JSONL no se modifica)"""
+    slow_query_log.limpiar()
+    return jsonify({'success': True}), 200
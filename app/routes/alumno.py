@@ -1,10 +1,39 @@
-from flask import Blueprint, request, jsonify
+import csv
+import io
+import itertools
+import zlib
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from app.models.alumno import Alumno
 from app.utils.auth import token_required
+from app.utils.pagination import encode_cursor, decode_cursor, CursorInvalidoError
+from app.utils.multiget import parse_ids, indexar_por_id, IdsInvalidosError
+from app.utils.conditional import calcular_etag, respuesta_condicional, version_mas_reciente
 from datetime import datetime
 
 alumno_bp = Blueprint('alumno', __name__)
 
+CAMPOS_ALUMNO = ['codigo', 'dni', 'nombre', 'apellido', 'email', 'telefono', 'fecha_ingreso']
+
+def validar_datos_alumno(data):
+    """
+    Valida los datos de registro de un alumno
+
+    Returns:
+        Mensaje de error o None si los datos son válidos
+    """
+    # Validar campos requeridos
+    campos_requeridos = ['codigo', 'dni', 'nombre', 'apellido']
+    for campo in campos_requeridos:
+        if not data.get(campo):
+            return f'El campo {campo} es requerido'
+    
+    # Validar DNI (8 dígitos)
+    dni = str(data['dni'])
+    if not dni.isdigit() or len(dni) != 8:
+        return 'DNI debe tener 8 dígitos numéricos'
+    
+    return None
+
 @alumno_bp.route('/alumno/registrar', methods=['POST'])
 @token_required
 def registrar_alumno():
@@ -26,20 +55,11 @@ def registrar_alumno():
     try:
         data = request.get_json()
         
-        # Validar campos requeridos
-        campos_requeridos = ['codigo', 'dni', 'nombre', 'apellido']
-        for campo in campos_requeridos:
-            if not data.get(campo):
-                return jsonify({
-                    'success': False,
-                    'error': f'El campo {campo} es requerido'
-                }), 400
-        
-        # Validar DNI (8 dígitos)
-        if not data['dni'].isdigit() or len(data['dni']) != 8:
+        error = validar_datos_alumno(data)
+        if error:
             return jsonify({
                 'success': False,
-                'error': 'DNI debe tener 8 dígitos numéricos'
+                'error': error
             }), 400
         
         # Crear el alumno
@@ -71,23 +91,152 @@ def registrar_alumno():
             'error': f'Error al registrar alumno: {str(e)}'
         }), 500
 
+def _leer_lote_alumnos():
+    """Obtiene las filas del lote desde un JSON (lista) o un CSV (archivo o cuerpo text/csv)"""
+    archivo = request.files.get('file')
+    if archivo is not None:
+        texto = archivo.read().decode('utf-8-sig')
+    elif request.mimetype == 'text/csv':
+        texto = request.get_data(as_text=True).lstrip('\ufeff')
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get('alumnos')
+        if not isinstance(data, list):
+            return None
+        return data
+
+    filas = []
+    for fila in csv.DictReader(io.StringIO(texto)):
+        # Las celdas vacías del CSV se guardan como NULL
+        filas.append({k.strip(): (v.strip() or None) if v is not None else None
+                      for k, v in fila.items() if k})
+    return filas
+
+@alumno_bp.route('/alumnos/registrar-lote', methods=['POST'])
+@token_required
+def registrar_alumnos_lote():
+    """
+    Registra muchos alumnos en una sola petición
+    Inserta en bloques con executemany (una transacción por bloque)
+    
+    Acepta:
+    - Body JSON: lista de alumnos (o {"alumnos": [...]}) con los campos de /alumno/registrar
+    - CSV con el formato de data/alumnos_test.csv, como archivo "file"
+      (multipart/form-data) o como cuerpo text/csv
+    
+    Respuesta:
+    {
+        "success": true,
+        "total": 3,
+        "insertados": 2,
+        "errores": 1,
+        "resultados": [
+            {"fila": 1, "codigo": "A001", "success": true, "alumno_id": 10},
+            {"fila": 2, "codigo": "A002", "success": false, "error": "DNI debe tener 8 dígitos numéricos"},
+            ...
+        ]
+    }
+    """
+    try:
+        filas = _leer_lote_alumnos()
+        
+        if not filas:
+            return jsonify({
+                'success': False,
+                'error': 'Debe proporcionar una lista de alumnos o un archivo CSV'
+            }), 400
+        
+        max_filas = current_app.config['LOTE_MAX_FILAS']
+        if len(filas) > max_filas:
+            return jsonify({
+                'success': False,
+                'error': f'El lote excede el máximo de {max_filas} alumnos'
+            }), 400
+        
+        resultados = [None] * len(filas)
+        validos = []
+        indices_validos = []
+        
+        for i, fila in enumerate(filas):
+            if not isinstance(fila, dict):
+                resultados[i] = {'success': False, 'error': 'Cada alumno debe ser un objeto'}
+                continue
+            error = validar_datos_alumno(fila)
+            if error:
+                resultados[i] = {'success': False, 'error': error}
+                continue
+            alumno = {campo: fila.get(campo) for campo in CAMPOS_ALUMNO}
+            alumno['dni'] = str(alumno['dni'])
+            validos.append(alumno)
+            indices_validos.append(i)
+        
+        if validos:
+            insertados = Alumno.crear_lote(validos, chunk_size=current_app.config['LOTE_CHUNK_SIZE'])
+            for i, resultado in zip(indices_validos, insertados):
+                resultados[i] = resultado
+        
+        reporte = []
+        for i, (fila, resultado) in enumerate(zip(filas, resultados)):
+            item = {
+                'fila': i + 1,
+                'codigo': fila.get('codigo') if isinstance(fila, dict) else None,
+                'success': resultado['success']
+            }
+            if resultado['success']:
+                item['alumno_id'] = resultado['id']
+            else:
+                item['error'] = resultado['error']
+            reporte.append(item)
+        
+        total_insertados = sum(1 for r in resultados if r['success'])
+        
+        return jsonify({
+            'success': True,
+            'total': len(filas),
+            'insertados': total_insertados,
+            'errores': len(filas) - total_insertados,
+            'resultados': reporte
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al registrar lote de alumnos: {str(e)}'
+        }), 500
+
 @alumno_bp.route('/alumno/<int:alumno_id>', methods=['GET'])
 @token_required
 def obtener_alumno(alumno_id):
-    """Obtiene los datos de un alumno por ID"""
+    """
+    Obtiene los datos de un alumno por ID
+
+    Soporta If-None-Match / If-Modified-Since: si el alumno no cambió
+    (según updated_at) responde 304 sin leer ni serializar la fila completa.
+    """
     try:
-        alumno = Alumno.obtener_por_id(alumno_id)
+        version = Alumno.obtener_version(alumno_id)
         
-        if not alumno:
+        if not version:
             return jsonify({
                 'success': False,
                 'error': 'Alumno no encontrado'
             }), 404
         
-        return jsonify({
-            'success': True,
-            'alumno': alumno
-        }), 200
+        def construir():
+            alumno = Alumno.obtener_por_id(alumno_id)
+            if not alumno:
+                return jsonify({
+                    'success': False,
+                    'error': 'Alumno no encontrado'
+                }), 404
+            return jsonify({
+                'success': True,
+                'alumno': alumno
+            }), 200
+        
+        etag = calcular_etag(f'alumno:{alumno_id}', version['updated_at'])
+        return respuesta_condicional(etag, version['updated_at'], construir)
         
     except Exception as e:
         return jsonify({
@@ -98,23 +247,283 @@ def obtener_alumno(alumno_id):
 @alumno_bp.route('/alumnos', methods=['GET'])
 @token_required
 def listar_alumnos():
-    """Lista todos los alumnos con paginación"""
+    """
+    Lista todos los alumnos con paginación
+
+    Por defecto usa paginación por cursor: la respuesta incluye next_cursor
+    y la siguiente página se pide con ?cursor=<next_cursor>.
+    Si se envía ?offset=N se usa la paginación LIMIT/OFFSET anterior.
+    Con ?ids=1,2,3 devuelve esos alumnos indexados por ID (ver listar_alumnos_por_ids).
+    Con ?include=resumen cada alumno trae su resumen académico (mismo query, LEFT JOIN).
+    """
+    if 'ids' in request.args:
+        return listar_alumnos_por_ids(request.args['ids'])
+
     try:
         limit = request.args.get('limit', 100, type=int)
-        offset = request.args.get('offset', 0, type=int)
-        
-        alumnos = Alumno.obtener_todos(limit=limit, offset=offset)
-        
+        incluir_resumen = 'resumen' in request.args.get('include', '').split(',')
+
+        if 'offset' in request.args:
+            offset = request.args.get('offset', 0, type=int)
+            alumnos = Alumno.obtener_todos(limit=limit, offset=offset, incluir_resumen=incluir_resumen)
+        else:
+            cursor = request.args.get('cursor')
+            despues_de = decode_cursor(cursor, 3) if cursor else None
+            alumnos = Alumno.obtener_pagina(limit=limit, despues_de=despues_de,
+                                            incluir_resumen=incluir_resumen)
+
+        if incluir_resumen:
+            Alumno.anidar_resumen(alumnos)
+
+        next_cursor = None
+        if alumnos and len(alumnos) == limit:
+            ultimo = alumnos[-1]
+            next_cursor = encode_cursor((ultimo['apellido'], ultimo['nombre'], ultimo['id']))
+
+        return jsonify({
+            'success': True,
+            'alumnos': alumnos,
+            'count': len(alumnos),
+            'next_cursor': next_cursor
+        }), 200
+
+    except CursorInvalidoError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al listar alumnos: {str(e)}'
+        }), 500
+
+def listar_alumnos_por_ids(texto_ids):
+    """
+    Obtiene varios alumnos en una sola consulta
+
+    Respuesta: {'alumnos': {'<id>': alumno | null}, 'faltantes': [ids]}
+    """
+    try:
+        ids = parse_ids(texto_ids, current_app.config['MULTIGET_MAX_IDS'])
+        alumnos, faltantes = indexar_por_id(ids, Alumno.obtener_por_ids(ids))
+
+        return jsonify({
+            'success': True,
+            'alumnos': alumnos,
+            'faltantes': faltantes,
+            'count': len(ids) - len(faltantes)
+        }), 200
+
+    except IdsInvalidosError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al obtener alumnos: {str(e)}'
+        }), 500
+
+@alumno_bp.route('/alumnos/buscar', methods=['GET'])
+@token_required
+def buscar_alumnos():
+    """
+    Busca alumnos por prefijo de apellido o nombre (sin distinguir tildes ni
+    mayúsculas), prefijo de código o DNI exacto
+
+    Query params:
+        q: Texto a buscar (mínimo BUSQUEDA_MIN_CARACTERES caracteres)
+        limit: Máximo de resultados (por defecto 20, tope BUSQUEDA_MAX_RESULTADOS)
+    """
+    try:
+        texto = request.args.get('q', '').strip()
+        if len(texto) < current_app.config['BUSQUEDA_MIN_CARACTERES']:
+            return jsonify({
+                'success': False,
+                'error': f"q debe tener al menos {current_app.config['BUSQUEDA_MIN_CARACTERES']} caracteres"
+            }), 400
+
+        limit = request.args.get('limit', 20, type=int)
+        limit = max(1, min(limit, current_app.config['BUSQUEDA_MAX_RESULTADOS']))
+        alumnos = Alumno.buscar(texto, limit=limit)
+
         return jsonify({
             'success': True,
             'alumnos': alumnos,
             'count': len(alumnos)
         }), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al buscar alumnos: {str(e)}'
+        }), 500
+
+@alumno_bp.route('/alumnos/export', methods=['GET'])
+@token_required
+def exportar_alumnos():
+    """
+    Exporta todos los alumnos en streaming
+
+    Query params:
+        format: 'csv' (por defecto) o 'ndjson' (un objeto JSON por línea)
+        gzip: 'true' para comprimir la respuesta (Content-Encoding: gzip)
+
+    Las filas se leen con un cursor sin buffer y se envían por bloques, así
+    que la memoria del worker no depende del tamaño de la tabla. El cuerpo
+    se genera dentro del contexto de la petición: el lugar del control de
+    admisión, la métrica de duración y la conexión se liberan cuando termina
+    el envío, no al devolver la respuesta.
+    """
+    formato = request.args.get('format', 'csv').lower()
+    if formato not in ('csv', 'ndjson'):
+        return jsonify({
+            'success': False,
+            'error': "format debe ser 'csv' o 'ndjson'"
+        }), 400
+    comprimir = request.args.get('gzip', 'false').lower() in ('1', 'true')
+
+    try:
+        lotes = Alumno.exportar(current_app.config['EXPORT_FETCH_SIZE'])
+        # Ejecutar la consulta ahora para que un error de BD se responda como 500
+        primer_lote = next(lotes, [])
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al exportar alumnos: {str(e)}'
+        }), 500
+
+    dumps = current_app.json.dumps
+    columnas = Alumno.COLUMNAS_EXPORT
+
+    def serializar(lote):
+        if formato == 'ndjson':
+            return ''.join(dumps(fila) + '\n' for fila in lote)
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerows([fila[c] for c in columnas] for fila in lote)
+        return buffer.getvalue()
+
+    def generar():
+        try:
+            if formato == 'csv':
+                yield (','.join(columnas) + '\r\n').encode('utf-8')
+            for lote in itertools.chain([primer_lote], lotes):
+                if lote:
+                    yield serializar(lote).encode('utf-8')
+        finally:
+            lotes.close()
+
+    def generar_gzip(bloques):
+        compresor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        try:
+            for bloque in bloques:
+                datos = compresor.compress(bloque)
+                if datos:
+                    yield datos
+            yield compresor.flush()
+        finally:
+            bloques.close()
+
+    extension = 'csv' if formato == 'csv' else 'ndjson'
+    cuerpo = generar_gzip(generar()) if comprimir else generar()
+    response = Response(
+        stream_with_context(cuerpo),
+        mimetype='text/csv' if formato == 'csv' else 'application/x-ndjson'
+    )
+    response.headers['Content-Disposition'] = f'attachment; filename=alumnos.{extension}'
+    if comprimir:
+        response.headers['Content-Encoding'] = 'gzip'
+    # Si el cliente corta antes de empezar a leer, igual se libera la conexión
+    response.call_on_close(lotes.close)
+    return response
+
+def _armar_historial(alumno_id):
+    """Ejecuta las consultas del historial y arma la respuesta completa"""
+    historial = Alumno.obtener_historial_agrupado(alumno_id)
+
+    if not historial:
+        return jsonify({
+            'success': False,
+            'error': 'No se encontró historial para este alumno'
+        }), 404
+
+    # Organizar los datos (una fila por matrícula, con sus notas ya agrupadas).
+    # Las notas van como números y las fechas como texto, sin depender de
+    # JSON_DECIMAL / JSON_DATE_FORMAT: es el formato que esperan los clientes
+    cursos = []
+    promedios = []
+    for matricula in historial['matriculas']:
+        notas = []
+        suma_ponderada = 0
+        suma_pesos = 0
+        for registro in matricula['notas']:
+            notas.append({
+                'tipo_evaluacion': registro['tipo_evaluacion'],
+                'nota': float(registro['nota']),
+                'peso': float(registro['peso']),
+                'fecha_evaluacion': str(registro['fecha_evaluacion']) if registro['fecha_evaluacion'] else None
+            })
+            suma_ponderada += registro['nota'] * registro['peso']
+            suma_pesos += registro['peso']
+
+        cursos.append({
+            'curso_id': matricula['curso_id'],
+            'codigo_curso': matricula['codigo_curso'],
+            'nombre': matricula['curso_nombre'],
+            'creditos': matricula['creditos'],
+            'semestre': matricula['semestre'],
+            'anio': matricula['anio'],
+            'fecha_matricula': str(matricula['fecha_matricula']) if matricula['fecha_matricula'] else None,
+            'notas': notas
+        })
+        promedios.append({
+            'curso_id': matricula['curso_id'],
+            'semestre': matricula['semestre'],
+            'anio': matricula['anio'],
+            'promedio_ponderado': round(float(suma_ponderada / suma_pesos), 2) if suma_pesos else None,
+            'suma_pesos': round(float(suma_pesos), 2)
+        })
+
+    return jsonify({
+        'success': True,
+        'alumno': historial['alumno'],
+        'historial': cursos,
+        'total_cursos': len(cursos),
+        'promedios': promedios
+    }), 200
+
+@alumno_bp.route('/alumno/<int:alumno_id>/resumen', methods=['GET'])
+@token_required
+def obtener_resumen(alumno_id):
+    """
+    Resumen académico del alumno: promedio ponderado por créditos, créditos
+    aprobados y cursos por semestre
+
+    Se lee de la tabla resumen alumno_resumen (mantenida por triggers), sin
+    recorrer el historial completo.
+    """
+    try:
+        datos = Alumno.obtener_resumen(alumno_id)
+        
+        if not datos:
+            return jsonify({
+                'success': False,
+                'error': 'Alumno no encontrado'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'alumno': datos['alumno'],
+            'resumen': datos['resumen']
+        }), 200
         
     except Exception as e:
         return jsonify({
             'success': False,
-            'error': f'Error al listar alumnos: {str(e)}'
+            'error': f'Error al obtener resumen: {str(e)}'
         }), 500
 
 @alumno_bp.route('/historial/<int:alumno_id>', methods=['GET'])
@@ -124,56 +533,28 @@ def obtener_historial(alumno_id):
     Obtiene el historial completo de un alumno
     Consulta pesada con múltiples JOINs (Alumnos + Cursos + Matrículas + Notas)
     Ideal para pruebas de lectura intensiva en JMeter
+    
+    'historial' mantiene el formato de siempre; 'promedios' trae, en el mismo
+    orden, el promedio ponderado (suma nota*peso / suma pesos) de cada curso.
+    
+    Con If-None-Match responde 304 a partir de la consulta de versión, sin
+    ejecutar las consultas del historial.
     """
     try:
-        historial = Alumno.obtener_historial_completo(alumno_id)
+        version = Alumno.obtener_version_historial(alumno_id)
         
-        if not historial:
+        if not version:
             return jsonify({
                 'success': False,
                 'error': 'No se encontró historial para este alumno'
             }), 404
         
-        # Organizar los datos
-        alumno_info = {
-            'alumno_id': historial[0]['alumno_id'],
-            'codigo': historial[0]['alumno_codigo'],
-            'nombre': historial[0]['nombre'],
-            'apellido': historial[0]['apellido'],
-            'dni': historial[0]['dni']
-        }
-        
-        cursos = {}
-        for registro in historial:
-            if registro['curso_id']:
-                curso_key = f"{registro['curso_id']}_{registro['semestre']}_{registro['anio']}"
-                
-                if curso_key not in cursos:
-                    cursos[curso_key] = {
-                        'curso_id': registro['curso_id'],
-                        'codigo_curso': registro['codigo_curso'],
-                        'nombre': registro['curso_nombre'],
-                        'creditos': registro['creditos'],
-                        'semestre': registro['semestre'],
-                        'anio': registro['anio'],
-                        'fecha_matricula': str(registro['fecha_matricula']) if registro['fecha_matricula'] else None,
-                        'notas': []
-                    }
-                
-                if registro['nota'] is not None:
-                    cursos[curso_key]['notas'].append({
-                        'tipo_evaluacion': registro['tipo_evaluacion'],
-                        'nota': float(registro['nota']),
-                        'peso': float(registro['peso']),
-                        'fecha_evaluacion': str(registro['fecha_evaluacion']) if registro['fecha_evaluacion'] else None
-                    })
-        
-        return jsonify({
-            'success': True,
-            'alumno': alumno_info,
-            'historial': list(cursos.values()),
-            'total_cursos': len(cursos)
-        }), 200
+        etag = calcular_etag(f'historial:{alumno_id}', *version.values())
+        last_modified = version_mas_reciente(
+            version['alumno_updated_at'], version['matriculas_updated_at'],
+            version['notas_updated_at'], version['cursos_updated_at']
+        )
+        return respuesta_condicional(etag, last_modified, lambda: _armar_historial(alumno_id))
         
     except Exception as e:
         return jsonify({
@@ -1,7 +1,7 @@
 from flask import Blueprint, request, jsonify
 import hashlib
 from app.models.usuario import Usuario
-from app.utils.auth import generate_token
+from app.utils.auth import generate_token, token_required, revoke_token
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -68,3 +68,20 @@ def login():
             'success': False,
             'error': f'Error en autenticación: {str(e)}'
         }), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+@token_required
+def logout():
+    """
+    Revoca el token usado en la petición
+    Las siguientes peticiones con ese token reciben 401 'Token revocado'.
+    La revocación se guarda en tokens_revocados: en este worker rige de
+    inmediato y en los demás en cuanto el token sale de su caché
+    (JWT_REVOCATION_TTL segundos como máximo).
+    """
+    revoke_token(request.token, request.user_data)
+    
+    return jsonify({
+        'success': True,
+        'message': 'Sesión cerrada'
+    }), 200
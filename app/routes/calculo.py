@@ -1,4 +1,5 @@
-from flask import Blueprint, request, jsonify
+import numpy as np
+from flask import Blueprint, request, jsonify, current_app
 from app.utils.auth import token_required
 
 calculo_bp = Blueprint('calculo', __name__)
@@ -180,6 +181,228 @@ def simular_promedio():
             'error': f'Error al calcular promedio: {str(e)}'
         }), 500
 
+def _calcular_lote(alumnos, sistema, nota_minima, incluir_detalle=True):
+    """
+    Calcula los promedios de muchos alumnos a la vez con arreglos de NumPy
+
+    Todas las notas del lote se aplanan en un solo arreglo y cada nota lleva
+    el índice de su alumno; las sumas por alumno se obtienen con bincount y
+    el máximo/mínimo con reduceat, sin recorrer nota por nota en Python.
+
+    Returns:
+        Lista con un resultado por alumno, en el mismo orden de entrada
+    """
+    resultados = [None] * len(alumnos)
+    notas_flat = []
+    pesos_flat = []
+    tipos_flat = []
+    cantidades = []
+    validos = []
+
+    # Aplanar la entrada (un alumno con datos mal formados no detiene el lote)
+    for i, alumno in enumerate(alumnos):
+        notas_alumno = alumno.get('notas') if isinstance(alumno, dict) else None
+        if not isinstance(notas_alumno, list) or len(notas_alumno) == 0:
+            resultados[i] = 'La lista de notas debe contener al menos un elemento'
+            continue
+        if not all(isinstance(n, dict) for n in notas_alumno):
+            resultados[i] = 'Cada nota debe ser un objeto con tipo, nota y peso'
+            continue
+        try:
+            notas = [float(n.get('nota', 0)) for n in notas_alumno]
+            pesos = [float(n.get('peso', 1.0)) for n in notas_alumno]
+        except (TypeError, ValueError) as ve:
+            resultados[i] = f'Error en los datos numéricos: {str(ve)}'
+            continue
+        notas_flat.extend(notas)
+        pesos_flat.extend(pesos)
+        tipos_flat.extend(n.get('tipo', 'Sin tipo') for n in notas_alumno)
+        cantidades.append(len(notas_alumno))
+        validos.append(i)
+
+    if validos:
+        notas = np.asarray(notas_flat, dtype=np.float64)
+        pesos = np.asarray(pesos_flat, dtype=np.float64)
+        cantidades = np.asarray(cantidades)
+        n = len(validos)
+        seg = np.repeat(np.arange(n), cantidades)
+        inicios = np.concatenate(([0], np.cumsum(cantidades)[:-1]))
+
+        # Validaciones vectorizadas
+        nota_invalida = (notas < 0) | (notas > sistema)
+        peso_invalido = (pesos < 0) | (pesos > 1)
+        alumno_nota_invalida = np.bincount(seg, weights=nota_invalida, minlength=n) > 0
+        alumno_peso_invalido = np.bincount(seg, weights=peso_invalido, minlength=n) > 0
+
+        # Sumas por alumno
+        suma_pesos = np.bincount(seg, weights=pesos, minlength=n)
+        suma_simple = np.bincount(seg, weights=notas, minlength=n)
+        contribucion = notas * pesos
+        suma_ponderada = np.bincount(seg, weights=contribucion, minlength=n)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            promedio_simple = suma_simple / cantidades
+            promedio_ponderado = suma_ponderada / suma_pesos
+            varianza = np.bincount(seg, weights=(notas - promedio_simple[seg]) ** 2, minlength=n) / cantidades
+            desviacion = np.sqrt(varianza)
+
+        nota_maxima = np.maximum.reduceat(notas, inicios)
+        nota_minima_obtenida = np.minimum.reduceat(notas, inicios)
+        nota_final = np.round(promedio_ponderado)
+        aprobado = promedio_ponderado >= nota_minima
+
+        if sistema == 20:  # Sistema vigesimal peruano
+            categoria = np.select(
+                [promedio_ponderado < nota_minima, promedio_ponderado < 13,
+                 promedio_ponderado < 16, promedio_ponderado < 18],
+                ['Desaprobado', 'Aprobado', 'Bueno', 'Muy Bueno'],
+                default='Excelente'
+            )
+        else:
+            categoria = np.where(aprobado, 'Aprobado', 'Desaprobado')
+
+        # Pasar a tipos nativos de Python una sola vez. El redondeo se hace
+        # con round() de Python para que coincida con /simular-promedio
+        # (np.round redondea distinto algunos valores terminados en 5)
+        suma_pesos_l = suma_pesos.tolist()
+        promedio_simple_l = promedio_simple.tolist()
+        promedio_ponderado_l = promedio_ponderado.tolist()
+        nota_final_l = nota_final.tolist()
+        aprobado_l = aprobado.tolist()
+        categoria_l = categoria.tolist()
+        desviacion_l = desviacion.tolist()
+        nota_maxima_l = nota_maxima.tolist()
+        nota_minima_l = nota_minima_obtenida.tolist()
+        cantidades_l = cantidades.tolist()
+        inicios_l = inicios.tolist()
+        if incluir_detalle:
+            contribucion_l = contribucion.tolist()
+
+        for k, i in enumerate(validos):
+            if alumno_nota_invalida[k] or alumno_peso_invalido[k]:
+                inicio = inicios_l[k]
+                fin = inicio + cantidades_l[k]
+                if alumno_nota_invalida[k]:
+                    j = inicio + int(np.argmax(nota_invalida[inicio:fin]))
+                    resultados[i] = f'La nota {notas_flat[j]} está fuera del rango válido (0-{sistema})'
+                else:
+                    j = inicio + int(np.argmax(peso_invalido[inicio:fin]))
+                    resultados[i] = f'El peso {pesos_flat[j]} debe estar entre 0 y 1'
+                continue
+            if abs(suma_pesos_l[k] - 1.0) > 0.01:
+                resultados[i] = f'La suma de pesos debe ser 1.0 (actual: {suma_pesos_l[k]})'
+                continue
+
+            resultado = {
+                'promedio_simple': round(promedio_simple_l[k], 2),
+                'promedio_ponderado': round(promedio_ponderado_l[k], 2),
+                'nota_final': int(nota_final_l[k]),
+                'aprobado': aprobado_l[k],
+                'categoria': categoria_l[k],
+                'sistema_evaluacion': sistema,
+                'nota_minima_aprobacion': nota_minima,
+                'detalles': {
+                    'cantidad_evaluaciones': cantidades_l[k],
+                    'nota_maxima': nota_maxima_l[k],
+                    'nota_minima': nota_minima_l[k],
+                    'desviacion_estandar': round(desviacion_l[k], 2),
+                    'suma_pesos': round(suma_pesos_l[k], 2)
+                }
+            }
+            if incluir_detalle:
+                inicio = inicios_l[k]
+                ponderado = promedio_ponderado_l[k]
+                detalle = []
+                for j in range(inicio, inicio + cantidades_l[k]):
+                    aporte = round(contribucion_l[j], 2)
+                    detalle.append({
+                        'tipo': tipos_flat[j],
+                        'nota': notas_flat[j],
+                        'peso': pesos_flat[j],
+                        'contribucion': aporte,
+                        'porcentaje_contribucion': round((aporte / ponderado) * 100, 2) if ponderado else 0.0
+                    })
+                resultado['notas_detalladas'] = detalle
+            resultados[i] = resultado
+
+    return resultados
+
+@calculo_bp.route('/simular-promedio/lote', methods=['POST'])
+@token_required
+def simular_promedio_lote():
+    """
+    Versión por lote de /simular-promedio (CPU-intensive, vectorizada con NumPy)
+    Calcula los promedios de muchos alumnos en una sola petición
+    
+    Body JSON:
+    {
+        "alumnos": [
+            {"id": "A001", "notas": [{"tipo": "Parcial 1", "nota": 15.5, "peso": 0.5}, ...]},
+            {"id": "A002", "notas": [...]}
+        ],
+        "sistema": "20",
+        "nota_minima_aprobacion": 10.5,
+        "incluir_detalle": true
+    }
+    
+    Cada alumno devuelve el mismo "resultado" que /simular-promedio, o su
+    error de validación sin detener el resto del lote.
+    """
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('alumnos'), list) or len(data['alumnos']) == 0:
+            return jsonify({
+                'success': False,
+                'error': 'Debe proporcionar una lista de alumnos con sus notas'
+            }), 400
+        
+        alumnos = data['alumnos']
+        max_alumnos = current_app.config['CALCULO_LOTE_MAX_ALUMNOS']
+        if len(alumnos) > max_alumnos:
+            return jsonify({
+                'success': False,
+                'error': f'El lote excede el máximo de {max_alumnos} alumnos'
+            }), 400
+        
+        sistema = int(data.get('sistema', 20))
+        nota_minima = float(data.get('nota_minima_aprobacion', 10.5))
+        incluir_detalle = bool(data.get('incluir_detalle', True))
+        
+        calculos = _calcular_lote(alumnos, sistema, nota_minima, incluir_detalle)
+        
+        resultados = []
+        for alumno, calculo in zip(alumnos, calculos):
+            item = {'id': alumno.get('id') if isinstance(alumno, dict) else None}
+            if isinstance(calculo, dict):
+                item['success'] = True
+                item['resultado'] = calculo
+            else:
+                item['success'] = False
+                item['error'] = calculo
+            resultados.append(item)
+        
+        calculados = sum(1 for r in resultados if r['success'])
+        
+        return jsonify({
+            'success': True,
+            'total': len(resultados),
+            'calculados': calculados,
+            'errores': len(resultados) - calculados,
+            'resultados': resultados
+        }), 200
+        
+    except ValueError as ve:
+        return jsonify({
+            'success': False,
+            'error': f'Error en los datos numéricos: {str(ve)}'
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al calcular promedios: {str(e)}'
+        }), 500
+
 @calculo_bp.route('/simular-promedio-simple', methods=['POST'])
 def simular_promedio_simple():
     """
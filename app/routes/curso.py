@@ -1,24 +1,38 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.models.curso import Curso
 from app.utils.auth import token_required
+from app.utils.cache import TTLCache
+from app.utils.multiget import parse_ids, indexar_por_id, IdsInvalidosError
+from app.utils.conditional import calcular_etag, respuesta_condicional
 
 curso_bp = Blueprint('curso', __name__)
 
+# Caché del resultado de /cursos/estadisticas (consulta pesada)
+estadisticas_cache = TTLCache()
+
 @curso_bp.route('/cursos/disponibles', methods=['GET'])
 @token_required
 def listar_cursos_disponibles():
     """
     Lista todos los cursos disponibles
     Consulta simple para comparar con la consulta pesada
+    
+    Soporta If-None-Match: la versión es la cantidad de cursos y el último
+    updated_at, así que un 304 no lee la lista.
     """
     try:
-        cursos = Curso.obtener_disponibles()
+        version = Curso.obtener_version_disponibles()
         
-        return jsonify({
-            'success': True,
-            'cursos': cursos,
-            'total': len(cursos)
-        }), 200
+        def construir():
+            cursos = Curso.obtener_disponibles()
+            return jsonify({
+                'success': True,
+                'cursos': cursos,
+                'total': len(cursos)
+            }), 200
+        
+        etag = calcular_etag('cursos:disponibles', version['total'], version['updated_at'])
+        return respuesta_condicional(etag, version['updated_at'], construir)
         
     except Exception as e:
         return jsonify({
@@ -26,6 +40,27 @@ def listar_cursos_disponibles():
             'error': f'Error al obtener cursos: {str(e)}'
         }), 500
 
+def _calcular_estadisticas_cursos():
+    """Ejecuta la consulta pesada y la convierte al formato de la respuesta"""
+    estadisticas = Curso.obtener_con_matriculas()
+    
+    # Procesar estadísticas para formato más legible
+    resultado = []
+    for curso in estadisticas:
+        resultado.append({
+            'curso_id': curso['id'],
+            'codigo': curso['codigo_curso'],
+            'nombre': curso['nombre'],
+            'creditos': curso['creditos'],
+            'descripcion': curso['descripcion'],
+            'estadisticas': {
+                'total_alumnos_matriculados': curso['total_alumnos'],
+                'total_evaluaciones_realizadas': curso['total_evaluaciones'],
+                'promedio_general': round(float(curso['promedio_general']), 2) if curso['promedio_general'] else 0
+            }
+        })
+    return resultado
+
 @curso_bp.route('/cursos/estadisticas', methods=['GET'])
 @token_required
 def obtener_estadisticas_cursos():
@@ -39,31 +74,26 @@ def obtener_estadisticas_cursos():
     - Calcula agregaciones (COUNT, AVG)
     - Agrupa por varios campos
     - Simula una consulta real de reportes
+    
+    El resultado se guarda en caché ESTADISTICAS_CACHE_TTL segundos. Los
+    headers X-Cache (HIT/MISS/STALE) y Age indican el estado de la caché.
     """
     try:
-        estadisticas = Curso.obtener_con_matriculas()
+        resultado, edad, estado = estadisticas_cache.get_or_compute(
+            'estadisticas',
+            _calcular_estadisticas_cursos,
+            ttl=current_app.config['ESTADISTICAS_CACHE_TTL'],
+            stale_ttl=current_app.config['ESTADISTICAS_CACHE_STALE']
+        )
         
-        # Procesar estadísticas para formato más legible
-        resultado = []
-        for curso in estadisticas:
-            resultado.append({
-                'curso_id': curso['id'],
-                'codigo': curso['codigo_curso'],
-                'nombre': curso['nombre'],
-                'creditos': curso['creditos'],
-                'descripcion': curso['descripcion'],
-                'estadisticas': {
-                    'total_alumnos_matriculados': curso['total_alumnos'],
-                    'total_evaluaciones_realizadas': curso['total_evaluaciones'],
-                    'promedio_general': round(float(curso['promedio_general']), 2) if curso['promedio_general'] else 0
-                }
-            })
-        
-        return jsonify({
+        response = jsonify({
             'success': True,
             'cursos': resultado,
             'total_cursos': len(resultado)
-        }), 200
+        })
+        response.headers['X-Cache'] = estado
+        response.headers['Age'] = str(int(edad))
+        return response, 200
         
     except Exception as e:
         return jsonify({
@@ -71,23 +101,73 @@ def obtener_estadisticas_cursos():
             'error': f'Error al obtener estadísticas: {str(e)}'
         }), 500
 
+@curso_bp.route('/cursos', methods=['GET'])
+@token_required
+def listar_cursos_por_ids():
+    """
+    Obtiene varios cursos en una sola consulta: GET /cursos?ids=1,2,3
+
+    Respuesta: {'cursos': {'<id>': curso | null}, 'faltantes': [ids]}
+    """
+    if 'ids' not in request.args:
+        return jsonify({
+            'success': False,
+            'error': 'El parámetro ids es requerido (use /cursos/disponibles para listar todos)'
+        }), 400
+
+    try:
+        ids = parse_ids(request.args['ids'], current_app.config['MULTIGET_MAX_IDS'])
+        cursos, faltantes = indexar_por_id(ids, Curso.obtener_por_ids(ids))
+
+        return jsonify({
+            'success': True,
+            'cursos': cursos,
+            'faltantes': faltantes,
+            'count': len(ids) - len(faltantes)
+        }), 200
+
+    except IdsInvalidosError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al obtener cursos: {str(e)}'
+        }), 500
+
 @curso_bp.route('/curso/<int:curso_id>', methods=['GET'])
 @token_required
 def obtener_curso(curso_id):
-    """Obtiene información de un curso específico"""
+    """
+    Obtiene información de un curso específico
+
+    Soporta If-None-Match / If-Modified-Since a partir de updated_at.
+    """
     try:
-        curso = Curso.obtener_por_id(curso_id)
+        version = Curso.obtener_version(curso_id)
         
-        if not curso:
+        if not version:
             return jsonify({
                 'success': False,
                 'error': 'Curso no encontrado'
             }), 404
         
-        return jsonify({
-            'success': True,
-            'curso': curso
-        }), 200
+        def construir():
+            curso = Curso.obtener_por_id(curso_id)
+            if not curso:
+                return jsonify({
+                    'success': False,
+                    'error': 'Curso no encontrado'
+                }), 404
+            return jsonify({
+                'success': True,
+                'curso': curso
+            }), 200
+        
+        etag = calcular_etag(f'curso:{curso_id}', version['updated_at'])
+        return respuesta_condicional(etag, version['updated_at'], construir)
         
     except Exception as e:
         return jsonify({
@@ -0,0 +1,266 @@
+import json
+from datetime import date, datetime
+from flask import Blueprint, request, jsonify, current_app
+from app.models.matricula import Matricula
+from app.models.nota import Nota
+from app.utils.auth import token_required
+
+matricula_bp = Blueprint('matricula', __name__)
+
+MIMETYPES_NDJSON = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+def _leer_lote(clave):
+    """
+    Obtiene los registros del lote desde JSON (lista o {clave: [...]}) o NDJSON
+
+    Returns:
+        Lista de registros, o None si el cuerpo no es válido. En NDJSON las
+        líneas que no son JSON válido quedan como str con el mensaje de error.
+    """
+    if request.mimetype in MIMETYPES_NDJSON:
+        registros = []
+        for numero, linea in enumerate(request.get_data(as_text=True).splitlines(), start=1):
+            if not linea.strip():
+                continue
+            try:
+                registros.append(json.loads(linea))
+            except ValueError:
+                registros.append(f'Línea {numero}: JSON inválido')
+        return registros
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get(clave)
+    if not isinstance(data, list):
+        return None
+    return data
+
+def _texto(registro, campo, max_largo):
+    valor = registro.get(campo)
+    if valor is None or not str(valor).strip():
+        raise ValueError(f'El campo {campo} es requerido')
+    valor = str(valor).strip()
+    if len(valor) > max_largo:
+        raise ValueError(f'El campo {campo} admite hasta {max_largo} caracteres')
+    return valor
+
+def _entero(registro, campo, minimo, maximo):
+    valor = registro.get(campo)
+    if isinstance(valor, bool):
+        raise ValueError(f'El campo {campo} debe ser un entero')
+    try:
+        valor = int(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f'El campo {campo} debe ser un entero')
+    if not minimo <= valor <= maximo:
+        raise ValueError(f'El campo {campo} debe estar entre {minimo} y {maximo}')
+    return valor
+
+def _numero(registro, campo, minimo, maximo, por_defecto=None):
+    valor = registro.get(campo, por_defecto)
+    if valor is None:
+        raise ValueError(f'El campo {campo} es requerido')
+    if isinstance(valor, bool):
+        raise ValueError(f'El campo {campo} debe ser numérico')
+    try:
+        valor = float(valor)
+    except (TypeError, ValueError):
+        raise ValueError(f'El campo {campo} debe ser numérico')
+    # Mismas restricciones que los CHECK de la tabla notas
+    if not minimo <= valor <= maximo:
+        raise ValueError(f'El campo {campo} debe estar entre {minimo:g} y {maximo:g} (recibido {valor:g})')
+    return round(valor, 2)
+
+def _fecha(registro, campo, con_hora=False):
+    valor = registro.get(campo)
+    if valor is None or valor == '':
+        return None
+    try:
+        return datetime.fromisoformat(str(valor)) if con_hora else date.fromisoformat(str(valor))
+    except ValueError:
+        raise ValueError(f"El campo {campo} debe tener formato {'AAAA-MM-DD[ HH:MM:SS]' if con_hora else 'AAAA-MM-DD'}")
+
+def _clave_matricula(registro):
+    """codigo, codigo_curso, semestre y anio de una matrícula (semestre en mayúsculas)"""
+    return {
+        'codigo': _texto(registro, 'codigo', 20),
+        'codigo_curso': _texto(registro, 'codigo_curso', 20),
+        'semestre': _texto(registro, 'semestre', 10).upper(),
+        'anio': _entero(registro, 'anio', 1900, 2100)
+    }
+
+def validar_matricula(registro):
+    """Devuelve la matrícula normalizada o lanza ValueError con el motivo"""
+    matricula = _clave_matricula(registro)
+    matricula['fecha_matricula'] = _fecha(registro, 'fecha_matricula', con_hora=True) or datetime.now()
+    return matricula
+
+def validar_nota(registro):
+    """Devuelve la nota normalizada o lanza ValueError con el motivo"""
+    if registro.get('matricula_id') is not None:
+        nota = {'matricula_id': _entero(registro, 'matricula_id', 1, 2**31 - 1)}
+    else:
+        nota = _clave_matricula(registro)
+    nota['tipo_evaluacion'] = _texto(registro, 'tipo_evaluacion', 50)
+    nota['nota'] = _numero(registro, 'nota', 0, 20)
+    nota['peso'] = _numero(registro, 'peso', 0, 1, por_defecto=1.0)
+    nota['fecha_evaluacion'] = _fecha(registro, 'fecha_evaluacion')
+    return nota
+
+def _procesar_lote(clave, validar, crear_lote, describir):
+    """
+    Lee, valida y registra un lote, y arma el reporte por registro
+
+    Los registros inválidos se reportan sin llegar a MySQL; el resto se
+    registra en bloques de LOTE_CHUNK_SIZE.
+    """
+    registros = _leer_lote(clave)
+    if not registros:
+        return jsonify({
+            'success': False,
+            'error': f'Debe proporcionar una lista de {clave} (JSON o NDJSON)'
+        }), 400
+
+    max_filas = current_app.config['LOTE_MAX_FILAS']
+    if len(registros) > max_filas:
+        return jsonify({
+            'success': False,
+            'error': f'El lote excede el máximo de {max_filas} {clave}'
+        }), 400
+
+    resultados = [None] * len(registros)
+    validos = []
+    indices_validos = []
+    for i, registro in enumerate(registros):
+        if isinstance(registro, str):
+            resultados[i] = {'success': False, 'error': registro}
+            continue
+        if not isinstance(registro, dict):
+            resultados[i] = {'success': False, 'error': 'Cada registro debe ser un objeto'}
+            continue
+        try:
+            validos.append(validar(registro))
+            indices_validos.append(i)
+        except ValueError as e:
+            resultados[i] = {'success': False, 'error': str(e)}
+
+    if validos:
+        creados = crear_lote(validos, chunk_size=current_app.config['LOTE_CHUNK_SIZE'])
+        for i, resultado in zip(indices_validos, creados):
+            resultados[i] = resultado
+
+    reporte = []
+    conteo = {}
+    for i, (registro, resultado) in enumerate(zip(registros, resultados)):
+        item = {'fila': i + 1}
+        if isinstance(registro, dict):
+            item.update(describir(registro))
+        item['success'] = resultado['success']
+        if resultado['success']:
+            item.update({k: v for k, v in resultado.items() if k not in ('success', 'id')})
+            if 'id' in resultado:
+                item['matricula_id'] = resultado['id']
+            conteo[resultado['estado']] = conteo.get(resultado['estado'], 0) + 1
+        else:
+            item['error'] = resultado['error']
+        reporte.append(item)
+
+    return {
+        'success': True,
+        'total': len(registros),
+        'errores': sum(1 for r in resultados if not r['success']),
+        'conteo': conteo,
+        'resultados': reporte
+    }
+
+@matricula_bp.route('/matriculas/lote', methods=['POST'])
+@token_required
+def registrar_matriculas_lote():
+    """
+    Matricula alumnos en cursos por lote
+
+    Acepta JSON (lista o {"matriculas": [...]}) o NDJSON
+    (Content-Type: application/x-ndjson, un objeto por línea):
+    {"codigo": "A20240001", "codigo_curso": "CS101", "semestre": "2024-1", "anio": 2024}
+
+    fecha_matricula es opcional. Una matrícula que ya existe no es un error
+    (estado "existente").
+
+    Respuesta:
+    {
+        "success": true,
+        "total": 3,
+        "creadas": 1,
+        "existentes": 1,
+        "errores": 1,
+        "resultados": [
+            {"fila": 1, "codigo": "A20240001", "codigo_curso": "CS101", "success": true,
+             "estado": "creada", "matricula_id": 15},
+            {"fila": 3, ..., "success": false, "error": "No existe el curso XX999"}
+        ]
+    }
+    """
+    try:
+        respuesta = _procesar_lote(
+            'matriculas', validar_matricula, Matricula.crear_lote,
+            lambda r: {'codigo': r.get('codigo'), 'codigo_curso': r.get('codigo_curso')}
+        )
+        if not isinstance(respuesta, dict):
+            return respuesta
+        conteo = respuesta.pop('conteo')
+        respuesta['creadas'] = conteo.get('creada', 0)
+        respuesta['existentes'] = conteo.get('existente', 0)
+        return jsonify(respuesta), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al registrar lote de matrículas: {str(e)}'
+        }), 500
+
+@matricula_bp.route('/notas/lote', methods=['POST'])
+@token_required
+def registrar_notas_lote():
+    """
+    Registra notas por lote
+
+    Acepta JSON (lista o {"notas": [...]}) o NDJSON. Cada nota indica la
+    matrícula con matricula_id o con codigo, codigo_curso, semestre y anio:
+    {"codigo": "A20240001", "codigo_curso": "CS101", "semestre": "2024-1", "anio": 2024,
+     "tipo_evaluacion": "Parcial 1", "nota": 15.5, "peso": 0.3, "fecha_evaluacion": "2024-04-20"}
+
+    nota debe estar entre 0 y 20 y peso entre 0 y 1 (por defecto 1). Si la
+    matrícula ya tiene una nota del mismo tipo_evaluacion, se actualiza
+    (estado "actualizada").
+
+    Respuesta:
+    {
+        "success": true,
+        "total": 2,
+        "creadas": 1,
+        "actualizadas": 0,
+        "errores": 1,
+        "resultados": [
+            {"fila": 1, "tipo_evaluacion": "Parcial 1", "success": true, "estado": "creada", "matricula_id": 15},
+            {"fila": 2, "tipo_evaluacion": "Final", "success": false,
+             "error": "El campo nota debe estar entre 0 y 20 (recibido 21)"}
+        ]
+    }
+    """
+    try:
+        respuesta = _procesar_lote(
+            'notas', validar_nota, Nota.crear_lote,
+            lambda r: {k: r.get(k) for k in ('codigo', 'codigo_curso', 'tipo_evaluacion') if r.get(k) is not None}
+        )
+        if not isinstance(respuesta, dict):
+            return respuesta
+        conteo = respuesta.pop('conteo')
+        respuesta['creadas'] = conteo.get('creada', 0)
+        respuesta['actualizadas'] = conteo.get('actualizada', 0)
+        return jsonify(respuesta), 200
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': f'Error al registrar lote de notas: {str(e)}'
+        }), 500
@@ -1,6 +1,8 @@
 // API Configuration
 const API_BASE_URL = 'http://localhost:5001/api';
 let authToken = localStorage.getItem('token');
+// Máximo de ids por petición de /alumnos?ids= y /cursos?ids= (MULTIGET_MAX_IDS)
+const MULTIGET_MAX_IDS = 100;
 
 // API Helper
 async function apiCall(endpoint, method = 'GET', data = null) {
@@ -97,6 +99,19 @@ async function loadSectionData(section) {
     }
 }
 
+// Multi-get: resuelve varios ids con una petición por cada MULTIGET_MAX_IDS
+// en lugar de una por id. Devuelve {id: registro | null}
+async function obtenerPorIds(recurso, ids) {
+    const unicos = [...new Set(ids)];
+    const resultado = {};
+    for (let i = 0; i < unicos.length; i += MULTIGET_MAX_IDS) {
+        const lote = unicos.slice(i, i + MULTIGET_MAX_IDS);
+        const data = await apiCall(`/${recurso}?ids=${lote.join(',')}`);
+        Object.assign(resultado, data[recurso]);
+    }
+    return resultado;
+}
+
 // Dashboard
 async function loadDashboard() {
     try {
@@ -116,7 +131,7 @@ async function loadDashboard() {
         let count = 0;
         cursos.cursos.forEach(curso => {
             if (curso.estadisticas.promedio_general > 0) {
-                totalPromedio += curso.estadisticas.promedio_general;
+                totalPromedio += Number(curso.estadisticas.promedio_general);
                 count++;
             }
         });
@@ -131,13 +146,23 @@ async function loadDashboard() {
 }
 
 // Alumnos
-async function loadAlumnos() {
+let alumnosNextCursor = null;
+
+async function loadAlumnos(append = false) {
     try {
         showLoading(true);
-        const data = await apiCall('/alumnos?limit=100');
+        // Paginación por cursor: la siguiente página continúa desde next_cursor
+        let endpoint = '/alumnos?limit=100';
+        if (append && alumnosNextCursor) {
+            endpoint += `&cursor=${encodeURIComponent(alumnosNextCursor)}`;
+        }
+        const data = await apiCall(endpoint);
+        alumnosNextCursor = data.next_cursor;
         
         const tbody = document.getElementById('alumnos-tbody');
-        tbody.innerHTML = '';
+        if (!append) {
+            tbody.innerHTML = '';
+        }
 
         data.alumnos.forEach(alumno => {
             const tr = document.createElement('tr');
@@ -156,6 +181,8 @@ async function loadAlumnos() {
             tbody.appendChild(tr);
         });
 
+        document.getElementById('alumnos-mas').style.display = alumnosNextCursor ? 'inline-block' : 'none';
+
         showLoading(false);
     } catch (error) {
         showLoading(false);
@@ -195,6 +222,8 @@ async function verHistorial(alumnoId) {
     try {
         showLoading(true);
         const data = await apiCall(`/historial/${alumnoId}`);
+        // Descripción de todos los cursos del historial en una sola petición
+        const cursos = await obtenerPorIds('cursos', data.historial.map(curso => curso.curso_id));
         
         let html = `
             <div class="card">
@@ -212,6 +241,10 @@ async function verHistorial(alumnoId) {
                         <h4>${curso.nombre} (${curso.codigo_curso})</h4>
                         <p><strong>Semestre:</strong> ${curso.semestre} ${curso.anio} | <strong>Créditos:</strong> ${curso.creditos}</p>
                 `;
+                const detalle = cursos[curso.curso_id];
+                if (detalle && detalle.descripcion) {
+                    html += `<p>${detalle.descripcion}</p>`;
+                }
 
                 if (curso.notas.length > 0) {
                     html += '<table><thead><tr><th>Evaluación</th><th>Nota</th><th>Peso</th></tr></thead><tbody>';
@@ -384,7 +417,12 @@ async function calcularPromedio(event) {
 }
 
 // Logout
-function logout() {
+async function logout() {
+    try {
+        await apiCall('/logout', 'POST');
+    } catch (error) {
+        // El token ya no era válido; se cierra la sesión igual
+    }
     localStorage.removeItem('token');
     window.location.reload();
 }
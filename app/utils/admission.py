@@ -0,0 +1,230 @@
+import threading
+import time
+from collections import deque
+
+from flask import g, jsonify, request
+
+from app.utils.auth import admin_required
+
+# Endpoints que no pasan por control de admisión (diagnóstico y páginas)
+ENDPOINTS_LIBRES = {
+    'health', 'health_pool', 'health_replicas', 'health_jwt_cache', 'health_admission',
+    'prometheus_metrics', 'static', 'views.login', 'views.dashboard'
+}
+
+# Clase de cada endpoint; los que no figuran aquí son 'normal'
+CLASES_ENDPOINT = {
+    'curso.obtener_estadisticas_cursos': 'pesado',
+    'alumno.obtener_historial': 'pesado',
+    'alumno.exportar_alumnos': 'pesado',
+    'alumno.registrar_alumnos_lote': 'pesado',
+    'matricula.registrar_matriculas_lote': 'pesado',
+    'matricula.registrar_notas_lote': 'pesado',
+    'calculo.simular_promedio_lote': 'pesado',
+    'auth.login': 'auth',
+    'auth.logout': 'auth'
+}
+
+
+class ClaseAdmision:
+    """
+    Límite de concurrencia de una clase de endpoints con cola de espera acotada.
+
+    Hasta `limite` peticiones se atienden a la vez. Las siguientes esperan en
+    una cola, mientras entre las en curso y las en cola no pasen de
+    `limite + max_cola`, durante `timeout` segundos como
+    máximo; si la cola está llena o vence la espera, la petición se rechaza.
+    La cola es FIFO: cada petición en espera tiene su propio turno y solo se
+    despierta la primera, así una recién llegada no se adelanta a las que
+    ya esperaban.
+    """
+
+    def __init__(self, nombre, limite, max_cola, timeout):
+        self.nombre = nombre
+        self.limite = limite
+        self.max_cola = max_cola
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._cola = deque()
+        self.en_curso = 0
+        self.max_en_cola = 0
+        self.admitidas = 0
+        self.esperas = 0
+        self.espera_total = 0.0
+        self.rechazadas_cola_llena = 0
+        self.rechazadas_timeout = 0
+
+    def entrar(self):
+        """Devuelve True si la petición puede ejecutarse (hay que llamar a salir())"""
+        with self._lock:
+            if self.en_curso < self.limite and not self._cola:
+                self.en_curso += 1
+                self.admitidas += 1
+                return True
+            # Se cuentan también las en curso: una en cola ya despertada por
+            # salir() sigue en la cola hasta que retoma el lock, y no debe
+            # hacer rechazar a la que llega mientras tanto
+            if self.en_curso + len(self._cola) >= self.limite + self.max_cola:
+                self.rechazadas_cola_llena += 1
+                return False
+
+            turno = threading.Condition(self._lock)
+            self._cola.append(turno)
+            self.max_en_cola = max(self.max_en_cola, len(self._cola))
+            inicio = time.monotonic()
+            admitida = turno.wait_for(
+                lambda: self._cola[0] is turno and self.en_curso < self.limite, self.timeout
+            )
+            self._cola.remove(turno)
+            self.esperas += 1
+            self.espera_total += time.monotonic() - inicio
+            if admitida:
+                self.en_curso += 1
+                self.admitidas += 1
+            else:
+                self.rechazadas_timeout += 1
+            # El siguiente de la cola puede tener lugar (se liberó más de uno,
+            # o esta petición venció siendo la primera)
+            self._despertar_primero()
+            return admitida
+
+    def salir(self):
+        with self._lock:
+            self.en_curso -= 1
+            self._despertar_primero()
+
+    def _despertar_primero(self):
+        if self._cola and self.en_curso < self.limite:
+            self._cola[0].notify()
+
+    @property
+    def en_cola(self):
+        return len(self._cola)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'limite': self.limite,
+                'max_cola': self.max_cola,
+                'timeout': self.timeout,
+                'en_curso': self.en_curso,
+                'en_cola': self.en_cola,
+                'max_en_cola': self.max_en_cola,
+                'admitidas': self.admitidas,
+                'esperas': self.esperas,
+                'espera_promedio': round(self.espera_total / self.esperas, 6) if self.esperas else 0.0,
+                'rechazadas_cola_llena': self.rechazadas_cola_llena,
+                'rechazadas_timeout': self.rechazadas_timeout
+            }
+
+
+def presupuesto_hilos(nombre, hilos):
+    """
+    Hilos del worker que puede ocupar una clase entre peticiones en curso y
+    en cola: con gthread una petición en cola también retiene su hilo. Las
+    pesadas ocupan como mucho la mitad, así las demás siempre tienen hilo;
+    auth y normal son rápidas y pueden usarlos todos
+    """
+    if nombre == 'pesado':
+        return max(1, hilos // 2)
+    return hilos
+
+
+def limite_automatico(nombre, hilos):
+    """Límite por defecto: tres cuartos del presupuesto de hilos (al menos 1)"""
+    return max(1, presupuesto_hilos(nombre, hilos) * 3 // 4)
+
+
+def parse_clase(nombre, texto, hilos):
+    """
+    Convierte 'limite:cola:timeout' (p. ej. 'auto:auto:2') en una ClaseAdmision
+
+    Con limite 'auto' se usa limite_automatico(nombre, hilos) y con cola
+    'auto' el resto del presupuesto de hilos de la clase (0 si no sobra:
+    la petición se rechaza con 503 sin esperar).
+    """
+    try:
+        limite, max_cola, timeout = texto.split(':')
+        limite = limite_automatico(nombre, hilos) if limite.strip() == 'auto' else int(limite)
+        if max_cola.strip() == 'auto':
+            max_cola = max(0, presupuesto_hilos(nombre, hilos) - limite)
+        return ClaseAdmision(nombre, limite, int(max_cola), float(timeout))
+    except ValueError:
+        raise ValueError(f"Configuración de admisión inválida para '{nombre}': {texto} "
+                         "(formato limite:cola:timeout, limite y cola enteros o 'auto')")
+
+
+def validar_limites(clases, hilos):
+    """
+    Lanza ValueError si alguna clase puede retener más hilos (en curso + en
+    cola) que su presupuesto con `hilos` hilos por worker: sus peticiones en
+    espera dejarían sin hilos a las otras clases
+    """
+    errores = []
+    for nombre, clase in clases.items():
+        presupuesto = presupuesto_hilos(nombre, hilos)
+        if clase.limite + clase.max_cola > presupuesto:
+            errores.append(
+                f"ADMISSION_{nombre.upper()}: limite {clase.limite} + cola {clase.max_cola} "
+                f"> {presupuesto} hilos disponibles para '{nombre}' (SERVER_THREADS={hilos})"
+            )
+    if errores:
+        raise ValueError('Control de admisión: ' + '; '.join(errores))
+
+
+class ControlAdmision:
+    """Asigna cada petición a su clase y rechaza con 503 cuando la clase está saturada"""
+
+    def __init__(self, clases, retry_after=1):
+        self.clases = clases
+        self.retry_after = retry_after
+
+    def clase_de(self, endpoint):
+        if endpoint is None or endpoint in ENDPOINTS_LIBRES:
+            return None
+        return self.clases.get(CLASES_ENDPOINT.get(endpoint, 'normal'))
+
+    def antes(self):
+        clase = self.clase_de(request.endpoint)
+        if clase is None:
+            return None
+        if not clase.entrar():
+            response = jsonify({
+                'success': False,
+                'error': 'Servidor saturado, intente nuevamente en unos segundos'
+            })
+            response.status_code = 503
+            response.headers['Retry-After'] = str(self.retry_after)
+            return response
+        g._admision_clase = clase
+        return None
+
+    def fin(self, exc):
+        clase = g.pop('_admision_clase', None)
+        if clase is not None:
+            clase.salir()
+
+    def stats(self):
+        return {nombre: clase.stats() for nombre, clase in self.clases.items()}
+
+
+def init_admission(app):
+    """Instala el control de admisión por clase de endpoint y la ruta /health/admission"""
+    hilos = app.config['ADMISSION_HILOS']
+    clases = {
+        nombre: parse_clase(nombre, app.config[f'ADMISSION_{nombre.upper()}'], hilos)
+        for nombre in ('pesado', 'auth', 'normal')
+    }
+    validar_limites(clases, hilos)
+    control = ControlAdmision(clases, retry_after=app.config['ADMISSION_RETRY_AFTER'])
+    app.extensions['admission'] = control
+    app.before_request(control.antes)
+    app.teardown_request(control.fin)
+
+    @app.route('/health/admission')
+    @admin_required
+    def health_admission():
+        """Concurrencia, cola y rechazos por clase de endpoint (para ajustar los límites)"""
+        return {'success': True, 'admission': control.stats()}, 200
+
+    return control
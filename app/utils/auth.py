@@ -1,20 +1,171 @@
+import hashlib
 import jwt
 import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, current_app
+from app.utils.database import execute_query, transaction
 
 load_dotenv()
 
 JWT_SECRET = os.getenv('JWT_SECRET_KEY', 'tu_clave_secreta')
 
+class TokenCache:
+    """
+    Caché LRU acotada de tokens JWT ya verificados.
+
+    Guarda los claims decodificados de cada token junto con su 'exp', de modo
+    que las peticiones repetidas con el mismo token no vuelvan a verificar la
+    firma ni a consultar la lista de revocados. Una entrada vencida se
+    descarta al consultarla, y una con más de `ttl` segundos cuenta como
+    fallo: así un token revocado desde otro worker deja de valer en este a
+    lo sumo `ttl` segundos después.
+    """
+
+    def __init__(self, maxsize=1024, ttl=10):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token):
+        """
+        Devuelve los claims del token si está en caché.
+
+        Lanza jwt.ExpiredSignatureError si la entrada ya venció, igual que
+        jwt.decode, y devuelve None si el token no está en caché o hay que
+        volver a comprobar su revocación.
+        """
+        with self._lock:
+            entrada = self._data.get(token)
+            if entrada is None:
+                self.misses += 1
+                return None
+            claims, exp, revisar_en = entrada
+            if exp is not None and time.time() >= exp:
+                del self._data[token]
+                self.misses += 1
+                raise jwt.ExpiredSignatureError('Signature has expired')
+            if time.monotonic() >= revisar_en:
+                del self._data[token]
+                self.misses += 1
+                return None
+            self._data.move_to_end(token)
+            self.hits += 1
+            return claims
+
+    def put(self, token, claims):
+        """Guarda los claims de un token verificado y no revocado"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[token] = (claims, claims.get('exp'), time.monotonic() + self.ttl)
+            self._data.move_to_end(token)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def discard(self, token):
+        """Quita un token de la caché (p. ej. al revocarlo)"""
+        with self._lock:
+            self._data.pop(token, None)
+
+    def clear(self):
+        """Vacía la caché"""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        """Devuelve el tamaño y los contadores de aciertos/fallos"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else 0.0
+            }
+
+token_cache = TokenCache(int(os.getenv('JWT_CACHE_SIZE', 1024)), float(os.getenv('JWT_REVOCATION_TTL', 10)))
+
+# Fila de tokens_revocados que guarda el instante del último revoke_all
+_REVOCAR_TODOS = '*'
+
+def _clave_revocacion(token, claims):
+    """'jti' del token; los emitidos antes de tener 'jti' se identifican por su hash"""
+    return claims.get('jti') or hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+def token_revocado(token, claims):
+    """
+    Consulta en tokens_revocados si el token fue revocado con revoke_token
+    o emitido antes del último revoke_all_tokens
+
+    La tabla es compartida por todos los workers; se consulta solo cuando el
+    token no está en token_cache.
+    """
+    filas = execute_query(
+        "SELECT jti, antes_de_ms FROM tokens_revocados WHERE jti IN (%s, %s)",
+        (_clave_revocacion(token, claims), _REVOCAR_TODOS),
+        fetch=True
+    )
+    for fila in filas:
+        if fila['jti'] != _REVOCAR_TODOS:
+            return True
+        # 'iat' tiene resolución de segundos: se usa 'iat_ms' para no revocar
+        # los tokens emitidos en el mismo segundo, después de revoke_all_tokens
+        emitido_ms = claims.get('iat_ms')
+        if emitido_ms is None:
+            emitido_ms = claims.get('iat', 0) * 1000
+        if emitido_ms <= fila['antes_de_ms']:
+            return True
+    return False
+
+def revoke_token(token, claims):
+    """Revoca un token en todos los workers hasta su 'exp'"""
+    with transaction():
+        # Las revocaciones de tokens ya vencidos no hacen falta
+        execute_query(
+            "DELETE FROM tokens_revocados WHERE expira_en IS NOT NULL AND expira_en < %s",
+            (int(time.time()),)
+        )
+        execute_query(
+            "INSERT INTO tokens_revocados (jti, expira_en) VALUES (%s, %s) "
+            "ON DUPLICATE KEY UPDATE expira_en = VALUES(expira_en)",
+            (_clave_revocacion(token, claims), claims.get('exp'))
+        )
+    token_cache.discard(token)
+
+def revoke_all_tokens():
+    """Revoca todos los tokens emitidos hasta ahora, en todos los workers"""
+    with transaction():
+        execute_query(
+            "INSERT INTO tokens_revocados (jti, antes_de_ms) VALUES (%s, %s) "
+            "ON DUPLICATE KEY UPDATE antes_de_ms = VALUES(antes_de_ms)",
+            (_REVOCAR_TODOS, int(time.time() * 1000))
+        )
+        # Las revocaciones individuales quedan cubiertas por la general
+        execute_query("DELETE FROM tokens_revocados WHERE jti <> %s", (_REVOCAR_TODOS,))
+    token_cache.clear()
+
 def generate_token(user_id, username):
     """Genera un token JWT para el usuario"""
+    ahora_ts = time.time()
+    ahora = datetime.utcfromtimestamp(ahora_ts)
     payload = {
         'user_id': user_id,
         'username': username,
-        'exp': datetime.utcnow() + timedelta(hours=24)
+        'iat': ahora,
+        'iat_ms': int(ahora_ts * 1000),
+        'jti': secrets.token_hex(16),
+        'exp': ahora + timedelta(hours=24)
     }
     token = jwt.encode(payload, JWT_SECRET, algorithm='HS256')
     return token
@@ -33,8 +184,15 @@ def token_required(f):
             if token.startswith('Bearer '):
                 token = token[7:]
             
-            data = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+            data = token_cache.get(token)
+            if data is None:
+                data = jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+                if token_revocado(token, data):
+                    return jsonify({'error': 'Token revocado'}), 401
+                token_cache.put(token, data)
+            
             request.user_data = data
+            request.token = token
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token expirado'}), 401
         except jwt.InvalidTokenError:
@@ -43,3 +201,14 @@ def token_required(f):
         return f(*args, **kwargs)
     
     return decorated
+
+def admin_required(f):
+    """Decorador para rutas de diagnóstico: exige token de un usuario en ADMIN_USERS"""
+    @wraps(f)
+    @token_required
+    def decorated(*args, **kwargs):
+        if request.user_data.get('username') not in current_app.config['ADMIN_USERS']:
+            return jsonify({'error': 'Se requieren permisos de administrador'}), 403
+        return f(*args, **kwargs)
+    
+    return decorated
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Caché de resultados con TTL, single-flight y stale-while-revalidate.
+
+    - Dentro del TTL se devuelve el valor guardado (HIT).
+    - Si no hay valor, solo una petición lo calcula; las demás esperan el
+      mismo Future en lugar de repetir la consulta (MISS).
+    - Si el valor venció pero sigue dentro de la ventana stale_ttl, se
+      devuelve el valor anterior y se recalcula en segundo plano (STALE).
+      Si ese recálculo falla, el error se registra en el log y se cuenta en
+      stats() (errores_refresco); el valor anterior se sigue sirviendo hasta
+      que vence stale_ttl.
+    """
+
+    HIT = 'HIT'
+    MISS = 'MISS'
+    STALE = 'STALE'
+
+    def __init__(self):
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.errores_refresco = 0
+        self.ultimo_error = None
+
+    def get_or_compute(self, key, fn, ttl, stale_ttl=0):
+        """
+        Devuelve el valor de key, calculándolo con fn() si hace falta
+
+        Args:
+            key: Clave del valor en caché
+            fn: Función sin argumentos que calcula el valor
+            ttl: Segundos durante los que el valor se considera fresco
+            stale_ttl: Segundos adicionales durante los que se sirve el valor
+                vencido mientras se recalcula
+
+        Returns:
+            Tupla (valor, edad en segundos, estado HIT/MISS/STALE)
+        """
+        with self._lock:
+            entrada = self._entries.get(key)
+            if entrada is not None:
+                valor, guardado = entrada
+                edad = time.monotonic() - guardado
+                if edad < ttl:
+                    self.hits += 1
+                    return valor, edad, self.HIT
+                if edad < ttl + stale_ttl:
+                    self.stale += 1
+                    if key not in self._inflight:
+                        future = Future()
+                        self._inflight[key] = future
+                        threading.Thread(
+                            target=self._refrescar, args=(key, fn, future), daemon=True
+                        ).start()
+                    return valor, edad, self.STALE
+
+            self.misses += 1
+            future = self._inflight.get(key)
+            propietario = future is None
+            if propietario:
+                future = Future()
+                self._inflight[key] = future
+
+        if propietario:
+            self._compute(key, fn, future)
+
+        valor, guardado = future.result()
+        return valor, time.monotonic() - guardado, self.MISS
+
+    def _compute(self, key, fn, future):
+        try:
+            valor = fn()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+
+        guardado = time.monotonic()
+        with self._lock:
+            self._entries[key] = (valor, guardado)
+            self._inflight.pop(key, None)
+        future.set_result((valor, guardado))
+
+    def _refrescar(self, key, fn, future):
+        """Recalcula en segundo plano; nadie espera el Future, así que el error se registra aquí"""
+        self._compute(key, fn, future)
+        error = future.exception()
+        if error is not None:
+            with self._lock:
+                self.errores_refresco += 1
+                self.ultimo_error = f'{key}: {error!r}'
+            logger.error('Error al recalcular en segundo plano la clave %r de la caché', key,
+                         exc_info=(type(error), error, error.__traceback__))
+
+    def invalidate(self, key=None):
+        """Descarta una clave (o todas si key es None)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Devuelve los contadores de aciertos, fallos, respuestas vencidas y errores de refresco"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'errores_refresco': self.errores_refresco,
+                'ultimo_error': self.ultimo_error
+            }
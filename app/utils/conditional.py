@@ -0,0 +1,76 @@
+import hashlib
+from datetime import datetime, timezone
+
+from flask import make_response, request
+
+
+def calcular_etag(recurso, *version):
+    """
+    ETag fuerte a partir del marcador de versión de un recurso.
+
+    Args:
+        recurso: Nombre del recurso (p. ej. 'alumno:5')
+        version: Valores que cambian cuando cambia el recurso (updated_at, conteos)
+    """
+    texto = '|'.join([recurso] + [str(v) for v in version])
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:20]
+
+
+def _como_utc(fecha):
+    """
+    Fecha en UTC truncada a segundos, la resolución de Last-Modified e
+    If-Modified-Since (updated_at tiene microsegundos)
+    """
+    # MySQL devuelve TIMESTAMP sin zona horaria; se toma como UTC igual que el proveedor JSON
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    else:
+        fecha = fecha.astimezone(timezone.utc)
+    return fecha.replace(microsecond=0)
+
+
+def no_modificado(etag, last_modified=None):
+    """
+    True si la petición condicional ya tiene la versión actual
+
+    If-None-Match tiene prioridad sobre If-Modified-Since (RFC 9110).
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return request.if_modified_since >= _como_utc(last_modified)
+    return False
+
+
+def respuesta_condicional(etag, last_modified, construir):
+    """
+    Responde 304 si el cliente ya tiene la versión, o construye la respuesta completa
+
+    Args:
+        etag: ETag calculado con calcular_etag (solo con la consulta de versión)
+        last_modified: datetime del último cambio, o None
+        construir: Función sin argumentos que arma la respuesta normal; solo
+            se llama si el recurso cambió
+
+    Returns:
+        Respuesta de Flask con ETag, Last-Modified y Cache-Control
+    """
+    if no_modificado(etag, last_modified):
+        response = make_response('', 304)
+    else:
+        response = make_response(construir())
+        if response.status_code != 200:
+            return response
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _como_utc(last_modified)
+    # Respuestas con token: solo en la caché del cliente y siempre revalidando
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def version_mas_reciente(*fechas):
+    """Devuelve la fecha más reciente ignorando los None"""
+    fechas = [f for f in fechas if isinstance(f, datetime)]
+    return max(fechas) if fechas else None
@@ -1,12 +1,33 @@
 import pymysql
 import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dotenv import load_dotenv
+from app.utils.pool import ConnectionPool
+from app.utils.replicas import GrupoReplicas, Replica, es_error_de_conexion, parsear_hosts
+from app.utils.metrics import metrics
+from app.utils.slow_query import slow_query_log
 
 load_dotenv()
 
-def get_db_connection():
-    """Crea y devuelve una conexión a la base de datos MySQL"""
-    connection = pymysql.connect(
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+_replicas = None
+_replicas_pid = None
+
+# Transacción abierta con transaction() en el contexto actual (hilo o petición)
+_transaccion_actual = ContextVar('transaccion_actual', default=None)
+
+# True después de escribir en el primario: las lecturas siguientes del mismo
+# contexto (petición) no van a las réplicas, para leer lo que se escribió
+_escribio_en_primario = ContextVar('escribio_en_primario', default=False)
+
+def _crear_conexion():
+    """Crea una conexión nueva (sin pool) a la base de datos MySQL"""
+    return pymysql.connect(
         host=os.getenv('DB_HOST', 'localhost'),
         user=os.getenv('DB_USER', 'root'),
         password=os.getenv('DB_PASSWORD', 'root'),
@@ -15,37 +36,358 @@ def get_db_connection():
         cursorclass=pymysql.cursors.DictCursor,
         autocommit=False
     )
-    return connection
+
+def _crear_conexion_replica(host, port):
+    """Crea una conexión nueva a una réplica (mismas credenciales que el primario)"""
+    return pymysql.connect(
+        host=host,
+        user=os.getenv('DB_REPLICA_USER', os.getenv('DB_USER', 'root')),
+        password=os.getenv('DB_REPLICA_PASSWORD', os.getenv('DB_PASSWORD', 'root')),
+        database=os.getenv('DB_NAME', 'sistema_alumnos'),
+        port=port,
+        connect_timeout=int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', 2)),
+        cursorclass=pymysql.cursors.DictCursor,
+        autocommit=False
+    )
+
+class CursorMedido:
+    """
+    Envoltorio de un cursor que mide cada execute/executemany.
+
+    El tiempo de cada consulta se suma a las métricas de la petición en
+    curso (tiempo en BD vs. tiempo en Python) y al histograma global. Las
+    consultas que superan el umbral de slow_query_log quedan registradas.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._cursor.close()
+
+    def _medir(self, metodo, query, args, muchos):
+        inicio = time.perf_counter()
+        error = None
+        try:
+            return metodo(query, args)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            segundos = time.perf_counter() - inicio
+            metrics.registrar_consulta(segundos)
+            if slow_query_log.umbral and segundos >= slow_query_log.umbral:
+                slow_query_log.registrar(self._cursor, query, args, segundos, muchos, error)
+
+    def execute(self, query, args=None):
+        return self._medir(self._cursor.execute, query, args, False)
+
+    def executemany(self, query, args):
+        return self._medir(self._cursor.executemany, query, args, True)
+
+def get_pool():
+    """
+    Devuelve el pool de conexiones del proceso, creándolo la primera vez.
+
+    Se configura con variables de entorno:
+        DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_IDLE_TIMEOUT,
+        DB_POOL_MAX_LIFETIME, DB_POOL_PRE_PING, DB_POOL_TIMEOUT,
+        DB_POOL_PRUNE_INTERVAL
+
+    Si el proceso hizo fork (workers de un servidor pre-fork) se crea un
+    pool nuevo para no compartir sockets entre procesos.
+    """
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = _nuevo_pool(_crear_conexion)
+            _pool_pid = pid
+    return _pool
+
+def _nuevo_pool(creator, max_size=None):
+    pool = ConnectionPool(
+        creator,
+        min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+        max_size=max_size or int(os.getenv('DB_POOL_MAX_SIZE', 20)),
+        idle_timeout=float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300)),
+        max_lifetime=float(os.getenv('DB_POOL_MAX_LIFETIME', 1800)),
+        pre_ping=os.getenv('DB_POOL_PRE_PING', 'True') == 'True',
+        timeout=float(os.getenv('DB_POOL_TIMEOUT', 30))
+    )
+    pool.cursor_wrapper = CursorMedido
+    try:
+        pool.warm_up()
+    except Exception:
+        # Sin base disponible el pool arranca vacío: acquire() reporta el
+        # error y el mantenimiento vuelve a completar min_size
+        pass
+    pool.mantener(float(os.getenv('DB_POOL_PRUNE_INTERVAL', 60)))
+    return pool
+
+def get_replicas():
+    """
+    Devuelve el grupo de réplicas de lectura del proceso, o None si no hay.
+
+    Se configura con variables de entorno:
+        DB_REPLICA_HOSTS (host1,host2:3307), DB_REPLICA_POOL_MAX_SIZE,
+        DB_REPLICA_MAX_LAG, DB_REPLICA_CHECK_INTERVAL,
+        DB_REPLICA_MAX_FAILURES, DB_REPLICA_EJECT_SECONDS
+
+    Cada réplica tiene su propio pool (mismos parámetros DB_POOL_* que el
+    primario). Igual que get_pool(), se recrea después de un fork.
+    """
+    global _replicas, _replicas_pid
+
+    pid = os.getpid()
+    if _replicas_pid == pid:
+        return _replicas
+
+    with _pool_lock:
+        if _replicas_pid != pid:
+            hosts = parsear_hosts(os.getenv('DB_REPLICA_HOSTS', ''), int(os.getenv('DB_PORT', 3306)))
+            max_size = int(os.getenv('DB_REPLICA_POOL_MAX_SIZE', 0)) or None
+            _replicas = GrupoReplicas(
+                [
+                    Replica(host, port, _nuevo_pool(
+                        lambda host=host, port=port: _crear_conexion_replica(host, port), max_size))
+                    for host, port in hosts
+                ],
+                max_lag=float(os.getenv('DB_REPLICA_MAX_LAG', 5)),
+                intervalo=float(os.getenv('DB_REPLICA_CHECK_INTERVAL', 5)),
+                max_fallos=int(os.getenv('DB_REPLICA_MAX_FAILURES', 3)),
+                expulsion=float(os.getenv('DB_REPLICA_EJECT_SECONDS', 30))
+            ) if hosts else None
+            _replicas_pid = pid
+    return _replicas
+
+def pool_existente():
+    """Pool de conexiones de este proceso si ya se creó, o None (no lo crea)"""
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    return None
+
+def replicas_existentes():
+    """Grupo de réplicas de este proceso si ya se creó, o None (no lo crea)"""
+    if _replicas is not None and _replicas_pid == os.getpid():
+        return _replicas
+    return None
+
+def pool_stats():
+    """Devuelve las estadísticas del pool de conexiones (en uso, ociosas, esperas)"""
+    return get_pool().stats()
+
+def replicas_stats():
+    """Estado de las réplicas de lectura, o None si no hay réplicas configuradas"""
+    replicas = get_replicas()
+    return replicas.stats() if replicas is not None else None
+
+def marcar_escritura():
+    """Envía al primario las lecturas que quedan en el contexto actual (petición)"""
+    if not _escribio_en_primario.get():
+        _escribio_en_primario.set(True)
+
+def reiniciar_lecturas():
+    """
+    Vuelve a permitir lecturas en réplicas; se llama al comenzar cada
+    petición porque los hilos del servidor se reutilizan entre peticiones
+    """
+    _escribio_en_primario.set(False)
+
+def _replica_para_lectura():
+    """Réplica para una lectura del contexto actual, o None si debe ir al primario"""
+    if _transaccion_actual.get() is not None or _escribio_en_primario.get():
+        return None
+    replicas = get_replicas()
+    if replicas is None:
+        return None
+    return replicas.elegir()
+
+def get_db_connection(solo_lectura=False):
+    """
+    Obtiene una conexión a la base de datos MySQL desde el pool.
+
+    Al llamar a close() la conexión vuelve al pool en lugar de cerrarse.
+
+    Args:
+        solo_lectura: Si True y hay una réplica sana, la conexión es de la
+            réplica (salvo que ya se haya escrito en el contexto actual). Si
+            False, la conexión es del primario y las lecturas siguientes del
+            contexto también irán al primario.
+    """
+    if solo_lectura:
+        replica = _replica_para_lectura()
+        if replica is not None:
+            try:
+                return replica.pool.acquire()
+            except Exception as e:
+                if not es_error_de_conexion(e):
+                    raise
+                get_replicas().registrar_fallo(replica, e)
+    else:
+        marcar_escritura()
+    return get_pool().acquire()
+
+def _resultado(cursor, fetch, fetch_one):
+    if fetch_one:
+        return cursor.fetchone()
+    if fetch:
+        return cursor.fetchall()
+    return cursor.lastrowid
+
+def es_lectura(query):
+    """True si la consulta solo lee (SELECT/WITH/SHOW sin bloqueos de filas)"""
+    partes = query.lstrip().split(None, 1)
+    if not partes or partes[0].upper() not in ('SELECT', 'WITH', 'SHOW', '('):
+        return False
+    texto = query.upper()
+    return 'FOR UPDATE' not in texto and 'LOCK IN SHARE MODE' not in texto and 'FOR SHARE' not in texto
+
+def _ejecutar(connection, query, params, fetch, fetch_one):
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(query, params or ())
+            result = _resultado(cursor, fetch, fetch_one)
+            connection.commit()
+            return result
+    except Exception as e:
+        connection.rollback()
+        raise e
+    finally:
+        connection.close()
 
 def execute_query(query, params=None, fetch=False, fetch_one=False):
     """
     Ejecuta una consulta SQL
-    
+
+    Si hay una transacción abierta con transaction() en el contexto actual,
+    la consulta se ejecuta en ella (sin commit propio); si no, usa una
+    conexión del pool y hace commit.
+
+    Con réplicas configuradas (DB_REPLICA_HOSTS), las lecturas (fetch o
+    fetch_one de un SELECT) van a una réplica sana, salvo que en el mismo
+    contexto ya se haya escrito en el primario. Si la réplica falla por un
+    error de conexión, la lectura se repite en el primario.
+
     Args:
         query: Consulta SQL a ejecutar
         params: Parámetros para la consulta
         fetch: Si True, devuelve todos los resultados
         fetch_one: Si True, devuelve solo un resultado
-    
+
     Returns:
         Resultados de la consulta o None
     """
+    tx = _transaccion_actual.get()
+    if tx is not None:
+        return tx.execute(query, params, fetch=fetch, fetch_one=fetch_one)
+
+    if (fetch or fetch_one) and es_lectura(query):
+        replica = _replica_para_lectura()
+        if replica is not None:
+            try:
+                return _ejecutar(replica.pool.acquire(), query, params, fetch, fetch_one)
+            except Exception as e:
+                if not es_error_de_conexion(e):
+                    raise
+                get_replicas().registrar_fallo(replica, e)
+        return _ejecutar(get_pool().acquire(), query, params, fetch, fetch_one)
+
+    return _ejecutar(get_db_connection(), query, params, fetch, fetch_one)
+
+class Transaccion:
+    """
+    Unidad de trabajo: una conexión y un cursor para varias sentencias que
+    se confirman juntas con un solo commit.
+
+    Se obtiene con transaction(); no se crea directamente.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.cursor = connection.cursor()
+
+    def execute(self, query, params=None, fetch=False, fetch_one=False):
+        """Igual que execute_query, pero dentro de la transacción"""
+        self.cursor.execute(query, params or ())
+        return _resultado(self.cursor, fetch, fetch_one)
+
+    def executemany(self, query, seq_params):
+        """
+        Ejecuta la sentencia para cada juego de parámetros
+
+        PyMySQL convierte los INSERT ... VALUES en un solo INSERT de varias
+        filas, así que un bloque es un viaje a la base de datos.
+
+        Returns:
+            Filas afectadas
+        """
+        if not seq_params:
+            return 0
+        return self.cursor.executemany(query, seq_params)
+
+    @contextmanager
+    def savepoint(self, nombre):
+        """
+        Deshace solo lo hecho dentro del bloque si este lanza una excepción;
+        la transacción sigue abierta y la excepción se propaga
+        """
+        self.cursor.execute(f"SAVEPOINT {nombre}")
+        try:
+            yield self
+        except Exception:
+            self.cursor.execute(f"ROLLBACK TO SAVEPOINT {nombre}")
+            raise
+        self.cursor.execute(f"RELEASE SAVEPOINT {nombre}")
+
+@contextmanager
+def transaction():
+    """
+    Abre una transacción que agrupa varias sentencias en una conexión
+
+        with transaction() as tx:
+            matricula_id = tx.execute("INSERT INTO matriculas ...", (...))
+            tx.executemany("INSERT INTO notas ...", filas)
+
+    Hace commit al salir del bloque y rollback si se lanza una excepción.
+    Mientras está abierta, execute_query y los métodos de los modelos que lo
+    usan se ejecutan dentro de ella. Un transaction() anidado se une a la
+    transacción externa: el commit lo hace solo el bloque más externo.
+    """
+    actual = _transaccion_actual.get()
+    if actual is not None:
+        yield actual
+        return
+
+    # get_db_connection() sin solo_lectura marca la escritura: las lecturas
+    # posteriores del contexto van al primario
     connection = get_db_connection()
+    tx = Transaccion(connection)
+    token = _transaccion_actual.set(tx)
     try:
-        with connection.cursor() as cursor:
-            cursor.execute(query, params or ())
-            
-            if fetch_one:
-                result = cursor.fetchone()
-            elif fetch:
-                result = cursor.fetchall()
-            else:
-                result = cursor.lastrowid
-            
-            connection.commit()
-            return result
-    except Exception as e:
+        yield tx
+        connection.commit()
+    except BaseException:
         connection.rollback()
-        raise e
+        raise
     finally:
+        _transaccion_actual.reset(token)
+        tx.cursor.close()
         connection.close()
+
+def transaccion_activa():
+    """Devuelve la transacción abierta en el contexto actual, o None"""
+    return _transaccion_actual.get()
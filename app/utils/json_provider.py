@@ -0,0 +1,135 @@
+import decimal
+import json
+from datetime import date, datetime, timezone
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa la librería estándar
+    orjson = None
+
+
+_DIAS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+_MESES = ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun',
+          'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec')
+
+
+def http_date_rapido(o):
+    """
+    Igual que werkzeug.http.http_date para date/datetime, sin pasar por email.utils
+
+    Las fechas sin zona horaria se toman como UTC, igual que en Werkzeug.
+    """
+    if isinstance(o, datetime):
+        if o.tzinfo is not None:
+            o = o.astimezone(timezone.utc)
+        return (f'{_DIAS[o.weekday()]}, {o.day:02d} {_MESES[o.month - 1]} {o.year:04d} '
+                f'{o.hour:02d}:{o.minute:02d}:{o.second:02d} GMT')
+    return f'{_DIAS[o.weekday()]}, {o.day:02d} {_MESES[o.month - 1]} {o.year:04d} 00:00:00 GMT'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Proveedor JSON de la librería estándar que serializa Decimal y fechas.
+
+    Los valores de las filas de DictCursor (Decimal, date, datetime) se
+    convierten directamente al serializar, sin conversiones en las rutas.
+
+    Configuración (app.config):
+        JSON_DECIMAL: 'str' (por defecto, igual que Flask) o 'float'
+        JSON_DATE_FORMAT: 'http' (por defecto, RFC 822 igual que Flask) o 'iso'
+    """
+
+    decimal_mode = 'str'
+    date_format = 'http'
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.decimal_mode = app.config.get('JSON_DECIMAL', self.decimal_mode)
+        self.date_format = app.config.get('JSON_DATE_FORMAT', self.date_format)
+        if self.decimal_mode not in ('str', 'float'):
+            raise ValueError("JSON_DECIMAL debe ser 'str' o 'float'")
+        if self.date_format not in ('http', 'iso'):
+            raise ValueError("JSON_DATE_FORMAT debe ser 'http' o 'iso'")
+        # Se arma una vez para no evaluar la configuración en cada valor
+        self.default = self._crear_default()
+
+    def _crear_default(self):
+        convertir_decimal = float if self.decimal_mode == 'float' else str
+        convertir_fecha = http_date_rapido if self.date_format == 'http' else date.isoformat
+        default_flask = DefaultJSONProvider.default
+
+        def default(o):
+            if isinstance(o, decimal.Decimal):
+                return convertir_decimal(o)
+            if isinstance(o, date):
+                return convertir_fecha(o)
+            return default_flask(o)
+
+        return default
+
+    def dumps(self, obj, **kwargs):
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+
+class OrjsonProvider(FastJSONProvider):
+    """
+    Proveedor JSON basado en orjson (serialización en C).
+
+    Mismas opciones que FastJSONProvider. orjson siempre emite UTF-8, por lo
+    que ensure_ascii no se aplica: los caracteres como 'é' no se escapan.
+    """
+
+    def __init__(self, app):
+        if orjson is None:
+            raise RuntimeError('orjson no está instalado')
+        super().__init__(app)
+        self._options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            self._options |= orjson.OPT_SORT_KEYS
+        if self.date_format == 'http':
+            # Las fechas pasan por default para mantener el formato de Flask
+            self._options |= orjson.OPT_PASSTHROUGH_DATETIME
+
+    def _dumps_bytes(self, obj, indent=False):
+        options = self._options
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) - {'indent', 'separators'}:
+            # Argumentos propios de json.dumps: usar la librería estándar
+            return super().dumps(obj, **kwargs)
+        return self._dumps_bytes(obj, indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dumps_bytes(obj, indent=indent) + b'\n', mimetype=self.mimetype
+        )
+
+
+def crear_json_provider(app):
+    """
+    Crea el proveedor JSON indicado por JSON_PROVIDER
+
+    'orjson' usa orjson, 'stdlib' la librería estándar y 'auto' (por defecto)
+    usa orjson si está instalado.
+    """
+    tipo = app.config.get('JSON_PROVIDER', 'auto')
+    if tipo == 'orjson' or (tipo == 'auto' and orjson is not None):
+        return OrjsonProvider(app)
+    if tipo in ('stdlib', 'auto'):
+        return FastJSONProvider(app)
+    raise ValueError("JSON_PROVIDER debe ser 'auto', 'orjson' o 'stdlib'")
@@ -0,0 +1,490 @@
+import json
+import os
+import threading
+import time
+import weakref
+from contextvars import ContextVar
+
+from flask import Response, g, request
+
+# Límites (en segundos) de los buckets de los histogramas de latencia
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Acumulador [tiempo_bd, consultas] de la petición en curso (None fuera de una petición)
+_consultas_peticion = ContextVar('consultas_peticion', default=None)
+
+
+def _bucket_index(segundos):
+    for i, limite in enumerate(BUCKETS):
+        if segundos <= limite:
+            return i
+    return len(BUCKETS)
+
+
+class _Shard:
+    """Contadores de un solo hilo; solo ese hilo los modifica, así que no llevan lock"""
+
+    __slots__ = ('peticiones', 'estados', 'en_curso', 'consultas')
+
+    def __init__(self):
+        # (blueprint, endpoint, método) -> [buckets..., +Inf, suma, cantidad, bd, consultas]
+        self.peticiones = {}
+        # (blueprint, endpoint, método, estado) -> cantidad
+        self.estados = {}
+        # (blueprint, endpoint) -> peticiones en curso
+        self.en_curso = {}
+        # [buckets..., +Inf, suma, cantidad] de todas las consultas SQL
+        self.consultas = [0] * (len(BUCKETS) + 3)
+
+
+class _FinDeHilo:
+    """Marca guardada en el threading.local del hilo; se libera cuando el hilo termina"""
+
+
+class Metrics:
+    """
+    Métricas en proceso por endpoint, expuestas en formato de texto Prometheus.
+
+    Cada hilo escribe en su propio shard (threading.local), de modo que
+    registrar una petición o una consulta no toma ningún lock. Los shards se
+    suman solo al leer /metrics. Cuando un hilo termina (el servidor de
+    Werkzeug usa un hilo por petición) su shard se suma a uno compartido y
+    se descarta, así la cantidad de shards no crece con las peticiones.
+
+    Con varios workers (gunicorn) cada proceso vuelca sus totales en un
+    archivo de `directorio` (ver usar_directorio) y /metrics suma los de
+    todos los workers, vivos o terminados.
+    """
+
+    # Segundos entre volcados del proceso al directorio compartido
+    INTERVALO_VOLCADO = 1.0
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = set()
+        self._retirados = _Shard()
+        self._lock = threading.Lock()
+        self.directorio = None
+        self.extras = None
+        self._ultimo_volcado = 0.0
+        self._volcando = threading.Lock()
+        self._pid_volcado = None
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard()
+            marca = _FinDeHilo()
+            self._local.shard = shard
+            self._local.marca = marca
+            weakref.finalize(marca, self._retirar, shard)
+            with self._lock:
+                self._shards.add(shard)
+        return shard
+
+    def _retirar(self, shard):
+        """Suma el shard de un hilo terminado al compartido y lo descarta"""
+        with self._lock:
+            self._shards.discard(shard)
+            _absorber(self._retirados, shard.peticiones, shard.estados, shard.en_curso, shard.consultas)
+
+    # ------------------------------------------------------------------
+    # Registro
+    # ------------------------------------------------------------------
+
+    def inicio_peticion(self, clave):
+        en_curso = self._shard().en_curso
+        en_curso[clave] = en_curso.get(clave, 0) + 1
+
+    def fin_peticion(self, blueprint, endpoint, metodo, estado, duracion, tiempo_bd, consultas):
+        shard = self._shard()
+        en_curso = shard.en_curso
+        en_curso[(blueprint, endpoint)] = en_curso.get((blueprint, endpoint), 0) - 1
+
+        clave = (blueprint, endpoint, metodo)
+        datos = shard.peticiones.get(clave)
+        if datos is None:
+            datos = shard.peticiones[clave] = [0] * (len(BUCKETS) + 5)
+        n = len(BUCKETS)
+        datos[_bucket_index(duracion)] += 1
+        datos[n + 1] += duracion
+        datos[n + 2] += 1
+        datos[n + 3] += tiempo_bd
+        datos[n + 4] += consultas
+
+        clave_estado = clave + (estado,)
+        shard.estados[clave_estado] = shard.estados.get(clave_estado, 0) + 1
+
+    def registrar_consulta(self, segundos):
+        """Registra el tiempo de una consulta SQL (llamado desde la capa de base de datos)"""
+        consultas = self._shard().consultas
+        n = len(BUCKETS)
+        consultas[_bucket_index(segundos)] += 1
+        consultas[n + 1] += segundos
+        consultas[n + 2] += 1
+
+        acumulado = _consultas_peticion.get()
+        if acumulado is not None:
+            acumulado[0] += segundos
+            acumulado[1] += 1
+
+    # ------------------------------------------------------------------
+    # Exposición
+    # ------------------------------------------------------------------
+
+    def _sumar(self):
+        """Totales del proceso: (peticiones, estados, en_curso, consultas)"""
+        total = _Shard()
+        with self._lock:
+            shards = list(self._shards)
+            retirados = self._retirados
+            _absorber(total, retirados.peticiones, retirados.estados,
+                      retirados.en_curso, retirados.consultas)
+        for shard in shards:
+            _absorber(total, dict(shard.peticiones), dict(shard.estados),
+                      dict(shard.en_curso), list(shard.consultas))
+        return total.peticiones, total.estados, total.en_curso, total.consultas
+
+    # ------------------------------------------------------------------
+    # Varios procesos (workers de gunicorn)
+    # ------------------------------------------------------------------
+
+    def usar_directorio(self, directorio):
+        """
+        Suma en /metrics las métricas de todos los procesos que comparten
+        `directorio`: cada uno vuelca allí sus totales (al atender
+        peticiones, como mucho cada INTERVALO_VOLCADO segundos, al terminar
+        y al servir /metrics). Los archivos de procesos terminados se
+        acumulan en retirados.json (sin sus gauges).
+        """
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+
+    def _extras_actuales(self):
+        return list(self.extras()) if self.extras is not None else []
+
+    def volcar(self):
+        """Escribe los totales de este proceso en el directorio compartido"""
+        if self.directorio is None or not self._volcando.acquire(blocking=False):
+            return
+        try:
+            pid = os.getpid()
+            if self._pid_volcado != pid:
+                # Un archivo con nuestro pid es de un proceso anterior que ya terminó
+                with self._lock_archivos():
+                    self._compactar(incluir_pid=pid)
+                self._pid_volcado = pid
+            _escribir_json(os.path.join(self.directorio, f'{pid}.json'),
+                           _serializar(self._sumar(), self._extras_actuales()))
+            self._ultimo_volcado = time.monotonic()
+        finally:
+            self._volcando.release()
+
+    def _volcar_si_toca(self):
+        if self.directorio is not None and time.monotonic() - self._ultimo_volcado >= self.INTERVALO_VOLCADO:
+            self.volcar()
+
+    def _lock_archivos(self):
+        return _LockArchivo(os.path.join(self.directorio, '.lock'))
+
+    def _compactar(self, incluir_pid=None):
+        """Pasa a retirados.json los archivos de procesos que ya no existen"""
+        ruta_retirados = os.path.join(self.directorio, 'retirados.json')
+        retirados = _leer_json(ruta_retirados)
+        terminados = []
+        for nombre in os.listdir(self.directorio):
+            base, extension = os.path.splitext(nombre)
+            if extension != '.json' or not base.isdigit():
+                continue
+            pid = int(base)
+            if pid == incluir_pid or (pid != os.getpid() and not _proceso_vivo(pid)):
+                terminados.append(os.path.join(self.directorio, nombre))
+        if not terminados:
+            return
+        total = _Shard()
+        extras = {}
+        for datos in [retirados] + [_leer_json(ruta) for ruta in terminados]:
+            if datos:
+                # Los gauges de un proceso terminado ya no valen
+                _absorber_serializado(total, extras, datos, con_gauges=False)
+        _escribir_json(ruta_retirados, _serializar(
+            (total.peticiones, total.estados, {}, total.consultas),
+            [extra for extra in extras.values() if extra[1] == 'counter']
+        ))
+        for ruta in terminados:
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+
+    def _sumar_procesos(self):
+        """Totales de todos los procesos del directorio (incluido este)"""
+        self.volcar()
+        total = _Shard()
+        extras = {}
+        with self._lock_archivos():
+            self._compactar()
+            for nombre in sorted(os.listdir(self.directorio)):
+                if nombre.endswith('.json'):
+                    datos = _leer_json(os.path.join(self.directorio, nombre))
+                    if datos:
+                        _absorber_serializado(total, extras, datos, con_gauges=True)
+        return (total.peticiones, total.estados, total.en_curso, total.consultas), list(extras.values())
+
+    @staticmethod
+    def _etiquetas(**etiquetas):
+        partes = []
+        for nombre, valor in etiquetas.items():
+            valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            partes.append(f'{nombre}="{valor}"')
+        return '{' + ','.join(partes) + '}'
+
+    @staticmethod
+    def _histograma(lineas, nombre, etiquetas, buckets, suma, cantidad):
+        prefijo = etiquetas[:-1] + ',' if etiquetas != '{}' else '{'
+        acumulado = 0
+        for limite, valor in zip(BUCKETS + ('+Inf',), buckets):
+            acumulado += valor
+            lineas.append(f'{nombre}_bucket{prefijo}le="{limite}"}} {acumulado}')
+        if etiquetas == '{}':
+            etiquetas = ''
+        lineas.append(f'{nombre}_sum{etiquetas} {suma:.6f}')
+        lineas.append(f'{nombre}_count{etiquetas} {cantidad}')
+
+    def render(self):
+        """Devuelve todas las métricas en formato de texto Prometheus"""
+        if self.directorio is not None:
+            (peticiones, estados, en_curso, consultas), extras = self._sumar_procesos()
+        else:
+            peticiones, estados, en_curso, consultas = self._sumar()
+            extras = self._extras_actuales()
+        n = len(BUCKETS)
+        lineas = []
+
+        lineas.append('# HELP http_request_duration_seconds Latencia de las peticiones HTTP')
+        lineas.append('# TYPE http_request_duration_seconds histogram')
+        for (blueprint, endpoint, metodo), datos in sorted(peticiones.items()):
+            etiquetas = self._etiquetas(blueprint=blueprint, endpoint=endpoint, method=metodo)
+            self._histograma(lineas, 'http_request_duration_seconds', etiquetas,
+                             datos[:n + 1], datos[n + 1], datos[n + 2])
+
+        lineas.append('# HELP http_requests_total Peticiones HTTP por código de estado')
+        lineas.append('# TYPE http_requests_total counter')
+        for (blueprint, endpoint, metodo, estado), valor in sorted(estados.items()):
+            etiquetas = self._etiquetas(blueprint=blueprint, endpoint=endpoint, method=metodo, status=estado)
+            lineas.append(f'http_requests_total{etiquetas} {valor}')
+
+        lineas.append('# HELP http_requests_in_flight Peticiones HTTP en curso')
+        lineas.append('# TYPE http_requests_in_flight gauge')
+        for (blueprint, endpoint), valor in sorted(en_curso.items()):
+            etiquetas = self._etiquetas(blueprint=blueprint, endpoint=endpoint)
+            lineas.append(f'http_requests_in_flight{etiquetas} {valor}')
+
+        series = (
+            ('http_request_db_seconds_total', 'Tiempo en la base de datos por endpoint', n + 3, '.6f'),
+            ('http_request_python_seconds_total', 'Tiempo fuera de la base de datos por endpoint', None, '.6f'),
+            ('http_request_db_queries_total', 'Consultas SQL ejecutadas por endpoint', n + 4, 'd')
+        )
+        for nombre, ayuda, indice, formato in series:
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} counter')
+            for (blueprint, endpoint, metodo), datos in sorted(peticiones.items()):
+                valor = datos[indice] if indice is not None else max(datos[n + 1] - datos[n + 3], 0)
+                etiquetas = self._etiquetas(blueprint=blueprint, endpoint=endpoint, method=metodo)
+                lineas.append(f'{nombre}{etiquetas} {valor:{formato}}')
+
+        lineas.append('# HELP db_query_duration_seconds Duración de las consultas SQL')
+        lineas.append('# TYPE db_query_duration_seconds histogram')
+        self._histograma(lineas, 'db_query_duration_seconds', '{}',
+                         consultas[:n + 1], consultas[n + 1], consultas[n + 2])
+
+        for nombre, tipo, ayuda, valor in extras:
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            lineas.append(f'{nombre} {valor}')
+
+        return '\n'.join(lineas) + '\n'
+
+
+def _absorber(total, peticiones, estados, en_curso, consultas):
+    """Suma contadores (con el formato de _Shard) a total"""
+    n = len(BUCKETS)
+    for clave, datos in peticiones.items():
+        acumulado = total.peticiones.setdefault(clave, [0] * (n + 5))
+        for i, valor in enumerate(datos):
+            acumulado[i] += valor
+    for clave, valor in estados.items():
+        total.estados[clave] = total.estados.get(clave, 0) + valor
+    for clave, valor in en_curso.items():
+        total.en_curso[clave] = total.en_curso.get(clave, 0) + valor
+    for i, valor in enumerate(consultas):
+        total.consultas[i] += valor
+
+
+def _serializar(totales, extras):
+    peticiones, estados, en_curso, consultas = totales
+    return {
+        'peticiones': [list(clave) + [datos] for clave, datos in peticiones.items()],
+        'estados': [list(clave) + [valor] for clave, valor in estados.items()],
+        'en_curso': [list(clave) + [valor] for clave, valor in en_curso.items()],
+        'consultas': list(consultas),
+        'extras': [list(extra) for extra in extras]
+    }
+
+
+def _absorber_serializado(total, extras, datos, con_gauges):
+    _absorber(
+        total,
+        {tuple(fila[:-1]): fila[-1] for fila in datos['peticiones']},
+        {tuple(fila[:-1]): fila[-1] for fila in datos['estados']},
+        {tuple(fila[:-1]): fila[-1] for fila in datos['en_curso']} if con_gauges else {},
+        datos['consultas']
+    )
+    for nombre, tipo, ayuda, valor in datos.get('extras', []):
+        if tipo == 'gauge' and not con_gauges:
+            continue
+        anterior = extras.get(nombre)
+        extras[nombre] = (nombre, tipo, ayuda, (anterior[3] if anterior else 0) + valor)
+
+
+def _escribir_json(ruta, datos):
+    temporal = f'{ruta}.{os.getpid()}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    os.replace(temporal, ruta)
+
+
+def _leer_json(ruta):
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _proceso_vivo(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class _LockArchivo:
+    """Lock exclusivo entre procesos (flock) para leer y compactar el directorio"""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = None
+
+    def __enter__(self):
+        import fcntl
+        self._archivo = open(self.ruta, 'a')
+        fcntl.flock(self._archivo, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        import fcntl
+        fcntl.flock(self._archivo, fcntl.LOCK_UN)
+        self._archivo.close()
+
+
+metrics = Metrics()
+
+
+def _etiquetas_peticion():
+    return request.blueprint or '', request.endpoint or 'sin_endpoint'
+
+
+def _antes_de_peticion():
+    g._metrics_inicio = time.perf_counter()
+    g._metrics_consultas = [0.0, 0]
+    g._metrics_token = _consultas_peticion.set(g._metrics_consultas)
+    metrics.inicio_peticion(_etiquetas_peticion())
+
+
+def _despues_de_peticion(response):
+    g._metrics_estado = response.status_code
+    return response
+
+
+def _fin_de_peticion(exc):
+    inicio = g.pop('_metrics_inicio', None)
+    if inicio is None:
+        return
+    duracion = time.perf_counter() - inicio
+    tiempo_bd, consultas = g.pop('_metrics_consultas')
+    _consultas_peticion.reset(g.pop('_metrics_token'))
+    blueprint, endpoint = _etiquetas_peticion()
+    metrics.fin_peticion(blueprint, endpoint, request.method,
+                         g.pop('_metrics_estado', 500), duracion, tiempo_bd, consultas)
+    metrics._volcar_si_toca()
+
+
+def _extras_bd(pool, replicas, cache):
+    """
+    Función de extras para /metrics con el pool, las réplicas y la caché de
+    estadísticas
+
+    pool y replicas son funciones sin argumentos que devuelven el objeto del
+    proceso o None si todavía no se creó: un scrape no abre conexiones.
+    """
+    def extras():
+        resultado = []
+        pool_proceso = pool() if pool is not None else None
+        if pool_proceso is not None:
+            stats = pool_proceso.stats()
+            resultado += [
+                ('db_pool_connections_in_use', 'gauge', 'Conexiones del pool en uso', stats['in_use']),
+                ('db_pool_connections_idle', 'gauge', 'Conexiones ociosas del pool', stats['idle']),
+                ('db_pool_waits_total', 'counter', 'Esperas por una conexión libre', stats['waits']),
+                ('db_pool_wait_seconds_total', 'counter', 'Tiempo total esperando conexión', stats['wait_time_total']),
+                ('db_pool_timeouts_total', 'counter', 'Esperas que vencieron', stats['timeouts'])
+            ]
+        grupo = replicas() if replicas is not None else None
+        if grupo is not None:
+            estados = grupo.stats()['replicas']
+            resultado += [
+                ('db_replicas_sanas', 'gauge', 'Réplicas que reciben lecturas',
+                 sum(1 for r in estados if r['estado'] == 'sana')),
+                ('db_replicas_lecturas_total', 'counter', 'Lecturas enviadas a réplicas',
+                 sum(r['lecturas'] for r in estados)),
+                ('db_replicas_expulsiones_total', 'counter', 'Expulsiones de réplicas por fallos',
+                 sum(r['expulsiones'] for r in estados))
+            ]
+        if cache is not None:
+            stats = cache.stats()
+            resultado += [
+                ('cache_estadisticas_stale_total', 'counter', 'Respuestas vencidas servidas mientras se recalculaba',
+                 stats['stale']),
+                ('cache_estadisticas_errores_refresco_total', 'counter', 'Recálculos en segundo plano que fallaron',
+                 stats['errores_refresco'])
+            ]
+        return resultado
+
+    return extras
+
+
+def init_metrics(app, pool=None, replicas=None, cache=None):
+    """
+    Instala los hooks de medición y la ruta /metrics
+
+    Args:
+        pool: Función que devuelve el pool de conexiones del proceso o None
+        replicas: Función que devuelve el grupo de réplicas del proceso o None
+        cache: Caché de estadísticas (TTLCache) cuyos contadores se exportan
+    """
+    metrics.extras = _extras_bd(pool, replicas, cache)
+    if app.config['METRICS_MULTIPROC_DIR']:
+        metrics.usar_directorio(app.config['METRICS_MULTIPROC_DIR'])
+    app.before_request(_antes_de_peticion)
+    app.after_request(_despues_de_peticion)
+    app.teardown_request(_fin_de_peticion)
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Métricas en formato de texto Prometheus"""
+        return Response(metrics.render(),
+                        mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,52 @@
+class IdsInvalidosError(ValueError):
+    """Se lanza cuando el parámetro ids no es una lista válida de enteros"""
+    pass
+
+
+def parse_ids(texto, maximo):
+    """
+    Convierte '1,2,3' en una lista de ids sin repetidos (en el orden recibido).
+
+    Args:
+        texto: Valor del parámetro ids
+        maximo: Cantidad máxima de ids distintos permitidos
+
+    Returns:
+        Lista de enteros
+    """
+    ids = []
+    vistos = set()
+    for parte in texto.split(','):
+        parte = parte.strip()
+        if not parte:
+            continue
+        try:
+            valor = int(parte)
+        except ValueError:
+            raise IdsInvalidosError(f'ID inválido: {parte}')
+        if valor not in vistos:
+            vistos.add(valor)
+            ids.append(valor)
+
+    if not ids:
+        raise IdsInvalidosError('ids debe contener al menos un ID')
+    if len(ids) > maximo:
+        raise IdsInvalidosError(f'Máximo {maximo} IDs por petición')
+    return ids
+
+
+def indexar_por_id(ids, filas):
+    """
+    Arma {id: fila} con los ids como texto; los ids sin fila quedan en None.
+
+    La respuesta es un objeto indexado por id, no una lista: el proveedor
+    JSON ordena las claves (sort_keys, como texto), así que el cliente debe
+    buscar cada id por su clave y no depender del orden.
+
+    Returns:
+        Tupla (resultado, faltantes)
+    """
+    por_id = {fila['id']: fila for fila in filas}
+    resultado = {str(i): por_id.get(i) for i in ids}
+    faltantes = [i for i in ids if i not in por_id]
+    return resultado, faltantes
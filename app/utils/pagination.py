@@ -0,0 +1,43 @@
+import base64
+import json
+
+
+class CursorInvalidoError(ValueError):
+    """Se lanza cuando el cursor de paginación no se puede decodificar"""
+    pass
+
+
+def encode_cursor(valores):
+    """
+    Codifica la clave de la última fila de una página en un cursor opaco.
+
+    Args:
+        valores: Lista o tupla con los valores de la clave de ordenamiento
+
+    Returns:
+        Cadena base64 url-safe sin relleno
+    """
+    raw = json.dumps(list(valores), ensure_ascii=False, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, longitud):
+    """
+    Decodifica un cursor generado por encode_cursor.
+
+    Args:
+        cursor: Cadena recibida del cliente
+        longitud: Cantidad de valores esperados en la clave
+
+    Returns:
+        Tupla con los valores de la clave
+    """
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode('utf-8'))
+    except (ValueError, TypeError) as e:
+        raise CursorInvalidoError('Cursor de paginación inválido') from e
+
+    if not isinstance(valores, list) or len(valores) != longitud:
+        raise CursorInvalidoError('Cursor de paginación inválido')
+    return tuple(valores)
@@ -0,0 +1,325 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeoutError(Exception):
+    """Se lanza cuando no se obtiene una conexión del pool dentro del tiempo límite"""
+    pass
+
+
+class PooledConnection:
+    """
+    Envoltorio sobre una conexión PyMySQL que la devuelve al pool al cerrarla.
+
+    Delega todos los atributos a la conexión real, por lo que el código que
+    hace connection.cursor() / commit() / rollback() / close() sigue igual.
+    """
+
+    def __init__(self, pool, raw, created_at):
+        self._pool = pool
+        self._raw = raw
+        self._created_at = created_at
+        self._last_used = time.monotonic()
+        self._checked_out = False
+        # Variables de sesión (@nombre) que hay que limpiar al devolverla
+        self._variables = set()
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    @property
+    def raw(self):
+        return self._raw
+
+    def cursor(self, *args, **kwargs):
+        cursor = self._raw.cursor(*args, **kwargs)
+        if self._pool.cursor_wrapper is not None:
+            cursor = self._pool.cursor_wrapper(cursor)
+        return cursor
+
+    def marcar_variable(self, nombre):
+        """Registra @nombre para que el pool la ponga en NULL al recibir la conexión"""
+        self._variables.add(nombre)
+
+    def olvidar_variable(self, nombre):
+        """Quita la marca de @nombre (quien la puso ya la limpió)"""
+        self._variables.discard(nombre)
+
+    def close(self):
+        """Devuelve la conexión al pool en lugar de cerrarla"""
+        if self._checked_out:
+            self._checked_out = False
+            self._pool._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones thread-safe.
+
+    Args:
+        creator: Función sin argumentos que crea una conexión nueva
+        min_size: Conexiones que se mantienen abiertas aunque estén ociosas
+        max_size: Máximo de conexiones abiertas (en uso + ociosas)
+        idle_timeout: Segundos que una conexión puede estar ociosa antes de cerrarse
+        max_lifetime: Segundos máximos de vida de una conexión (0 = sin límite)
+        pre_ping: Si True, valida la conexión con ping() al entregarla
+        timeout: Segundos máximos de espera cuando el pool está lleno
+
+    Si cursor_wrapper no es None, cada cursor creado con connection.cursor()
+    se pasa por esa función (se usa para medir el tiempo de las consultas).
+
+    warm_up() abre las min_size conexiones de entrada y mantener() lanza un
+    hilo que cada tanto cierra las ociosas vencidas (prune) y vuelve a
+    completar min_size.
+    """
+
+    cursor_wrapper = None
+
+    def __init__(self, creator, min_size=1, max_size=10, idle_timeout=300,
+                 max_lifetime=1800, pre_ping=True, timeout=30):
+        if max_size < 1:
+            raise ValueError('max_size debe ser al menos 1')
+        if min_size < 0 or min_size > max_size:
+            raise ValueError('min_size debe estar entre 0 y max_size')
+
+        self._creator = creator
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping = pre_ping
+        self.timeout = timeout
+
+        self._idle = deque()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._closed = False
+        self._cerrado = threading.Event()
+        self._mantenimiento = None
+
+        # Estadísticas
+        self._created = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida de las conexiones
+    # ------------------------------------------------------------------
+
+    def _new_connection(self):
+        raw = self._creator()
+        with self._lock:
+            self._created += 1
+        return PooledConnection(self, raw, time.monotonic())
+
+    def _close_raw(self, conn):
+        try:
+            conn.raw.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn, now):
+        if self.max_lifetime and now - conn._created_at > self.max_lifetime:
+            return True
+        if self.idle_timeout and now - conn._last_used > self.idle_timeout:
+            return True
+        return False
+
+    def _is_alive(self, conn):
+        if not getattr(conn.raw, 'open', True):
+            return False
+        if not self.pre_ping:
+            return True
+        try:
+            conn.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        """Cierra una conexión y libera su lugar en el pool (sin el lock tomado)"""
+        self._close_raw(conn)
+        with self._available:
+            self._size -= 1
+            self._discarded += 1
+            self._available.notify()
+
+    def warm_up(self):
+        """Abre conexiones hasta alcanzar min_size"""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                conn = self._new_connection()
+            except Exception:
+                with self._available:
+                    self._size -= 1
+                    self._available.notify()
+                raise
+            with self._available:
+                self._idle.append(conn)
+                self._available.notify()
+
+    def acquire(self):
+        """Obtiene una conexión del pool, creando una nueva si hay espacio"""
+        start = time.monotonic()
+        deadline = start + self.timeout if self.timeout else None
+        waited = False
+
+        while True:
+            conn = None
+            create = False
+            with self._available:
+                if self._closed:
+                    raise RuntimeError('El pool de conexiones está cerrado')
+                while not self._idle and self._size >= self.max_size:
+                    waited = True
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f'No hay conexiones disponibles (max_size={self.max_size})'
+                        )
+                    self._available.wait(remaining)
+                if self._idle:
+                    # LIFO: la conexión usada más recientemente sigue "caliente"
+                    conn = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            if create:
+                try:
+                    conn = self._new_connection()
+                except Exception:
+                    with self._available:
+                        self._size -= 1
+                        self._available.notify()
+                    raise
+            elif self._expired(conn, time.monotonic()) or not self._is_alive(conn):
+                self._discard(conn)
+                continue
+
+            break
+
+        wait_time = time.monotonic() - start
+        with self._lock:
+            self._checkouts += 1
+            if waited:
+                self._waits += 1
+                self._wait_total += wait_time
+                if wait_time > self._wait_max:
+                    self._wait_max = wait_time
+
+        conn._checked_out = True
+        return conn
+
+    def _release(self, conn):
+        """Devuelve una conexión al pool, descartándola si quedó en mal estado"""
+        try:
+            # Deshacer cualquier transacción pendiente antes de reutilizarla
+            if conn.raw.open:
+                conn.raw.rollback()
+                # El rollback no limpia las variables de sesión que quedaron
+                # marcadas (p. ej. por una excepción al limpiarlas)
+                if conn._variables:
+                    with conn.raw.cursor() as cursor:
+                        cursor.execute('SET ' + ', '.join(f'@{v} = NULL' for v in sorted(conn._variables)))
+                    conn._variables.clear()
+        except Exception:
+            self._discard(conn)
+            return
+
+        now = time.monotonic()
+        conn._last_used = now
+        if self._closed or not conn.raw.open or (
+                self.max_lifetime and now - conn._created_at > self.max_lifetime):
+            self._discard(conn)
+            return
+
+        with self._available:
+            self._idle.append(conn)
+            self._available.notify()
+
+    def prune(self):
+        """Cierra las conexiones ociosas vencidas manteniendo min_size"""
+        now = time.monotonic()
+        vencidas = []
+        with self._lock:
+            conservar = deque()
+            while self._idle:
+                conn = self._idle.popleft()
+                if self._size - len(vencidas) > self.min_size and self._expired(conn, now):
+                    vencidas.append(conn)
+                else:
+                    conservar.append(conn)
+            self._idle = conservar
+        for conn in vencidas:
+            self._discard(conn)
+        return len(vencidas)
+
+    def mantener(self, intervalo):
+        """
+        Lanza un hilo (daemon) que cada `intervalo` segundos ejecuta prune()
+        y warm_up(); termina al cerrar el pool
+        """
+        with self._lock:
+            if self._mantenimiento is not None or self._closed or not intervalo or intervalo <= 0:
+                return
+            self._mantenimiento = threading.Thread(
+                target=self._mantener, args=(intervalo,), name='pool-mantenimiento', daemon=True
+            )
+        self._mantenimiento.start()
+
+    def _mantener(self, intervalo):
+        while not self._cerrado.wait(intervalo):
+            try:
+                self.prune()
+                self.warm_up()
+            except Exception:
+                # La base no responde: se reintenta en la próxima vuelta
+                pass
+
+    def close(self):
+        """Cierra todas las conexiones ociosas; las que están en uso se cierran al devolverse"""
+        with self._lock:
+            self._closed = True
+            self._cerrado.set()
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Devuelve estadísticas del pool para dimensionarlo"""
+        with self._lock:
+            idle = len(self._idle)
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'in_use': self._size - idle,
+                'idle': idle,
+                'created': self._created,
+                'discarded': self._discarded,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'timeouts': self._timeouts,
+                'wait_time_total': round(self._wait_total, 6),
+                'wait_time_avg': round(self._wait_total / self._waits, 6) if self._waits else 0.0,
+                'wait_time_max': round(self._wait_max, 6)
+            }
@@ -0,0 +1,220 @@
+import cProfile
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import Response, abort, g, jsonify, request, send_from_directory
+from werkzeug.utils import secure_filename
+
+
+def plegar_pila(frame):
+    """Convierte una pila de frames al formato 'raiz;...;hoja' de los flamegraphs"""
+    partes = []
+    while frame is not None:
+        code = frame.f_code
+        partes.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+        frame = frame.f_back
+    partes.reverse()
+    return ';'.join(partes)
+
+
+class StackSampler:
+    """
+    Profiler por muestreo: un solo hilo toma la pila de los hilos registrados
+    cada `intervalo` segundos y cuenta las pilas plegadas en un Counter.
+
+    Mientras no haya hilos registrados, el hilo de muestreo queda dormido.
+    Los Counter se incrementan con `lock_contadores` tomado: quien los lea
+    (o copie) mientras se muestrea debe tomarlo también.
+    """
+
+    def __init__(self, intervalo=0.001):
+        self.intervalo = intervalo
+        self._objetivos = {}
+        self._lock = threading.Lock()
+        self.lock_contadores = threading.Lock()
+        self._hay_objetivos = threading.Event()
+        self._hilo = None
+
+    def agregar(self, thread_id, contador):
+        with self._lock:
+            self._objetivos[thread_id] = contador
+            self._hay_objetivos.set()
+            if self._hilo is None:
+                self._hilo = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._hilo.start()
+
+    def quitar(self, thread_id):
+        with self._lock:
+            self._objetivos.pop(thread_id, None)
+            if not self._objetivos:
+                self._hay_objetivos.clear()
+
+    def _run(self):
+        propio = threading.get_ident()
+        while True:
+            self._hay_objetivos.wait()
+            time.sleep(self.intervalo)
+            with self._lock:
+                objetivos = list(self._objetivos.items())
+            if not objetivos:
+                continue
+            frames = sys._current_frames()
+            muestras = [
+                (contador, plegar_pila(frames[thread_id]))
+                for thread_id, contador in objetivos
+                if thread_id in frames and thread_id != propio
+            ]
+            del frames
+            with self.lock_contadores:
+                for contador, pila in muestras:
+                    contador[pila] += 1
+
+
+class RequestProfiler:
+    """
+    Perfilado de peticiones bajo demanda.
+
+    - Una petición con el header X-Profile (o ?__profile=) igual a
+      PROFILING_TOKEN se perfila completa con cProfile y con el muestreador.
+      Se guardan <id>.pstats y <id>.collapsed en PROFILING_DIR y el id se
+      devuelve en el header X-Profile-Id.
+    - Con PROFILING_SAMPLE_EVERY=N, una de cada N peticiones se muestrea y
+      sus pilas se acumulan por endpoint.
+    """
+
+    def __init__(self, app):
+        self.token = app.config['PROFILING_TOKEN']
+        self.directorio = os.path.abspath(app.config['PROFILING_DIR'])
+        self.cada = app.config['PROFILING_SAMPLE_EVERY']
+        self.sampler = StackSampler(app.config['PROFILING_INTERVAL'])
+        self._contador = itertools.count(1)
+        self._perfiles = itertools.count(1)
+        self._agregados = {}
+        self._lock_agregados = threading.Lock()
+        # cProfile no admite dos perfiles activos a la vez en todas las versiones
+        self._lock_cprofile = threading.Lock()
+
+    def es_admin(self):
+        if not self.token:
+            return False
+        return (request.headers.get('X-Profile') == self.token
+                or request.args.get('__profile') == self.token)
+
+    def antes(self):
+        if request.path.startswith('/debug/profiles'):
+            return
+        if self.es_admin():
+            pilas = Counter()
+            perfil = None
+            if self._lock_cprofile.acquire(blocking=False):
+                perfil = cProfile.Profile()
+                perfil.enable()
+            self.sampler.agregar(threading.get_ident(), pilas)
+            g._perfil = (perfil, pilas)
+        elif self.cada and next(self._contador) % self.cada == 0:
+            endpoint = request.endpoint or 'sin_endpoint'
+            with self._lock_agregados:
+                pilas = self._agregados.setdefault(endpoint, Counter())
+            self.sampler.agregar(threading.get_ident(), pilas)
+            g._perfil_muestreo = True
+
+    def despues(self, response):
+        datos = g.pop('_perfil', None)
+        if datos is None:
+            return response
+        perfil, pilas = datos
+        self.sampler.quitar(threading.get_ident())
+        if perfil is not None:
+            perfil.disable()
+            self._lock_cprofile.release()
+
+        os.makedirs(self.directorio, exist_ok=True)
+        endpoint = secure_filename(request.endpoint or 'sin_endpoint')
+        # pid y número de perfil: dos peticiones en el mismo milisegundo (o
+        # en otro worker) no pisan sus archivos
+        perfil_id = (f'{time.strftime("%Y%m%d-%H%M%S")}-{int(time.time() * 1000) % 1000:03d}'
+                     f'-{os.getpid()}-{next(self._perfiles)}-{endpoint}')
+        if perfil is not None:
+            perfil.dump_stats(os.path.join(self.directorio, f'{perfil_id}.pstats'))
+        with self.sampler.lock_contadores:
+            pilas = Counter(pilas)
+        with open(os.path.join(self.directorio, f'{perfil_id}.collapsed'), 'w') as f:
+            for pila, cantidad in pilas.most_common():
+                f.write(f'{pila} {cantidad}\n')
+
+        response.headers['X-Profile-Id'] = perfil_id
+        return response
+
+    def fin(self, exc):
+        if g.pop('_perfil_muestreo', None):
+            self.sampler.quitar(threading.get_ident())
+        elif g.get('_perfil') is not None:
+            # La petición terminó sin pasar por after_request
+            perfil, _ = g.pop('_perfil')
+            self.sampler.quitar(threading.get_ident())
+            if perfil is not None:
+                perfil.disable()
+                self._lock_cprofile.release()
+
+    def agregados(self):
+        with self._lock_agregados:
+            agregados = list(self._agregados.items())
+        with self.sampler.lock_contadores:
+            return {endpoint: sum(pilas.values()) for endpoint, pilas in agregados}
+
+    def collapsed(self, endpoint):
+        with self._lock_agregados:
+            pilas = self._agregados.get(endpoint)
+        if pilas is None:
+            return None
+        with self.sampler.lock_contadores:
+            pilas = Counter(pilas)
+        return ''.join(f'{pila} {cantidad}\n' for pila, cantidad in pilas.most_common())
+
+
+def init_profiling(app):
+    """Instala los hooks de perfilado y las rutas /debug/profiles (solo si PROFILING_ENABLED)"""
+    profiler = RequestProfiler(app)
+    app.extensions['profiler'] = profiler
+    app.before_request(profiler.antes)
+    app.after_request(profiler.despues)
+    app.teardown_request(profiler.fin)
+
+    def requiere_admin():
+        if not profiler.es_admin():
+            abort(403)
+
+    @app.route('/debug/profiles')
+    def listar_perfiles():
+        """Lista los perfiles guardados y las pilas acumuladas por endpoint"""
+        requiere_admin()
+        archivos = sorted(os.listdir(profiler.directorio)) if os.path.isdir(profiler.directorio) else []
+        return jsonify({
+            'success': True,
+            'perfiles': archivos,
+            'muestreo': {
+                'cada': profiler.cada,
+                'muestras_por_endpoint': profiler.agregados()
+            }
+        }), 200
+
+    @app.route('/debug/profiles/<path:nombre>')
+    def descargar_perfil(nombre):
+        """Descarga un archivo .pstats o .collapsed"""
+        requiere_admin()
+        return send_from_directory(profiler.directorio, nombre, as_attachment=True)
+
+    @app.route('/debug/profiles/agregado/<endpoint>')
+    def perfil_agregado(endpoint):
+        """Pilas acumuladas de un endpoint en formato collapsed (para flamegraph.pl / speedscope)"""
+        requiere_admin()
+        texto = profiler.collapsed(endpoint)
+        if texto is None:
+            return jsonify({'success': False, 'error': 'No hay muestras para este endpoint'}), 404
+        return Response(texto, mimetype='text/plain')
+
+    return profiler
@@ -0,0 +1,241 @@
+import itertools
+import threading
+import time
+
+import pymysql
+
+from app.utils.pool import PoolTimeoutError
+
+# Errores del servidor que indican que la réplica no está disponible (los
+# códigos >= 2000 son errores de conexión del cliente)
+CODIGOS_NO_DISPONIBLE = {1040, 1045, 1053, 1129, 1927}
+
+
+def es_error_de_conexion(error):
+    """
+    True si el error se debe a la réplica (caída, sin conexiones, pool
+    lleno) y no a la consulta; solo estos cuentan como fallos de la réplica
+    """
+    if isinstance(error, (PoolTimeoutError, pymysql.err.InterfaceError)):
+        return True
+    if isinstance(error, pymysql.err.OperationalError) and error.args:
+        codigo = error.args[0]
+        return isinstance(codigo, int) and (codigo >= 2000 or codigo in CODIGOS_NO_DISPONIBLE)
+    return False
+
+
+def parsear_hosts(valor, puerto_defecto=3306):
+    """
+    Convierte DB_REPLICA_HOSTS ("host1,host2:3307") en [(host, puerto), ...]
+    """
+    hosts = []
+    for item in (valor or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, puerto = item.partition(':')
+        hosts.append((host.strip(), int(puerto) if puerto else puerto_defecto))
+    return hosts
+
+
+class Replica:
+    """
+    Una réplica de lectura: su pool de conexiones y su estado de salud.
+
+    Estados:
+        pendiente: todavía no se chequeó (no recibe lecturas)
+        sana: responde y su retraso está dentro del máximo
+        atrasada: responde, pero su retraso supera el máximo o la replicación
+            está detenida (no recibe lecturas hasta ponerse al día)
+        expulsada: falló max_fallos veces seguidas (no recibe lecturas hasta
+            que vence la expulsión y vuelve a responder un chequeo)
+    """
+
+    def __init__(self, host, puerto, pool):
+        self.host = host
+        self.puerto = puerto
+        self.pool = pool
+        self.estado = 'pendiente'
+        self.lag = None
+        self.fallos = 0
+        self.expulsada_hasta = 0.0
+        self.ultimo_chequeo = 0.0
+        self.ultimo_error = None
+        self.lecturas = 0
+        self.expulsiones = 0
+        self.chequeando = False
+
+    @property
+    def nombre(self):
+        return f'{self.host}:{self.puerto}'
+
+
+class GrupoReplicas:
+    """
+    Reparte las lecturas entre las réplicas sanas (round-robin).
+
+    Cada réplica se chequea cada `intervalo` segundos en un hilo aparte,
+    lanzado desde elegir(): el chequeo mide el retraso de replicación con
+    SHOW REPLICA STATUS (o SHOW SLAVE STATUS en MySQL < 8.0.22). Un
+    servidor sin replicación configurada cuenta con retraso 0, así que dos
+    instancias independientes sirven para probar el enrutamiento.
+
+    Args:
+        replicas: Lista de Replica
+        max_lag: Segundos de retraso por encima de los cuales una réplica
+            deja de recibir lecturas
+        intervalo: Segundos entre chequeos de cada réplica
+        max_fallos: Fallos seguidos (chequeos o lecturas) que la expulsan
+        expulsion: Segundos que una réplica expulsada queda fuera
+    """
+
+    def __init__(self, replicas, max_lag=5.0, intervalo=5.0, max_fallos=3, expulsion=30.0):
+        self.replicas = list(replicas)
+        self.max_lag = max_lag
+        self.intervalo = intervalo
+        self.max_fallos = max_fallos
+        self.expulsion = expulsion
+        self._lock = threading.Lock()
+        self._turno = itertools.count()
+
+    # ------------------------------------------------------------------
+    # Enrutamiento
+    # ------------------------------------------------------------------
+
+    def elegir(self):
+        """Devuelve la próxima réplica sana, o None si no hay ninguna"""
+        self._programar_chequeos()
+        with self._lock:
+            sanas = [r for r in self.replicas if r.estado == 'sana']
+            if not sanas:
+                return None
+            replica = sanas[next(self._turno) % len(sanas)]
+            replica.lecturas += 1
+            return replica
+
+    def registrar_fallo(self, replica, error):
+        """Cuenta un fallo de la réplica y la expulsa al llegar a max_fallos"""
+        with self._lock:
+            self._fallo(replica, error, time.monotonic())
+
+    def _fallo(self, replica, error, ahora):
+        replica.fallos += 1
+        replica.ultimo_error = str(error)
+        if replica.fallos >= self.max_fallos:
+            if replica.estado != 'expulsada':
+                replica.expulsiones += 1
+            replica.estado = 'expulsada'
+            replica.expulsada_hasta = ahora + self.expulsion
+
+    # ------------------------------------------------------------------
+    # Chequeos de salud
+    # ------------------------------------------------------------------
+
+    def _programar_chequeos(self):
+        ahora = time.monotonic()
+        vencidas = []
+        with self._lock:
+            for replica in self.replicas:
+                if replica.chequeando or ahora - replica.ultimo_chequeo < self.intervalo:
+                    continue
+                if replica.estado == 'expulsada' and ahora < replica.expulsada_hasta:
+                    continue
+                replica.chequeando = True
+                vencidas.append(replica)
+        for replica in vencidas:
+            threading.Thread(target=self.chequear, args=(replica,), daemon=True).start()
+
+    @staticmethod
+    def medir_lag(cursor):
+        """
+        Retraso de replicación en segundos (0 si el servidor no es réplica,
+        None si la replicación está detenida)
+        """
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+            columna = 'Seconds_Behind_Source'
+        except pymysql.err.ProgrammingError:
+            cursor.execute("SHOW SLAVE STATUS")
+            columna = 'Seconds_Behind_Master'
+        fila = cursor.fetchone()
+        if not fila:
+            return 0.0
+        lag = fila.get(columna)
+        return None if lag is None else float(lag)
+
+    def chequear(self, replica):
+        """Chequea una réplica y actualiza su estado"""
+        error = None
+        lag = None
+        try:
+            connection = replica.pool.acquire()
+            try:
+                # Cursor sin medir: el chequeo no cuenta como consulta de la app
+                with connection.raw.cursor(pymysql.cursors.DictCursor) as cursor:
+                    lag = self.medir_lag(cursor)
+            finally:
+                connection.close()
+        except Exception as e:
+            error = e
+
+        ahora = time.monotonic()
+        with self._lock:
+            replica.chequeando = False
+            replica.ultimo_chequeo = ahora
+            if error is not None:
+                self._fallo(replica, error, ahora)
+                return replica.estado
+            replica.fallos = 0
+            replica.expulsada_hasta = 0.0
+            replica.lag = lag
+            if lag is None:
+                replica.estado = 'atrasada'
+                replica.ultimo_error = 'La replicación está detenida'
+            elif lag > self.max_lag:
+                replica.estado = 'atrasada'
+                replica.ultimo_error = f'Retraso de {lag:g}s (máximo {self.max_lag:g}s)'
+            else:
+                replica.estado = 'sana'
+                replica.ultimo_error = None
+            return replica.estado
+
+    def chequear_todas(self):
+        """Chequea todas las réplicas en el hilo actual (arranque y pruebas)"""
+        for replica in self.replicas:
+            with self._lock:
+                if replica.chequeando:
+                    continue
+                replica.chequeando = True
+            self.chequear(replica)
+
+    def stats(self):
+        """Estado, retraso, fallos y pool de cada réplica"""
+        ahora = time.monotonic()
+        with self._lock:
+            replicas = [
+                {
+                    'replica': r.nombre,
+                    'estado': r.estado,
+                    'lag_segundos': r.lag,
+                    'fallos_seguidos': r.fallos,
+                    'expulsiones': r.expulsiones,
+                    'expulsada_por': round(max(r.expulsada_hasta - ahora, 0.0), 3),
+                    'lecturas': r.lecturas,
+                    'ultimo_chequeo_hace': round(ahora - r.ultimo_chequeo, 3) if r.ultimo_chequeo else None,
+                    'ultimo_error': r.ultimo_error
+                }
+                for r in self.replicas
+            ]
+        for replica, stats in zip(self.replicas, replicas):
+            stats['pool'] = replica.pool.stats()
+        return {
+            'max_lag': self.max_lag,
+            'intervalo': self.intervalo,
+            'max_fallos': self.max_fallos,
+            'expulsion': self.expulsion,
+            'replicas': replicas
+        }
+
+    def cerrar(self):
+        for replica in self.replicas:
+            replica.pool.close()
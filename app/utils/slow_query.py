@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import sys
+import threading
+from collections import deque
+from datetime import date, datetime
+from decimal import Decimal
+
+import pymysql
+
+_ESPACIOS = re.compile(r'\s+')
+_LISTA_IN = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_CARPETA_MODELOS = os.sep + os.path.join('app', 'models') + os.sep
+
+
+def normalizar_sql(query):
+    """Colapsa espacios y listas IN (%s, %s, ...) para agrupar consultas iguales"""
+    query = _ESPACIOS.sub(' ', query).strip()
+    return _LISTA_IN.sub('(%s, ...)', query)
+
+
+def _redactar_valor(valor):
+    if valor is None or isinstance(valor, (bool, int, float, Decimal)):
+        return valor if not isinstance(valor, Decimal) else str(valor)
+    if isinstance(valor, (str, bytes)):
+        return f'<{type(valor).__name__}({len(valor)})>'
+    if isinstance(valor, (date, datetime)):
+        return f'<{type(valor).__name__}>'
+    if isinstance(valor, (list, tuple)):
+        return [_redactar_valor(v) for v in valor]
+    return f'<{type(valor).__name__}>'
+
+
+def redactar_parametros(params, muchos=False):
+    """
+    Oculta el contenido de los parámetros de texto (pueden ser contraseñas o
+    datos personales); los números y None se conservan.
+    """
+    if params is None:
+        return None
+    if muchos:
+        params = list(params)
+        return {'filas': len(params), 'primera': redactar_parametros(params[0]) if params else None}
+    if isinstance(params, dict):
+        return {clave: _redactar_valor(valor) for clave, valor in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [_redactar_valor(v) for v in params]
+    return _redactar_valor(params)
+
+
+def metodo_llamador():
+    """Devuelve 'Clase.metodo' del modelo que lanzó la consulta (o None)"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if _CARPETA_MODELOS in code.co_filename:
+            return getattr(code, 'co_qualname', code.co_name)
+        frame = frame.f_back
+    return None
+
+
+class SlowQueryLog:
+    """
+    Registro de consultas lentas.
+
+    Las consultas que superan `umbral` segundos se guardan en un buffer
+    circular en memoria (las últimas `capacidad`) y, si hay `archivo`, se
+    agregan como una línea JSON. Con `explain=True` se ejecuta EXPLAIN de los
+    SELECT lentos en la misma conexión y se guarda el plan.
+    """
+
+    def __init__(self, umbral=0.2, capacidad=200, archivo=None, explain=False):
+        self.umbral = umbral
+        self.archivo = archivo
+        self.explain = explain
+        self._entradas = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def configurar(self, umbral=None, capacidad=None, archivo=None, explain=None):
+        with self._lock:
+            if umbral is not None:
+                self.umbral = umbral
+            if capacidad is not None and capacidad != self._entradas.maxlen:
+                self._entradas = deque(self._entradas, maxlen=capacidad)
+            if archivo is not None:
+                self.archivo = archivo or None
+            if explain is not None:
+                self.explain = explain
+
+    def _explain(self, cursor, query, params):
+        if isinstance(cursor, pymysql.cursors.SSCursor):
+            # Con un cursor sin buffer la conexión sigue ocupada leyendo filas
+            return None
+        if not query.lstrip()[:6].upper() == 'SELECT':
+            return None
+        try:
+            with cursor.connection.cursor(pymysql.cursors.DictCursor) as explain_cursor:
+                explain_cursor.execute('EXPLAIN ' + query, params)
+                return explain_cursor.fetchall()
+        except Exception as e:
+            return {'error': str(e)}
+
+    def registrar(self, cursor, query, params, segundos, muchos=False, error=None):
+        """Guarda una consulta que superó el umbral"""
+        if isinstance(query, bytes):
+            query = query.decode('utf-8', 'replace')
+        entrada = {
+            'fecha': datetime.now().isoformat(timespec='milliseconds'),
+            'duracion_ms': round(segundos * 1000, 3),
+            'sql': normalizar_sql(query),
+            'parametros': redactar_parametros(params, muchos),
+            'filas': cursor.rowcount if error is None else None,
+            'metodo': metodo_llamador()
+        }
+        if error is not None:
+            entrada['error'] = f'{type(error).__name__}: {error}'
+        elif self.explain and not muchos:
+            entrada['explain'] = self._explain(cursor, query, params)
+
+        with self._lock:
+            self._entradas.append(entrada)
+            self.total += 1
+            if self.archivo:
+                carpeta = os.path.dirname(self.archivo)
+                if carpeta:
+                    os.makedirs(carpeta, exist_ok=True)
+                with open(self.archivo, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(entrada, ensure_ascii=False, default=str) + '\n')
+
+    def entradas(self, limite=None):
+        """Devuelve las consultas lentas guardadas, la más reciente primero"""
+        with self._lock:
+            entradas = list(self._entradas)
+        entradas.reverse()
+        return entradas[:limite] if limite else entradas
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'umbral_ms': round(self.umbral * 1000, 3),
+                'capacidad': self._entradas.maxlen,
+                'en_buffer': len(self._entradas),
+                'total': self.total,
+                'explain': self.explain,
+                'archivo': self.archivo
+            }
+
+
+slow_query_log = SlowQueryLog()
@@ -0,0 +1 @@
+"""Pruebas de carga y micro-benchmarks que corren sin JMeter ni MySQL"""
@@ -0,0 +1,102 @@
+"""
+Benchmark de los proveedores JSON (stdlib vs orjson) con listas grandes
+
+Simula las respuestas de /api/alumnos y /api/historial/<id>: filas de
+DictCursor con Decimal, date y datetime.
+
+Uso:
+    python benchmarks/bench_json.py [--filas 10000] [--repeticiones 20]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from app.utils.json_provider import FastJSONProvider, OrjsonProvider, orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+def generar_alumnos(n):
+    """Filas con la forma de SELECT * FROM alumnos"""
+    base = date(2024, 1, 1)
+    return [
+        {
+            'id': i,
+            'codigo': f'A{2024_0000 + i}',
+            'dni': f'{10000000 + i:08d}',
+            'nombre': 'María José',
+            'apellido': 'Pérez Rodríguez',
+            'email': f'alumno{i}@email.com',
+            'telefono': f'98765{i % 10000:04d}',
+            'fecha_ingreso': base + timedelta(days=i % 365),
+            'created_at': datetime(2024, 1, 1, 8, 30) + timedelta(minutes=i)
+        }
+        for i in range(n)
+    ]
+
+
+def generar_notas(n):
+    """Filas con la forma de la consulta de notas del historial"""
+    return [
+        {
+            'matricula_id': i // 4,
+            'tipo_evaluacion': f'Parcial {i % 4 + 1}',
+            'nota': Decimal('15.50') + Decimal(i % 9),
+            'peso': Decimal('0.25'),
+            'fecha_evaluacion': date(2024, 3, 1) + timedelta(days=i % 120)
+        }
+        for i in range(n)
+    ]
+
+
+def medir(provider, payload, repeticiones):
+    """Devuelve el mejor tiempo (en ms) de serializar payload con response()"""
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        provider.response(payload).get_data()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de proveedores JSON')
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = [
+        ('flask (DefaultJSONProvider)', DefaultJSONProvider(app)),
+        ('stdlib (FastJSONProvider)', FastJSONProvider(app))
+    ]
+    if orjson is not None:
+        providers.append(('orjson (OrjsonProvider)', OrjsonProvider(app)))
+        app.config['JSON_DECIMAL'] = 'float'
+        app.config['JSON_DATE_FORMAT'] = 'iso'
+        providers.append(('orjson (float + iso)', OrjsonProvider(app)))
+    else:
+        print('⚠️  orjson no está instalado; solo se mide la librería estándar')
+
+    payloads = {
+        'alumnos': {'success': True, 'alumnos': generar_alumnos(args.filas), 'count': args.filas},
+        'notas': {'success': True, 'notas': generar_notas(args.filas)}
+    }
+
+    with app.app_context():
+        for nombre_payload, payload in payloads.items():
+            print(f'\n📦 {nombre_payload}: {args.filas} filas (mejor de {args.repeticiones})')
+            referencia = None
+            for nombre, provider in providers:
+                ms = medir(provider, payload, args.repeticiones)
+                referencia = referencia or ms
+                print(f'   {nombre:<30} {ms:9.2f} ms   x{referencia / ms:5.2f}')
+
+
+if __name__ == '__main__':
+    main()
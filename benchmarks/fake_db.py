@@ -0,0 +1,170 @@
+"""
+Base de datos simulada en memoria para las pruebas de carga.
+
+Reemplaza la conexión de PyMySQL en app.utils.database y responde solo las
+consultas que usan los escenarios de test_plan.jmx (login, registro de
+alumnos y estadísticas de cursos). Cualquier otra consulta falla con
+ProgrammingError para que no pase inadvertida.
+
+La latencia de red/servidor se simula con un sleep por consulta, que libera
+el GIL igual que la espera de un socket real.
+"""
+import hashlib
+import re
+import threading
+import time
+from decimal import Decimal
+
+import pymysql
+
+import app.utils.database as database
+
+
+def _normalizar(query):
+    return ' '.join(query.split())
+
+
+class BaseDatosSimulada:
+    """Tablas en memoria compartidas por todas las conexiones simuladas"""
+
+    def __init__(self, cursos=50, latencia=0.0, seed=42):
+        self.latencia = latencia
+        self._lock = threading.Lock()
+        self.consultas = 0
+        self.usuarios = {
+            'admin': {
+                'id': 1,
+                'username': 'admin',
+                'password_hash': hashlib.sha256(b'admin123').hexdigest(),
+                'email': 'admin@sistema.com'
+            }
+        }
+        self.alumnos = {}
+        self.codigos = set()
+        self.dnis = set()
+        self.cursos = []
+        for i in range(1, cursos + 1):
+            # Valores fijos derivados de i para que dos corridas sean comparables
+            total_alumnos = (i * 37 + seed) % 400 + 20
+            self.cursos.append({
+                'id': i,
+                'codigo_curso': f'CUR{i:04d}',
+                'nombre': f'Curso {i:04d}',
+                'creditos': 2 + i % 4,
+                'descripcion': f'Curso simulado {i}',
+                'total_alumnos': total_alumnos,
+                'total_evaluaciones': total_alumnos * 4,
+                'promedio_general': Decimal(11 + i % 7) + Decimal(i % 10) / 10
+            })
+
+    def instalar(self):
+        """Hace que el pool de app.utils.database cree conexiones simuladas"""
+        database._crear_conexion = lambda: ConexionSimulada(self)
+        database._pool = None
+        database._pool_pid = None
+
+    def ejecutar(self, query, params):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.consultas += 1
+        sql = _normalizar(query)
+
+        if sql.startswith('SELECT * FROM usuarios WHERE username = %s AND password_hash = %s'):
+            usuario = self.usuarios.get(params[0])
+            if usuario and usuario['password_hash'] == params[1]:
+                return [dict(usuario)], None
+            return [], None
+
+        if sql.startswith('SELECT * FROM usuarios WHERE username = %s'):
+            usuario = self.usuarios.get(params[0])
+            return ([dict(usuario)] if usuario else []), None
+
+        if sql.startswith('SELECT jti, antes_de_ms FROM tokens_revocados'):
+            return [], None
+
+        if sql.startswith('INSERT INTO alumnos (codigo, dni, nombre, apellido, email, telefono, fecha_ingreso)'):
+            return [], self._insertar_alumno(params)
+
+        if re.match(r'SELECT c\.id, c\.codigo_curso, .* FROM cursos c LEFT JOIN curso_estadisticas ce', sql):
+            return [dict(curso) for curso in self.cursos], None
+
+        raise pymysql.err.ProgrammingError(1064, f'Consulta no soportada por la base simulada: {sql[:120]}')
+
+    def _insertar_alumno(self, params):
+        codigo, dni = params[0], str(params[1])
+        with self._lock:
+            if codigo in self.codigos:
+                raise pymysql.err.IntegrityError(1062, f"Duplicate entry '{codigo}' for key 'alumnos.codigo'")
+            if dni in self.dnis:
+                raise pymysql.err.IntegrityError(1062, f"Duplicate entry '{dni}' for key 'alumnos.dni'")
+            alumno_id = len(self.alumnos) + 1
+            self.codigos.add(codigo)
+            self.dnis.add(dni)
+            self.alumnos[alumno_id] = params
+        return alumno_id
+
+
+class CursorSimulado:
+    def __init__(self, bd):
+        self._bd = bd
+        self._filas = []
+        self.lastrowid = None
+        self.rowcount = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def execute(self, query, args=None):
+        self._filas, lastrowid = self._bd.ejecutar(query, args or ())
+        if lastrowid is not None:
+            self.lastrowid = lastrowid
+        self.rowcount = len(self._filas) if lastrowid is None else 1
+        return self.rowcount
+
+    def executemany(self, query, args):
+        total = 0
+        for fila in args:
+            total += self.execute(query, fila)
+        return total
+
+    def fetchone(self):
+        return self._filas.pop(0) if self._filas else None
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def fetchmany(self, size=1):
+        filas, self._filas = self._filas[:size], self._filas[size:]
+        return filas
+
+    def close(self):
+        self._filas = []
+
+
+class ConexionSimulada:
+    """Interfaz mínima de pymysql.connections.Connection que usa el pool"""
+
+    def __init__(self, bd):
+        self._bd = bd
+        self.open = True
+
+    def cursor(self, *args, **kwargs):
+        return CursorSimulado(self._bd)
+
+    def ping(self, reconnect=False):
+        if not self.open:
+            raise pymysql.err.InterfaceError(0, 'Conexión cerrada')
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
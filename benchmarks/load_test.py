@@ -0,0 +1,492 @@
+"""
+Pruebas de carga en Python que reproducen los grupos de hilos de test_plan.jmx.
+
+Corre la aplicación con una base de datos simulada en memoria (sin MySQL ni
+JMeter) a través del cliente de pruebas de Flask o de un servidor WSGI real
+en un hilo, o contra un servidor ya levantado con --url. Escribe p50/p95/p99
+y throughput por escenario y endpoint en JSON, y el modo compare falla si
+alguna métrica empeora más que el umbral.
+
+Ejemplos:
+    python -m benchmarks.load_test run --salida resultados.json
+    python -m benchmarks.load_test run --escenarios login_10,calculo_cpu --escala-esperas 0
+    python -m benchmarks.load_test run --servidor wsgi --latencia-bd 2
+    python -m benchmarks.load_test run --url http://localhost:5000 --csv data/generado/alumnos_registro.csv
+    python -m benchmarks.load_test compare base.json resultados.json --umbral 0.15
+"""
+import argparse
+import csv
+import http.client
+import json
+import os
+import platform
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import urlsplit
+
+CREDENCIALES = {'username': 'admin', 'password': 'admin123'}
+
+SIMULACION = {
+    'notas': [
+        {'tipo': 'Parcial 1', 'nota': 15.5, 'peso': 0.20},
+        {'tipo': 'Parcial 2', 'nota': 17.0, 'peso': 0.20},
+        {'tipo': 'Prácticas', 'nota': 18.0, 'peso': 0.30},
+        {'tipo': 'Final', 'nota': 16.5, 'peso': 0.30}
+    ],
+    'sistema': '20',
+    'nota_minima_aprobacion': 10.5
+}
+
+METRICAS_LATENCIA = ('p50_ms', 'p95_ms', 'p99_ms')
+
+
+@dataclass(frozen=True)
+class Paso:
+    """Un sampler HTTP: nombre, método, ruta, estado esperado y duración máxima (Duration Assertion)"""
+    nombre: str
+    metodo: str
+    ruta: str
+    estado: int
+    max_ms: float = None
+
+
+@dataclass(frozen=True)
+class Escenario:
+    """Un Thread Group de test_plan.jmx"""
+    nombre: str
+    hilos: int
+    rampa: float
+    iteraciones: int
+    espera_ms: float
+    desvio_ms: float
+    pasos: tuple
+
+
+def _login(max_ms):
+    return Paso('login', 'POST', '/api/login', 200, max_ms)
+
+
+ESCENARIOS = {
+    escenario.nombre: escenario for escenario in (
+        Escenario('login_10', 10, 5, 50, 300, 100, (_login(1000),)),
+        Escenario('login_50', 50, 10, 30, 300, 100, (_login(1500),)),
+        Escenario('registro_csv', 20, 5, 1, 200, 0, (
+            _login(None), Paso('registrar_alumno', 'POST', '/api/alumno/registrar', 201, 2000))),
+        Escenario('join_pesado', 100, 20, 20, 500, 200, (
+            _login(None), Paso('estadisticas_cursos', 'GET', '/api/cursos/estadisticas', 200, 3000))),
+        Escenario('calculo_cpu', 100, 15, 50, 100, 0, (
+            _login(None), Paso('simular_promedio', 'POST', '/api/simular-promedio', 200, 500))),
+        Escenario('estres_200', 200, 30, 10, 800, 300, (
+            _login(None), Paso('estadisticas_cursos', 'GET', '/api/cursos/estadisticas', 200, None)))
+    )
+}
+
+
+class ClienteFlask:
+    """Peticiones con app.test_client() (sin sockets)"""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def peticion(self, metodo, ruta, cuerpo=None, headers=None):
+        response = self.client.open(ruta, method=metodo, json=cuerpo, headers=headers)
+        return response.status_code, response.get_json(silent=True)
+
+
+class ClienteHTTP:
+    """Peticiones HTTP/1.1 con keep-alive (como use_keepalive de JMeter)"""
+
+    def __init__(self, url):
+        partes = urlsplit(url)
+        self.host = partes.hostname
+        self.port = partes.port or 80
+        self.conexion = None
+
+    def peticion(self, metodo, ruta, cuerpo=None, headers=None):
+        headers = dict(headers or {})
+        datos = None
+        if cuerpo is not None:
+            datos = json.dumps(cuerpo).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        for intento in range(2):
+            if self.conexion is None:
+                self.conexion = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                self.conexion.request(metodo, ruta, body=datos, headers=headers)
+                response = self.conexion.getresponse()
+                contenido = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # El servidor cerró la conexión keep-alive: se reintenta una vez con otra
+                self.conexion.close()
+                self.conexion = None
+                if intento:
+                    raise
+        if response.getheader('Connection', '').lower() == 'close':
+            self.conexion.close()
+            self.conexion = None
+        try:
+            return response.status, json.loads(contenido)
+        except ValueError:
+            return response.status, None
+
+
+def limitar_hilos(app, hilos):
+    """
+    Atiende a lo sumo `hilos` peticiones a la vez, como un worker gthread con
+    SERVER_THREADS hilos: las demás esperan un hilo libre (en producción, en
+    el backlog del socket) antes de llegar al control de admisión
+    """
+    semaforo = threading.BoundedSemaphore(hilos)
+    wsgi_app = app.wsgi_app
+
+    def wsgi_limitada(environ, start_response):
+        with semaforo:
+            return wsgi_app(environ, start_response)
+
+    app.wsgi_app = wsgi_limitada
+
+
+def levantar_servidor_wsgi(app):
+    """Sirve la aplicación con el servidor multihilo de Werkzeug en un puerto libre"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    servidor = make_server('127.0.0.1', 0, app, threaded=True, request_handler=Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f'http://127.0.0.1:{servidor.server_port}'
+
+
+class FilasCSV:
+    """CSV Data Set Config compartido entre hilos con Recycle on EOF"""
+
+    def __init__(self, ruta):
+        with open(ruta, encoding='utf-8', newline='') as f:
+            self.filas = list(csv.DictReader(f))
+        if not self.filas:
+            raise ValueError(f'El CSV {ruta} no tiene filas')
+        self._indice = 0
+        self._lock = threading.Lock()
+
+    def siguiente(self):
+        with self._lock:
+            fila = self.filas[self._indice % len(self.filas)]
+            self._indice += 1
+            return fila
+
+
+def percentil(ordenados, p):
+    """Percentil por rango más cercano (el mismo criterio que el Aggregate Report)"""
+    if not ordenados:
+        return 0.0
+    indice = max(0, min(len(ordenados) - 1, int(round(p / 100 * len(ordenados) + 0.5)) - 1))
+    return ordenados[indice]
+
+
+def resumir(duraciones, errores, segundos):
+    ordenados = sorted(duraciones)
+    total = len(ordenados)
+    return {
+        'muestras': total,
+        'errores': sum(errores.values()),
+        'tasa_error': round(sum(errores.values()) / total, 4) if total else 0.0,
+        'detalle_errores': dict(errores),
+        'promedio_ms': round(sum(ordenados) / total, 3) if total else 0.0,
+        'p50_ms': round(percentil(ordenados, 50), 3),
+        'p95_ms': round(percentil(ordenados, 95), 3),
+        'p99_ms': round(percentil(ordenados, 99), 3),
+        'max_ms': round(ordenados[-1], 3) if total else 0.0,
+        'throughput': round(total / segundos, 2) if segundos else 0.0
+    }
+
+
+def ejecutar_paso(cliente, paso, contexto, filas_csv):
+    headers = {}
+    if 'token' in contexto:
+        headers['Authorization'] = f"Bearer {contexto['token']}"
+    if paso.nombre == 'login':
+        cuerpo = CREDENCIALES
+    elif paso.nombre == 'registrar_alumno':
+        cuerpo = filas_csv.siguiente()
+    elif paso.nombre == 'simular_promedio':
+        cuerpo = SIMULACION
+    else:
+        cuerpo = None
+
+    inicio = time.perf_counter()
+    try:
+        estado, datos = cliente.peticion(paso.metodo, paso.ruta, cuerpo, headers)
+    except Exception as e:
+        return (time.perf_counter() - inicio) * 1000, type(e).__name__
+    ms = (time.perf_counter() - inicio) * 1000
+
+    if estado != paso.estado:
+        return ms, f'HTTP {estado}'
+    if not isinstance(datos, dict) or not datos.get('success'):
+        return ms, 'success != true'
+    if paso.max_ms is not None and ms > paso.max_ms:
+        return ms, f'> {paso.max_ms:.0f} ms'
+    if paso.nombre == 'login':
+        contexto['token'] = datos['token']
+    return ms, None
+
+
+def ejecutar_escenario(escenario, fabrica_cliente, filas_csv, escala_esperas=1.0, escala_iteraciones=1.0, seed=42):
+    """
+    Corre un Thread Group: cada hilo arranca según la rampa y repite sus pasos.
+
+    Como en JMeter, el temporizador se aplica antes de cada sampler y un
+    login fallido corta la iteración.
+    """
+    iteraciones = max(1, round(escenario.iteraciones * escala_iteraciones))
+    resultados = []
+    barrera = threading.Barrier(escenario.hilos + 1)
+
+    def hilo(numero):
+        rng = random.Random(seed * 1000 + numero)
+        duraciones = defaultdict(list)
+        errores = defaultdict(lambda: defaultdict(int))
+        cliente = fabrica_cliente()
+        barrera.wait()
+        time.sleep(escenario.rampa * numero / escenario.hilos * escala_esperas)
+        for _ in range(iteraciones):
+            contexto = {}
+            for paso in escenario.pasos:
+                espera = escenario.espera_ms + (rng.gauss(0, escenario.desvio_ms) if escenario.desvio_ms else 0)
+                if espera > 0 and escala_esperas:
+                    time.sleep(espera * escala_esperas / 1000)
+                ms, error = ejecutar_paso(cliente, paso, contexto, filas_csv)
+                duraciones[paso.nombre].append(ms)
+                if error:
+                    errores[paso.nombre][error] += 1
+                    if paso.nombre == 'login':
+                        break
+        resultados.append((duraciones, errores))
+
+    hilos = [threading.Thread(target=hilo, args=(i,), daemon=True) for i in range(escenario.hilos)]
+    for h in hilos:
+        h.start()
+    barrera.wait()
+    inicio = time.perf_counter()
+    for h in hilos:
+        h.join()
+    segundos = time.perf_counter() - inicio
+
+    duraciones = defaultdict(list)
+    errores = defaultdict(lambda: defaultdict(int))
+    for d, e in resultados:
+        for nombre, valores in d.items():
+            duraciones[nombre].extend(valores)
+        for nombre, conteo in e.items():
+            for error, n in conteo.items():
+                errores[nombre][error] += n
+
+    todas = [ms for valores in duraciones.values() for ms in valores]
+    todos_errores = defaultdict(int)
+    for conteo in errores.values():
+        for error, n in conteo.items():
+            todos_errores[error] += n
+
+    return {
+        'hilos': escenario.hilos,
+        'iteraciones': iteraciones,
+        'duracion_s': round(segundos, 3),
+        'total': resumir(todas, todos_errores, segundos),
+        'endpoints': {
+            nombre: resumir(duraciones[nombre], errores[nombre], segundos)
+            for nombre in dict.fromkeys(p.nombre for p in escenario.pasos)
+        }
+    }
+
+
+def preparar_objetivo(args):
+    """Devuelve (fabrica_cliente, detener, descripcion) según --url o --servidor"""
+    if args.url:
+        return (lambda: ClienteHTTP(args.url)), (lambda: None), {'url': args.url}
+
+    from benchmarks.fake_db import BaseDatosSimulada
+    from app import create_app
+
+    bd = BaseDatosSimulada(cursos=args.cursos, latencia=args.latencia_bd / 1000, seed=args.seed)
+    bd.instalar()
+    app = create_app()
+    limitar_hilos(app, app.config['ADMISSION_HILOS'])
+
+    # Cachés de proceso vacías, como en un servidor recién levantado
+    from app.routes.curso import estadisticas_cache
+    from app.utils.auth import token_cache
+    estadisticas_cache.invalidate()
+    token_cache.clear()
+    descripcion = {'servidor': args.servidor, 'latencia_bd_ms': args.latencia_bd, 'cursos': args.cursos,
+                   'hilos_servidor': app.config['ADMISSION_HILOS']}
+
+    if args.servidor == 'wsgi':
+        servidor, url = levantar_servidor_wsgi(app)
+        return (lambda: ClienteHTTP(url)), servidor.shutdown, descripcion
+    return (lambda: ClienteFlask(app)), (lambda: None), descripcion
+
+
+def comando_run(args):
+    nombres = list(ESCENARIOS) if args.escenarios == 'all' else [n.strip() for n in args.escenarios.split(',')]
+    desconocidos = [n for n in nombres if n not in ESCENARIOS]
+    if desconocidos:
+        raise SystemExit(f"❌ Escenarios desconocidos: {', '.join(desconocidos)} "
+                         f"(disponibles: {', '.join(ESCENARIOS)})")
+
+    filas_csv = FilasCSV(args.csv)
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'parametros': {
+            'escala_esperas': args.escala_esperas,
+            'escala_iteraciones': args.escala_iteraciones,
+            'seed': args.seed,
+            'csv': args.csv
+        },
+        'escenarios': {}
+    }
+
+    # Un objetivo nuevo por escenario para que no arrastre datos ni cachés del anterior
+    for nombre in nombres:
+        fabrica_cliente, detener, descripcion = preparar_objetivo(args)
+        reporte['parametros'].update(descripcion)
+        print(f"▶ {nombre}...", flush=True)
+        try:
+            resultado = ejecutar_escenario(ESCENARIOS[nombre], fabrica_cliente, filas_csv,
+                                           args.escala_esperas, args.escala_iteraciones, args.seed)
+        finally:
+            detener()
+        reporte['escenarios'][nombre] = resultado
+        for endpoint, m in resultado['endpoints'].items():
+            print(f"   {endpoint:<22} n={m['muestras']:<6} p50={m['p50_ms']:>8.2f} ms  "
+                  f"p95={m['p95_ms']:>8.2f} ms  p99={m['p99_ms']:>8.2f} ms  "
+                  f"{m['throughput']:>8.1f} req/s  errores={m['errores']}")
+
+    if args.salida:
+        directorio = os.path.dirname(args.salida)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        print(f"✅ Resultados en {args.salida}")
+    else:
+        json.dump(reporte, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    if args.comparar:
+        return comparar_archivos(args.comparar, reporte, args.umbral, args.umbral_error, args.minimo_ms)
+    return 0
+
+
+def comparar(base, actual, umbral, umbral_error, minimo_ms):
+    """
+    Lista las regresiones de actual respecto de base.
+
+    Una latencia empeora si sube más del umbral relativo y además más de
+    minimo_ms (para no fallar por ruido en tiempos muy chicos); el
+    throughput, si baja más del umbral; la tasa de error, si sube más de
+    umbral_error (absoluto).
+    """
+    regresiones = []
+    for escenario, datos_base in base['escenarios'].items():
+        datos_actual = actual['escenarios'].get(escenario)
+        if datos_actual is None:
+            continue
+        for endpoint, m_base in datos_base['endpoints'].items():
+            m_actual = datos_actual['endpoints'].get(endpoint)
+            if m_actual is None:
+                continue
+            donde = f'{escenario}/{endpoint}'
+            for metrica in METRICAS_LATENCIA:
+                antes, ahora = m_base[metrica], m_actual[metrica]
+                if ahora > antes * (1 + umbral) and ahora - antes > minimo_ms:
+                    regresiones.append(f'{donde} {metrica}: {antes:.2f} → {ahora:.2f} ms')
+            antes, ahora = m_base['throughput'], m_actual['throughput']
+            if ahora < antes * (1 - umbral):
+                regresiones.append(f'{donde} throughput: {antes:.1f} → {ahora:.1f} req/s')
+            antes, ahora = m_base['tasa_error'], m_actual['tasa_error']
+            if ahora - antes > umbral_error:
+                regresiones.append(f'{donde} tasa_error: {antes:.2%} → {ahora:.2%}')
+    return regresiones
+
+
+def comparar_archivos(ruta_base, actual, umbral, umbral_error, minimo_ms):
+    with open(ruta_base, encoding='utf-8') as f:
+        base = json.load(f)
+    regresiones = comparar(base, actual, umbral, umbral_error, minimo_ms)
+    if regresiones:
+        print(f"❌ {len(regresiones)} regresiones respecto de {ruta_base} (umbral {umbral:.0%}):")
+        for regresion in regresiones:
+            print(f"   {regresion}")
+        return 1
+    print(f"✅ Sin regresiones respecto de {ruta_base} (umbral {umbral:.0%})")
+    return 0
+
+
+def comando_compare(args):
+    with open(args.actual, encoding='utf-8') as f:
+        actual = json.load(f)
+    return comparar_archivos(args.base, actual, args.umbral, args.umbral_error, args.minimo_ms)
+
+
+def agregar_opciones_comparacion(parser):
+    parser.add_argument('--umbral', type=float, default=0.10,
+                        help='Empeoramiento relativo tolerado en latencias y throughput (0.10 = 10%%)')
+    parser.add_argument('--umbral-error', type=float, default=0.01,
+                        help='Aumento absoluto tolerado en la tasa de error')
+    parser.add_argument('--minimo-ms', type=float, default=1.0,
+                        help='Diferencias de latencia menores a esto no cuentan como regresión')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Pruebas de carga sin JMeter (escenarios de test_plan.jmx)')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    run = subparsers.add_parser('run', help='Ejecuta los escenarios y escribe el JSON de resultados')
+    run.add_argument('--escenarios', default='all',
+                     help=f"Lista separada por comas o 'all' ({', '.join(ESCENARIOS)})")
+    run.add_argument('--servidor', choices=('test-client', 'wsgi'), default='test-client',
+                     help='test-client: Flask test client; wsgi: servidor Werkzeug multihilo en un hilo')
+    run.add_argument('--url', help='Probar un servidor ya levantado (con su MySQL) en lugar de la base simulada')
+    run.add_argument('--latencia-bd', type=float, default=0.5, help='Latencia simulada por consulta en ms')
+    run.add_argument('--cursos', type=int, default=50, help='Cursos en la base simulada')
+    run.add_argument('--csv', default=os.path.join('data', 'alumnos_test.csv'),
+                     help='CSV de alumnos para el escenario registro_csv')
+    run.add_argument('--escala-esperas', type=float, default=1.0,
+                     help='Factor para temporizadores y rampa (0 = sin esperas, máxima carga)')
+    run.add_argument('--escala-iteraciones', type=float, default=1.0,
+                     help='Factor para la cantidad de iteraciones de cada hilo')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--salida', help='Archivo JSON de resultados (por defecto stdout)')
+    run.add_argument('--comparar', metavar='BASE', help='Compara contra un JSON previo y falla si hay regresiones')
+    agregar_opciones_comparacion(run)
+
+    compare = subparsers.add_parser('compare', help='Compara dos JSON de resultados')
+    compare.add_argument('base')
+    compare.add_argument('actual')
+    agregar_opciones_comparacion(compare)
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.comando == 'run':
+        return comando_run(args)
+    return comando_compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
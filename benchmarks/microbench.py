@@ -0,0 +1,337 @@
+"""
+Micro-benchmarks de las rutas críticas que no hacen I/O.
+
+Mide con entradas sintéticas de tamaño creciente (10 → 100 000 filas o
+notas) el tiempo por operación (ns/op) y la memoria asignada (tracemalloc)
+de:
+    historial      agrupación de obtener_historial_agrupado + _armar_historial
+    simular        validación y agregación de /simular-promedio
+    estadisticas   armado de diccionarios de _calcular_estadisticas_cursos
+    jwt_generar    generate_token
+    jwt_decodificar jwt.decode de un token HS256
+
+Los resultados se comparan con la línea base guardada en
+benchmarks/baselines/micro.json.
+
+Ejemplos:
+    python -m benchmarks.microbench run
+    python -m benchmarks.microbench run --benchmarks historial,simular --tamanos 10,1000
+    python -m benchmarks.microbench run --guardar-baseline
+    python -m benchmarks.microbench run --comparar --umbral 0.25
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'micro.json')
+TAMANOS = (10, 100, 1000, 10000, 100000)
+NOTAS_POR_MATRICULA = 4
+
+
+class ConexionFija:
+    """Conexión que devuelve filas preparadas en orden, una lista por execute()"""
+
+    def __init__(self, resultados):
+        self._resultados = resultados
+
+    def cursor(self, *args, **kwargs):
+        return CursorFijo(list(self._resultados))
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class CursorFijo:
+    def __init__(self, resultados):
+        self._resultados = resultados
+        self._filas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+    def execute(self, query, args=None):
+        self._filas = self._resultados.pop(0)
+
+    def fetchall(self):
+        return self._filas
+
+
+def _app():
+    from app import create_app
+    return create_app()
+
+
+def preparar_historial(n, stack):
+    """n notas repartidas en matrículas de NOTAS_POR_MATRICULA notas"""
+    from app.routes.alumno import _armar_historial
+
+    matriculas = max(1, n // NOTAS_POR_MATRICULA)
+    filas = [{
+        'alumno_id': 1, 'alumno_codigo': 'A20240001', 'nombre': 'Juan', 'apellido': 'Pérez',
+        'dni': '12345678', 'matricula_id': m, 'curso_id': m % 60 + 1,
+        'codigo_curso': f'CUR{m % 60 + 1:03d}', 'curso_nombre': f'Curso {m % 60 + 1}',
+        'creditos': 3 + m % 3, 'semestre': f'{2024 - m // 12}-{m % 2 + 1}', 'anio': 2024 - m // 12,
+        'fecha_matricula': datetime(2024, 3, 1, 9, 0)
+    } for m in range(1, matriculas + 1)]
+    notas = [{
+        'matricula_id': i // NOTAS_POR_MATRICULA + 1,
+        'tipo_evaluacion': f'Evaluación {i % NOTAS_POR_MATRICULA + 1}',
+        'nota': Decimal(f'{(i * 7) % 2001 / 100:.2f}'),
+        'peso': Decimal('0.25'),
+        'fecha_evaluacion': date(2024, 3, 1) + timedelta(days=i % 120)
+    } for i in range(n)]
+
+    app = _app()
+    stack.enter_context(app.test_request_context('/api/historial/1'))
+    stack.enter_context(mock.patch('app.models.alumno.get_db_connection',
+                                   lambda **kwargs: ConexionFija([filas, notas])))
+    return lambda: _armar_historial(1)
+
+
+def preparar_simular(n, stack):
+    """n notas con pesos iguales (suman 1)"""
+    from app.routes.calculo import simular_promedio
+
+    payload = {
+        'notas': [{'tipo': f'Evaluación {i + 1}', 'nota': (i * 7) % 2001 / 100, 'peso': 1 / n}
+                  for i in range(n)],
+        'sistema': '20',
+        'nota_minima_aprobacion': 10.5
+    }
+    app = _app()
+    stack.enter_context(app.test_request_context('/api/simular-promedio', method='POST', json=payload))
+    vista = simular_promedio.__wrapped__  # sin token_required
+
+    def operacion():
+        response, estado = vista()
+        if estado != 200:
+            raise RuntimeError(response.get_json()['error'])
+        return response
+
+    return operacion
+
+
+def preparar_estadisticas(n, stack):
+    """n cursos como los devuelve Curso.obtener_con_matriculas"""
+    from app.routes.curso import _calcular_estadisticas_cursos
+
+    cursos = [{
+        'id': i, 'codigo_curso': f'CUR{i:05d}', 'nombre': f'Curso {i}', 'creditos': 2 + i % 4,
+        'descripcion': f'Descripción del curso {i}', 'total_alumnos': 20 + i % 400,
+        'total_evaluaciones': (20 + i % 400) * 4,
+        'promedio_general': Decimal(f'{11 + i % 9}.{i % 10000:04d}')
+    } for i in range(1, n + 1)]
+    stack.enter_context(mock.patch('app.models.curso.Curso.obtener_con_matriculas', lambda: cursos))
+    return _calcular_estadisticas_cursos
+
+
+def preparar_jwt_generar(n, stack):
+    from app.utils.auth import generate_token
+    return lambda: generate_token(1, 'admin')
+
+
+def preparar_jwt_decodificar(n, stack):
+    import jwt
+    from app.utils.auth import JWT_SECRET, generate_token
+
+    token = generate_token(1, 'admin')
+    return lambda: jwt.decode(token, JWT_SECRET, algorithms=['HS256'])
+
+
+# nombre: (preparar(n, stack) -> operación sin argumentos, tamaños por defecto)
+BENCHMARKS = {
+    'historial': (preparar_historial, TAMANOS),
+    'simular': (preparar_simular, TAMANOS),
+    'estadisticas': (preparar_estadisticas, TAMANOS),
+    'jwt_generar': (preparar_jwt_generar, (1,)),
+    'jwt_decodificar': (preparar_jwt_decodificar, (1,))
+}
+
+
+def medir_tiempo(operacion, repeticiones, tiempo_minimo):
+    """
+    ns por operación: calibra las vueltas para que cada repetición dure al
+    menos tiempo_minimo y toma la mejor repetición (la menos afectada por
+    el ruido del sistema)
+    """
+    vueltas = 1
+    while True:
+        inicio = time.perf_counter_ns()
+        for _ in range(vueltas):
+            operacion()
+        transcurrido = time.perf_counter_ns() - inicio
+        if transcurrido >= tiempo_minimo * 1e9:
+            break
+        vueltas *= 10 if transcurrido < tiempo_minimo * 1e8 else 2
+
+    mejores = [transcurrido]
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeticiones - 1):
+            inicio = time.perf_counter_ns()
+            for _ in range(vueltas):
+                operacion()
+            mejores.append(time.perf_counter_ns() - inicio)
+    finally:
+        if gc_activo:
+            gc.enable()
+    return min(mejores) / vueltas, vueltas
+
+
+def medir_memoria(operacion):
+    """Pico de memoria asignada por una operación y bloques que quedan vivos mientras existe su resultado"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        bloques_antes = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+        resultado = operacion()
+        _, pico = tracemalloc.get_traced_memory()
+        bloques = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename')) - bloques_antes
+        del resultado
+    finally:
+        tracemalloc.stop()
+    return pico - base, bloques
+
+
+def ejecutar(nombre, n, repeticiones, tiempo_minimo):
+    preparar, _ = BENCHMARKS[nombre]
+    with contextlib.ExitStack() as stack:
+        operacion = preparar(n, stack)
+        operacion()  # calentamiento (imports, cachés de Flask)
+        ns_op, vueltas = medir_tiempo(operacion, repeticiones, tiempo_minimo)
+        pico_bytes, bloques = medir_memoria(operacion)
+    return {
+        'ns_op': round(ns_op, 1),
+        'ns_elemento': round(ns_op / n, 1),
+        'pico_bytes': pico_bytes,
+        'bloques': bloques,
+        'vueltas': vueltas
+    }
+
+
+def lentos(base, actual, umbral):
+    """(nombre, n) de las mediciones cuyo ns/op supera la línea base en más de umbral"""
+    return [
+        (nombre, n)
+        for nombre, por_tamano in actual['resultados'].items()
+        for n, m_actual in por_tamano.items()
+        if n in base['resultados'].get(nombre, {})
+        and m_actual['ns_op'] > base['resultados'][nombre][n]['ns_op'] * (1 + umbral)
+    ]
+
+
+def comparar(base, actual, umbral, umbral_memoria):
+    """Regresiones de tiempo (ns/op) y de pico de memoria respecto de la línea base"""
+    regresiones = []
+    for nombre, por_tamano in actual['resultados'].items():
+        for n, m_actual in por_tamano.items():
+            m_base = base['resultados'].get(nombre, {}).get(n)
+            if m_base is None:
+                continue
+            if m_actual['ns_op'] > m_base['ns_op'] * (1 + umbral):
+                regresiones.append(f"{nombre} n={n} ns/op: {m_base['ns_op']:,.0f} → {m_actual['ns_op']:,.0f}")
+            # Menos de 4 KiB de diferencia es ruido del alocador
+            if (m_actual['pico_bytes'] > m_base['pico_bytes'] * (1 + umbral_memoria)
+                    and m_actual['pico_bytes'] - m_base['pico_bytes'] > 4096):
+                regresiones.append(f"{nombre} n={n} pico_bytes: {m_base['pico_bytes']:,} → {m_actual['pico_bytes']:,}")
+    return regresiones
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Micro-benchmarks de las rutas críticas sin I/O')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    run = subparsers.add_parser('run', help='Ejecuta los micro-benchmarks')
+    run.add_argument('--benchmarks', default='all', help=f"Lista separada por comas o 'all' ({', '.join(BENCHMARKS)})")
+    run.add_argument('--tamanos', help='Tamaños separados por comas (por defecto 10,100,1000,10000,100000)')
+    run.add_argument('--repeticiones', type=int, default=5)
+    run.add_argument('--tiempo-minimo', type=float, default=0.2, help='Segundos mínimos por repetición')
+    run.add_argument('--salida', help='Archivo JSON de resultados')
+    run.add_argument('--guardar-baseline', action='store_true', help=f'Guarda los resultados como línea base ({BASELINE})')
+    run.add_argument('--comparar', nargs='?', const=BASELINE, metavar='BASE',
+                     help='Compara contra la línea base (o el JSON indicado) y falla si hay regresiones')
+    run.add_argument('--umbral', type=float, default=0.25, help='Aumento relativo tolerado en ns/op')
+    run.add_argument('--umbral-memoria', type=float, default=0.10, help='Aumento relativo tolerado en pico de memoria')
+    run.add_argument('--reintentos', type=int, default=2,
+                     help='Veces que se vuelve a medir una regresión de tiempo antes de darla por buena')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    nombres = list(BENCHMARKS) if args.benchmarks == 'all' else [n.strip() for n in args.benchmarks.split(',')]
+    desconocidos = [n for n in nombres if n not in BENCHMARKS]
+    if desconocidos:
+        raise SystemExit(f"❌ Benchmarks desconocidos: {', '.join(desconocidos)} (disponibles: {', '.join(BENCHMARKS)})")
+    tamanos = [int(t) for t in args.tamanos.split(',')] if args.tamanos else None
+
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'resultados': {}
+    }
+    for nombre in nombres:
+        _, por_defecto = BENCHMARKS[nombre]
+        reporte['resultados'][nombre] = {}
+        for n in (tamanos if tamanos and len(por_defecto) > 1 else por_defecto):
+            m = ejecutar(nombre, n, args.repeticiones, args.tiempo_minimo)
+            reporte['resultados'][nombre][str(n)] = m
+            print(f"{nombre:<16} n={n:<7} {m['ns_op']:>15,.0f} ns/op  {m['ns_elemento']:>10,.0f} ns/elem  "
+                  f"pico={m['pico_bytes']:>12,} B  bloques={m['bloques']:,}", flush=True)
+
+    destinos = [args.salida] if args.salida else []
+    if args.guardar_baseline:
+        destinos.append(BASELINE)
+    for destino in destinos:
+        if os.path.dirname(destino):
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"✅ Resultados en {destino}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            base = json.load(f)
+        # Una medición lenta puede ser ruido del sistema (otro proceso en la
+        # misma CPU): se vuelve a medir y se queda el mejor ns/op. La memoria
+        # no tiene ese ruido y no se repite
+        for _ in range(args.reintentos):
+            sospechosos = lentos(base, reporte, args.umbral)
+            if not sospechosos:
+                break
+            for nombre, n in sospechosos:
+                m = ejecutar(nombre, int(n), args.repeticiones, args.tiempo_minimo)
+                anterior = reporte['resultados'][nombre][n]
+                if m['ns_op'] < anterior['ns_op']:
+                    anterior.update(ns_op=m['ns_op'], ns_elemento=m['ns_elemento'], vueltas=m['vueltas'])
+                print(f"↻ {nombre} n={n}: {m['ns_op']:,.0f} ns/op al volver a medir", flush=True)
+        regresiones = comparar(base, reporte, args.umbral, args.umbral_memoria)
+        if regresiones:
+            print(f"❌ {len(regresiones)} regresiones respecto de {args.comparar}:")
+            for regresion in regresiones:
+                print(f"   {regresion}")
+            return 1
+        print(f"✅ Sin regresiones respecto de {args.comparar}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
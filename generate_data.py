@@ -0,0 +1,406 @@
+"""
+Generador de datos sintéticos para pruebas de rendimiento.
+
+Crea N alumnos, M cursos, matrículas en varios semestres y K notas por
+matrícula, de forma determinista a partir de una semilla. Carga con INSERT
+multi-fila (executemany) o LOAD DATA LOCAL INFILE y escribe los CSV para el
+CSV Data Set Config de JMeter.
+
+Ejemplos:
+    python generate_data.py --alumnos 100000 --truncar
+    python generate_data.py --alumnos 1000000 --notas 5 --metodo load-data --truncar
+    python generate_data.py --alumnos 5000 --solo-csv
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import unicodedata
+
+import pymysql
+from dotenv import load_dotenv
+
+load_dotenv()
+
+NOMBRES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Carmen', 'Pedro', 'Laura', 'Miguel', 'Isabel',
+    'José', 'Rosa', 'Jorge', 'Lucía', 'Diego', 'Sofía', 'Andrés', 'Valeria', 'Fernando', 'Camila',
+    'Ricardo', 'Daniela', 'Raúl', 'Gabriela', 'Óscar', 'Paula', 'Héctor', 'Natalia', 'Iván', 'Mónica'
+]
+APELLIDOS = [
+    'García', 'Rodríguez', 'Martínez', 'López', 'González', 'Pérez', 'Sánchez', 'Ramírez', 'Torres', 'Flores',
+    'Rivera', 'Gómez', 'Díaz', 'Reyes', 'Cruz', 'Morales', 'Ortiz', 'Gutiérrez', 'Chávez', 'Ramos',
+    'Vargas', 'Castillo', 'Jiménez', 'Mendoza', 'Quispe', 'Huamán', 'Rojas', 'Salazar', 'Córdova', 'Núñez'
+]
+TIPOS_EVALUACION = ['Práctica', 'Parcial', 'Laboratorio', 'Trabajo', 'Final']
+AREAS_CURSO = ['Matemática', 'Física', 'Programación', 'Base de Datos', 'Redes', 'Estadística',
+               'Sistemas', 'Química', 'Economía', 'Comunicación']
+NIVELES_CURSO = ['I', 'II', 'III', 'Avanzada', 'Aplicada']
+
+COLUMNAS = {
+    'alumnos': ('id', 'codigo', 'dni', 'nombre', 'apellido', 'email', 'telefono', 'fecha_ingreso'),
+    'matriculas': ('id', 'alumno_id', 'curso_id', 'semestre', 'anio', 'fecha_matricula'),
+    'notas': ('matricula_id', 'tipo_evaluacion', 'nota', 'peso', 'fecha_evaluacion')
+}
+# Orden de carga: las notas dependen de las matrículas y estas de los alumnos
+ORDEN_TABLAS = ('alumnos', 'matriculas', 'notas')
+
+
+def conectar(local_infile=False):
+    """Conexión directa (sin pool) para la carga masiva"""
+    return pymysql.connect(
+        host=os.getenv('DB_HOST', 'localhost'),
+        user=os.getenv('DB_USER', 'root'),
+        password=os.getenv('DB_PASSWORD', 'root'),
+        database=os.getenv('DB_NAME', 'sistema_alumnos'),
+        port=int(os.getenv('DB_PORT', 3306)),
+        charset='utf8mb4',
+        local_infile=local_infile,
+        autocommit=False
+    )
+
+
+def sin_tildes(texto):
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+class Generador:
+    """
+    Genera filas deterministas: la misma semilla y los mismos parámetros
+    producen exactamente los mismos datos.
+
+    Distribuciones:
+        - habilidad del alumno ~ Normal(13, 2.5) y dificultad del curso ~ Normal(0, 1.5)
+        - nota = habilidad - dificultad + Normal(0, 2), acotada a [0, 20]
+        - cursos por semestre ~ Normal(cursos_por_semestre, 1), al menos 1
+        - créditos del curso entre 2 y 5 (más frecuentes 3 y 4)
+        - año de ingreso uniforme dentro de los años cubiertos
+    """
+
+    def __init__(self, seed, anio_final, semestres, cursos_por_semestre, notas_por_matricula):
+        self.rng = random.Random(seed)
+        self.anio_final = anio_final
+        self.semestres = semestres
+        self.cursos_por_semestre = cursos_por_semestre
+        self.notas_por_matricula = notas_por_matricula
+
+    def cursos(self, cantidad, desde=1):
+        """Filas (codigo_curso, nombre, creditos, descripcion) de cursos nuevos"""
+        filas = []
+        for i in range(desde, desde + cantidad):
+            area = AREAS_CURSO[(i - 1) % len(AREAS_CURSO)]
+            nivel = NIVELES_CURSO[((i - 1) // len(AREAS_CURSO)) % len(NIVELES_CURSO)]
+            creditos = self.rng.choices((2, 3, 4, 5), weights=(1, 4, 4, 1))[0]
+            filas.append((f'GEN{i:04d}', f'{area} {nivel} ({i})', creditos, f'Curso generado {i}'))
+        return filas
+
+    def dificultades(self, curso_ids):
+        return {curso_id: self.rng.gauss(0, 1.5) for curso_id in curso_ids}
+
+    def alumno(self, alumno_id, prefijo='G'):
+        """Fila de alumnos; el DNI es una permutación de alumno_id (único y de 8 dígitos)"""
+        nombre = self.rng.choice(NOMBRES)
+        apellido = self.rng.choice(APELLIDOS)
+        anio_ingreso = self.anio_final - self.rng.randrange(max(1, (self.semestres + 1) // 2))
+        return (
+            alumno_id,
+            f'{prefijo}{alumno_id:08d}',
+            f'{(alumno_id * 7919) % 90000000 + 10000000:08d}',
+            nombre,
+            apellido,
+            f'{sin_tildes(nombre).lower()}.{sin_tildes(apellido).lower()}{alumno_id}@email.com',
+            f'9{self.rng.randrange(100000000):08d}',
+            f'{anio_ingreso}-{self.rng.choice((3, 8)):02d}-{self.rng.randint(1, 28):02d}'
+        )
+
+    def pesos(self):
+        """
+        K pesos con dos decimales que suman 1
+
+        Se reparten 100 centésimos por mayor resto: cada peso recibe la parte
+        entera de su proporción y los centésimos que faltan van a los de
+        mayor fracción, así ninguno queda negativo (CHECK peso >= 0) aunque K
+        sea grande.
+        """
+        k = self.notas_por_matricula
+        crudos = [self.rng.uniform(1, 3) for _ in range(k)]
+        total = sum(crudos)
+        proporciones = [p / total * 100 for p in crudos]
+        centesimos = [int(p) for p in proporciones]
+        faltan = 100 - sum(centesimos)
+        por_resto = sorted(range(k), key=lambda i: proporciones[i] - centesimos[i], reverse=True)
+        for i in por_resto[:faltan]:
+            centesimos[i] += 1
+        assert min(centesimos) >= 0 and sum(centesimos) == 100
+        return [c / 100 for c in centesimos]
+
+    def historial(self, alumno, curso_ids, dificultades, siguiente_matricula):
+        """
+        Matrículas y notas de un alumno desde su año de ingreso
+
+        Returns:
+            Tupla (matriculas, notas, siguiente_matricula)
+        """
+        alumno_id = alumno[0]
+        anio_ingreso = int(alumno[7][:4])
+        habilidad = self.rng.gauss(13, 2.5)
+        matriculas = []
+        notas = []
+
+        periodos = [(anio, numero) for anio in range(anio_ingreso, self.anio_final + 1) for numero in (1, 2)]
+        # Quien ingresa en agosto empieza en el segundo semestre de ese año
+        inicio = 1 if alumno[7][5:7] == '08' else 0
+        for anio, numero in periodos[inicio:inicio + self.semestres]:
+            cantidad = max(1, min(len(curso_ids), round(self.rng.gauss(self.cursos_por_semestre, 1))))
+            mes = 3 if numero == 1 else 8
+            for curso_id in self.rng.sample(curso_ids, cantidad):
+                matricula_id = siguiente_matricula
+                siguiente_matricula += 1
+                matriculas.append((matricula_id, alumno_id, curso_id, f'{anio}-{numero}', anio,
+                                   f'{anio}-{mes:02d}-01 09:00:00'))
+                for j, peso in enumerate(self.pesos()):
+                    nota = habilidad - dificultades[curso_id] + self.rng.gauss(0, 2)
+                    notas.append((
+                        matricula_id,
+                        f'{TIPOS_EVALUACION[j % len(TIPOS_EVALUACION)]} {j // len(TIPOS_EVALUACION) + 1}',
+                        f'{min(20.0, max(0.0, nota)):.2f}',
+                        f'{peso:.2f}',
+                        f'{anio}-{mes + min(j, 3):02d}-{self.rng.randint(1, 28):02d}'
+                    ))
+        return matriculas, notas, siguiente_matricula
+
+
+class CargaInsert:
+    """Acumula filas por tabla y las inserta con executemany (PyMySQL arma INSERT multi-fila)"""
+
+    def __init__(self, connection, chunk_size):
+        self.connection = connection
+        self.cursor = connection.cursor()
+        self.chunk_size = chunk_size
+        self.buffers = {tabla: [] for tabla in ORDEN_TABLAS}
+        self.totales = {tabla: 0 for tabla in ORDEN_TABLAS}
+
+    def agregar(self, tabla, filas):
+        self.buffers[tabla].extend(filas)
+        if len(self.buffers[tabla]) >= self.chunk_size:
+            self.vaciar(hasta=tabla)
+
+    def vaciar(self, hasta='notas'):
+        # Se vacían también las tablas de las que depende la indicada
+        for tabla in ORDEN_TABLAS[:ORDEN_TABLAS.index(hasta) + 1]:
+            filas = self.buffers[tabla]
+            if not filas:
+                continue
+            columnas = COLUMNAS[tabla]
+            query = (f"INSERT INTO {tabla} ({', '.join(columnas)}) "
+                     f"VALUES ({', '.join(['%s'] * len(columnas))})")
+            for inicio in range(0, len(filas), self.chunk_size):
+                self.cursor.executemany(query, filas[inicio:inicio + self.chunk_size])
+            self.totales[tabla] += len(filas)
+            self.buffers[tabla] = []
+        self.connection.commit()
+
+    def terminar(self):
+        self.vaciar()
+
+
+class CargaLoadData:
+    """Escribe archivos TSV temporales y los carga con LOAD DATA LOCAL INFILE al final"""
+
+    def __init__(self, connection, directorio):
+        self.connection = connection
+        self.directorio = directorio
+        self.archivos = {}
+        self.writers = {}
+        self.totales = {tabla: 0 for tabla in ORDEN_TABLAS}
+        for tabla in ORDEN_TABLAS:
+            ruta = os.path.join(directorio, f'{tabla}.tsv')
+            self.archivos[tabla] = open(ruta, 'w', encoding='utf-8', newline='')
+            self.writers[tabla] = csv.writer(self.archivos[tabla], delimiter='\t', lineterminator='\n',
+                                             quoting=csv.QUOTE_NONE, escapechar='\\')
+
+    def agregar(self, tabla, filas):
+        self.writers[tabla].writerows(filas)
+        self.totales[tabla] += len(filas)
+
+    def terminar(self):
+        with self.connection.cursor() as cursor:
+            for tabla in ORDEN_TABLAS:
+                self.archivos[tabla].close()
+                inicio = time.perf_counter()
+                cursor.execute(
+                    f"""
+                    LOAD DATA LOCAL INFILE %s INTO TABLE {tabla}
+                    CHARACTER SET utf8mb4
+                    FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\'
+                    LINES TERMINATED BY '\\n'
+                    ({', '.join(COLUMNAS[tabla])})
+                    """,
+                    (self.archivos[tabla].name,)
+                )
+                self.connection.commit()
+                print(f"   {tabla}: {self.totales[tabla]:,} filas en {time.perf_counter() - inicio:.1f} s")
+
+
+def escribir_csv_jmeter(generador, directorio, alumno_ids, curso_ids, registro, muestra_ids, id_registro):
+    """
+    CSV para el CSV Data Set Config de JMeter:
+        alumnos_registro.csv: alumnos nuevos (no cargados) para POST /api/alumno/registrar
+        alumnos_ids.csv: IDs existentes para /api/alumno/<id> y /api/historial/<id>
+        cursos_ids.csv: IDs de cursos para /api/curso/<id>
+    """
+    os.makedirs(directorio, exist_ok=True)
+    with open(os.path.join(directorio, 'alumnos_registro.csv'), 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['codigo', 'dni', 'nombre', 'apellido', 'email', 'telefono', 'fecha_ingreso'])
+        for alumno_id in range(id_registro, id_registro + registro):
+            writer.writerow(generador.alumno(alumno_id, prefijo='R')[1:])
+
+    muestra = alumno_ids if len(alumno_ids) <= muestra_ids else generador.rng.sample(alumno_ids, muestra_ids)
+    with open(os.path.join(directorio, 'alumnos_ids.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['alumno_id'])
+        writer.writerows([alumno_id] for alumno_id in muestra)
+
+    with open(os.path.join(directorio, 'cursos_ids.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['curso_id'])
+        writer.writerows([curso_id] for curso_id in curso_ids)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Genera datos sintéticos para pruebas de rendimiento')
+    parser.add_argument('--alumnos', type=int, default=10000, help='Cantidad de alumnos (N)')
+    parser.add_argument('--cursos', type=int, default=50, help='Cantidad total de cursos (M)')
+    parser.add_argument('--semestres', type=int, default=6, help='Semestres máximos por alumno')
+    parser.add_argument('--cursos-por-semestre', type=float, default=5, help='Promedio de cursos por semestre')
+    parser.add_argument('--notas', type=int, default=4, help='Notas por matrícula (K)')
+    parser.add_argument('--anio-final', type=int, default=2024, help='Último año académico')
+    parser.add_argument('--seed', type=int, default=42, help='Semilla (mismos datos para la misma semilla)')
+    parser.add_argument('--metodo', choices=('insert', 'load-data'), default='insert',
+                        help='insert: INSERT multi-fila; load-data: LOAD DATA LOCAL INFILE')
+    parser.add_argument('--chunk', type=int, default=5000, help='Filas por INSERT multi-fila')
+    parser.add_argument('--truncar', action='store_true',
+                        help='Borrar alumnos, matrículas y notas existentes antes de cargar')
+    parser.add_argument('--solo-csv', action='store_true', help='Solo escribir los CSV de JMeter')
+    parser.add_argument('--csv-dir', default=os.path.join('data', 'generado'))
+    parser.add_argument('--csv-registro', type=int, default=1000, help='Alumnos nuevos en alumnos_registro.csv')
+    parser.add_argument('--csv-ids', type=int, default=10000, help='Máximo de IDs en alumnos_ids.csv')
+    return parser.parse_args()
+
+
+def preparar_tablas(cursor, truncar):
+    """Vacía las tablas de datos (con --truncar) o verifica que alumnos esté vacía"""
+    if truncar:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for tabla in ('notas', 'matriculas', 'curso_alumnos', 'alumno_resumen_semestre', 'alumno_resumen', 'alumnos'):
+            cursor.execute(f"TRUNCATE TABLE {tabla}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        return
+
+    cursor.execute("SELECT COUNT(*) FROM alumnos")
+    if cursor.fetchone()[0] > 0:
+        raise SystemExit("❌ La tabla alumnos no está vacía: use --truncar para reemplazar los datos")
+
+
+def asegurar_cursos(cursor, generador, cantidad):
+    """Completa hasta `cantidad` cursos y devuelve {id: creditos} de los primeros `cantidad`"""
+    cursor.execute("SELECT COUNT(*) FROM cursos")
+    existentes = cursor.fetchone()[0]
+    if existentes < cantidad:
+        cursor.executemany(
+            "INSERT IGNORE INTO cursos (codigo_curso, nombre, creditos, descripcion) VALUES (%s, %s, %s, %s)",
+            generador.cursos(cantidad - existentes)
+        )
+    cursor.execute("SELECT id FROM cursos ORDER BY id LIMIT %s", (cantidad,))
+    return [fila[0] for fila in cursor.fetchall()]
+
+
+def generar():
+    args = parse_args()
+    generador = Generador(args.seed, args.anio_final, args.semestres,
+                          args.cursos_por_semestre, args.notas)
+    inicio = time.perf_counter()
+
+    if args.solo_csv:
+        alumno_ids = list(range(1, args.alumnos + 1))
+        curso_ids = list(range(1, args.cursos + 1))
+        escribir_csv_jmeter(generador, args.csv_dir, alumno_ids, curso_ids,
+                            args.csv_registro, args.csv_ids, args.alumnos + 1)
+        print(f"✅ CSV escritos en {args.csv_dir}")
+        return
+
+    connection = conectar(local_infile=args.metodo == 'load-data')
+    directorio_tmp = tempfile.TemporaryDirectory() if args.metodo == 'load-data' else None
+    try:
+        with connection.cursor() as cursor:
+            preparar_tablas(cursor, args.truncar)
+            curso_ids = asegurar_cursos(cursor, generador, args.cursos)
+            connection.commit()
+
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM alumnos")
+            primer_alumno = cursor.fetchone()[0] + 1
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM matriculas")
+            siguiente_matricula = cursor.fetchone()[0] + 1
+
+            # Carga masiva: @omitir_resumen_alumnos desactiva los triggers por fila
+            # de curso_estadisticas, curso_alumnos y alumno_resumen, y se omiten
+            # los chequeos de claves; las tablas resumen se reconstruyen al final
+            cursor.execute("SET @omitir_resumen_alumnos = 1")
+            cursor.execute("SET unique_checks = 0")
+            cursor.execute("SET foreign_key_checks = 0")
+
+        if directorio_tmp is not None:
+            carga = CargaLoadData(connection, directorio_tmp.name)
+        else:
+            carga = CargaInsert(connection, args.chunk)
+
+        dificultades = generador.dificultades(curso_ids)
+        print(f"🔢 Generando {args.alumnos:,} alumnos (semilla {args.seed}, método {args.metodo})...")
+        for alumno_id in range(primer_alumno, primer_alumno + args.alumnos):
+            alumno = generador.alumno(alumno_id)
+            matriculas, notas, siguiente_matricula = generador.historial(
+                alumno, curso_ids, dificultades, siguiente_matricula
+            )
+            carga.agregar('alumnos', [alumno])
+            carga.agregar('matriculas', matriculas)
+            carga.agregar('notas', notas)
+            if (alumno_id - primer_alumno + 1) % 100000 == 0:
+                print(f"   {alumno_id - primer_alumno + 1:,} alumnos ({time.perf_counter() - inicio:.0f} s)")
+        carga.terminar()
+
+        with connection.cursor() as cursor:
+            cursor.execute("SET foreign_key_checks = 1")
+            cursor.execute("SET unique_checks = 1")
+            cursor.execute("SET @omitir_resumen_alumnos = NULL")
+
+            print("🔁 Reconstruyendo tablas resumen...")
+            from app.models.alumno import Alumno
+            from app.models.curso import Curso
+            Curso.reconstruir_estadisticas(cursor)
+            Alumno.reconstruir_resumenes(cursor)
+            connection.commit()
+
+        totales = carga.totales
+        duracion = time.perf_counter() - inicio
+        print(f"✅ {totales['alumnos']:,} alumnos, {totales['matriculas']:,} matrículas y "
+              f"{totales['notas']:,} notas en {duracion:.1f} s "
+              f"({totales['notas'] / duracion:,.0f} notas/s)")
+
+        alumno_ids = list(range(primer_alumno, primer_alumno + args.alumnos))
+        escribir_csv_jmeter(generador, args.csv_dir, alumno_ids, curso_ids,
+                            args.csv_registro, args.csv_ids, primer_alumno + args.alumnos)
+        print(f"✅ CSV para JMeter escritos en {args.csv_dir}")
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.close()
+        if directorio_tmp is not None:
+            directorio_tmp.cleanup()
+
+
+if __name__ == '__main__':
+    generar()
@@ -1,9 +1,364 @@
 import pymysql
 import os
 from dotenv import load_dotenv
+from app.models.alumno import Alumno
+from app.models.curso import Curso
 
 load_dotenv()
 
+def crear_indice_si_no_existe(cursor, tabla, indice, columnas, unico=False):
+    """Crea un índice en una tabla existente solo si aún no existe"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (tabla, indice))
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"CREATE {'UNIQUE ' if unico else ''}INDEX {indice} ON {tabla} ({columnas})")
+
+def crear_columna_si_no_existe(cursor, tabla, columna, definicion):
+    """Agrega una columna a una tabla existente solo si aún no existe"""
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (tabla, columna))
+    if cursor.fetchone()[0] == 0:
+        cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+# Versión de cada fila para los ETag / Last-Modified de la API (microsegundos
+# para distinguir dos cambios dentro del mismo segundo)
+COLUMNA_UPDATED_AT = 'TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)'
+
+# Triggers que mantienen curso_estadisticas dentro de la misma transacción
+# que escribe en matriculas / notas. Los borrados en cascada no disparan
+# triggers en MySQL, por eso los BEFORE DELETE de matriculas y alumnos
+# descuentan también las notas y matrículas que se borrarán en cascada.
+#
+# Si un alumno es nuevo en el curso se decide con el contador de
+# curso_alumnos y no con un COUNT(*) sobre matriculas: el upsert bloquea la
+# fila (curso, alumno), así que dos matrículas concurrentes del mismo alumno
+# en el curso se serializan y solo una de ellas lo cuenta en total_alumnos.
+# Las notas de la matrícula se suman con lectura bloqueante por la misma razón.
+# Las sumas usan los upserts de Curso (SUMAR_CURSO_ALUMNOS, SUMAR_ESTADISTICAS),
+# los mismos que aplican los registros por lote.
+#
+# Con SET @omitir_resumen_alumnos = 1 se saltan, igual que los de
+# alumno_resumen: la sesión mantiene las tablas resumen por su cuenta (carga
+# masiva seguida de reconstruir_estadisticas, o deltas por bloque).
+TRIGGERS_ESTADISTICAS = {
+    'trg_matriculas_ai': f"""
+        CREATE TRIGGER trg_matriculas_ai AFTER INSERT ON matriculas FOR EACH ROW
+        BEGIN
+            DECLARE v_matriculas INT DEFAULT 0;
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                {Curso.sql_sumar_curso_alumnos('NEW.curso_id', 'NEW.alumno_id', '1')};
+                SELECT matriculas INTO v_matriculas FROM curso_alumnos
+                WHERE curso_id = NEW.curso_id AND alumno_id = NEW.alumno_id FOR UPDATE;
+
+                IF v_matriculas = 1 THEN
+                    {Curso.sql_sumar_estadisticas('NEW.curso_id', '1', '0', '0')};
+                END IF;
+            END IF;
+        END
+    """,
+    'trg_matriculas_au': f"""
+        CREATE TRIGGER trg_matriculas_au AFTER UPDATE ON matriculas FOR EACH ROW
+        BEGIN
+            DECLARE v_evals INT DEFAULT 0;
+            DECLARE v_suma DECIMAL(14,2) DEFAULT 0;
+            DECLARE v_quedan INT DEFAULT 1;
+            DECLARE v_matriculas INT DEFAULT 0;
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                IF OLD.curso_id <> NEW.curso_id OR OLD.alumno_id <> NEW.alumno_id THEN
+                    SELECT COUNT(*), COALESCE(SUM(nota), 0) INTO v_evals, v_suma
+                    FROM notas WHERE matricula_id = NEW.id LOCK IN SHARE MODE;
+
+                    UPDATE curso_alumnos SET matriculas = matriculas - 1
+                    WHERE curso_id = OLD.curso_id AND alumno_id = OLD.alumno_id;
+                    SELECT matriculas INTO v_quedan FROM curso_alumnos
+                    WHERE curso_id = OLD.curso_id AND alumno_id = OLD.alumno_id FOR UPDATE;
+                    IF v_quedan <= 0 THEN
+                        DELETE FROM curso_alumnos WHERE curso_id = OLD.curso_id AND alumno_id = OLD.alumno_id;
+                    END IF;
+
+                    UPDATE curso_estadisticas
+                    SET total_evaluaciones = total_evaluaciones - v_evals,
+                        suma_notas = suma_notas - v_suma,
+                        total_alumnos = total_alumnos - IF(v_quedan <= 0, 1, 0)
+                    WHERE curso_id = OLD.curso_id;
+
+                    {Curso.sql_sumar_curso_alumnos('NEW.curso_id', 'NEW.alumno_id', '1')};
+                    SELECT matriculas INTO v_matriculas FROM curso_alumnos
+                    WHERE curso_id = NEW.curso_id AND alumno_id = NEW.alumno_id FOR UPDATE;
+
+                    {Curso.sql_sumar_estadisticas('NEW.curso_id', 'IF(v_matriculas = 1, 1, 0)', 'v_evals', 'v_suma')};
+                END IF;
+            END IF;
+        END
+    """,
+    'trg_matriculas_bd': """
+        CREATE TRIGGER trg_matriculas_bd BEFORE DELETE ON matriculas FOR EACH ROW
+        BEGIN
+            DECLARE v_evals INT DEFAULT 0;
+            DECLARE v_suma DECIMAL(14,2) DEFAULT 0;
+            DECLARE v_quedan INT DEFAULT 1;
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                SELECT COUNT(*), COALESCE(SUM(nota), 0) INTO v_evals, v_suma
+                FROM notas WHERE matricula_id = OLD.id LOCK IN SHARE MODE;
+
+                UPDATE curso_alumnos SET matriculas = matriculas - 1
+                WHERE curso_id = OLD.curso_id AND alumno_id = OLD.alumno_id;
+                SELECT matriculas INTO v_quedan FROM curso_alumnos
+                WHERE curso_id = OLD.curso_id AND alumno_id = OLD.alumno_id FOR UPDATE;
+                IF v_quedan <= 0 THEN
+                    DELETE FROM curso_alumnos WHERE curso_id = OLD.curso_id AND alumno_id = OLD.alumno_id;
+                END IF;
+
+                UPDATE curso_estadisticas
+                SET total_evaluaciones = total_evaluaciones - v_evals,
+                    suma_notas = suma_notas - v_suma,
+                    total_alumnos = total_alumnos - IF(v_quedan <= 0, 1, 0)
+                WHERE curso_id = OLD.curso_id;
+            END IF;
+        END
+    """,
+    'trg_alumnos_bd': """
+        CREATE TRIGGER trg_alumnos_bd BEFORE DELETE ON alumnos FOR EACH ROW
+        BEGIN
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                UPDATE curso_estadisticas ce
+                INNER JOIN (
+                    SELECT m.curso_id, COUNT(n.id) AS evals, COALESCE(SUM(n.nota), 0) AS suma
+                    FROM matriculas m
+                    LEFT JOIN notas n ON m.id = n.matricula_id
+                    WHERE m.alumno_id = OLD.id
+                    GROUP BY m.curso_id
+                ) d ON ce.curso_id = d.curso_id
+                SET ce.total_alumnos = ce.total_alumnos - 1,
+                    ce.total_evaluaciones = ce.total_evaluaciones - d.evals,
+                    ce.suma_notas = ce.suma_notas - d.suma;
+            END IF;
+        END
+    """,
+    'trg_notas_ai': f"""
+        CREATE TRIGGER trg_notas_ai AFTER INSERT ON notas FOR EACH ROW
+        BEGIN
+            DECLARE v_curso INT DEFAULT NULL;
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                SELECT curso_id INTO v_curso FROM matriculas WHERE id = NEW.matricula_id;
+                IF v_curso IS NOT NULL THEN
+                    {Curso.sql_sumar_estadisticas('v_curso', '0', '1', 'NEW.nota')};
+                END IF;
+            END IF;
+        END
+    """,
+    'trg_notas_au': f"""
+        CREATE TRIGGER trg_notas_au AFTER UPDATE ON notas FOR EACH ROW
+        BEGIN
+            DECLARE v_curso INT DEFAULT NULL;
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                IF OLD.matricula_id <> NEW.matricula_id THEN
+                    UPDATE curso_estadisticas
+                    SET total_evaluaciones = total_evaluaciones - 1,
+                        suma_notas = suma_notas - OLD.nota
+                    WHERE curso_id = (SELECT curso_id FROM matriculas WHERE id = OLD.matricula_id);
+
+                    SELECT curso_id INTO v_curso FROM matriculas WHERE id = NEW.matricula_id;
+                    IF v_curso IS NOT NULL THEN
+                        {Curso.sql_sumar_estadisticas('v_curso', '0', '1', 'NEW.nota')};
+                    END IF;
+                ELSEIF OLD.nota <> NEW.nota THEN
+                    UPDATE curso_estadisticas
+                    SET suma_notas = suma_notas + NEW.nota - OLD.nota
+                    WHERE curso_id = (SELECT curso_id FROM matriculas WHERE id = NEW.matricula_id);
+                END IF;
+            END IF;
+        END
+    """,
+    'trg_notas_ad': """
+        CREATE TRIGGER trg_notas_ad AFTER DELETE ON notas FOR EACH ROW
+        BEGIN
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                UPDATE curso_estadisticas
+                SET total_evaluaciones = total_evaluaciones - 1,
+                    suma_notas = suma_notas - OLD.nota
+                WHERE curso_id = (SELECT curso_id FROM matriculas WHERE id = OLD.matricula_id);
+            END IF;
+        END
+    """
+}
+
+# Resumen académico por alumno (alumno_resumen / alumno_resumen_semestre).
+# Cada cambio resta el aporte de la matrícula afectada antes de escribir y lo
+# vuelve a sumar después, así que solo se recalcula esa matrícula (sus notas),
+# no todo el historial del alumno. El promedio de una matrícula es
+# SUM(nota * peso) / SUM(peso), igual que en /api/historial.
+# La matrícula se lee con FOR UPDATE y sus notas con LOCK IN SHARE MODE: dos
+# transacciones que cambian notas de la misma matrícula se serializan y la
+# segunda calcula su aporte con las notas ya confirmadas por la primera.
+# Con SET @omitir_resumen_alumnos = 1 se saltan (cargas masivas seguidas de
+# python rebuild_stats.py).
+PROCEDIMIENTOS_RESUMEN = {
+    'ajustar_resumen_matricula': f"""
+        CREATE PROCEDURE ajustar_resumen_matricula(IN p_matricula_id INT, IN p_signo INT)
+        BEGIN
+            DECLARE v_alumno INT DEFAULT NULL;
+            DECLARE v_curso INT DEFAULT NULL;
+            DECLARE v_creditos INT DEFAULT 0;
+            DECLARE v_semestre VARCHAR(10);
+            DECLARE v_anio INT;
+            DECLARE v_promedio DECIMAL(12,6) DEFAULT NULL;
+            DECLARE v_con_notas INT DEFAULT 0;
+            DECLARE v_aprobado INT DEFAULT 0;
+            DECLARE CONTINUE HANDLER FOR NOT FOUND BEGIN END;
+
+            IF COALESCE(@omitir_resumen_alumnos, 0) = 0 THEN
+                SELECT alumno_id, curso_id, semestre, anio
+                INTO v_alumno, v_curso, v_semestre, v_anio
+                FROM matriculas WHERE id = p_matricula_id FOR UPDATE;
+
+                IF v_alumno IS NOT NULL THEN
+                    SELECT creditos INTO v_creditos FROM cursos WHERE id = v_curso;
+                    SELECT SUM(nota * peso) / NULLIF(SUM(peso), 0) INTO v_promedio
+                    FROM notas WHERE matricula_id = p_matricula_id LOCK IN SHARE MODE;
+                    IF v_promedio IS NOT NULL THEN
+                        SET v_con_notas = 1;
+                        SET v_aprobado = IF(v_promedio >= {Alumno.NOTA_MINIMA_APROBACION}, 1, 0);
+                    END IF;
+
+                    INSERT INTO alumno_resumen (alumno_id, cursos_matriculados, creditos_matriculados,
+                                                cursos_con_notas, creditos_con_notas, suma_promedio_creditos,
+                                                cursos_aprobados, creditos_aprobados)
+                    VALUES (v_alumno, p_signo, p_signo * v_creditos,
+                            p_signo * v_con_notas, p_signo * v_con_notas * v_creditos,
+                            p_signo * COALESCE(v_promedio, 0) * v_creditos,
+                            p_signo * v_aprobado, p_signo * v_aprobado * v_creditos)
+                    ON DUPLICATE KEY UPDATE
+                        cursos_matriculados = cursos_matriculados + VALUES(cursos_matriculados),
+                        creditos_matriculados = creditos_matriculados + VALUES(creditos_matriculados),
+                        cursos_con_notas = cursos_con_notas + VALUES(cursos_con_notas),
+                        creditos_con_notas = creditos_con_notas + VALUES(creditos_con_notas),
+                        suma_promedio_creditos = suma_promedio_creditos + VALUES(suma_promedio_creditos),
+                        cursos_aprobados = cursos_aprobados + VALUES(cursos_aprobados),
+                        creditos_aprobados = creditos_aprobados + VALUES(creditos_aprobados);
+
+                    INSERT INTO alumno_resumen_semestre (alumno_id, anio, semestre, cursos, creditos)
+                    VALUES (v_alumno, v_anio, v_semestre, p_signo, p_signo * v_creditos)
+                    ON DUPLICATE KEY UPDATE
+                        cursos = cursos + VALUES(cursos),
+                        creditos = creditos + VALUES(creditos);
+                END IF;
+            END IF;
+        END
+    """,
+    'ajustar_resumen_curso': """
+        CREATE PROCEDURE ajustar_resumen_curso(IN p_curso_id INT, IN p_signo INT)
+        BEGIN
+            DECLARE v_fin INT DEFAULT 0;
+            DECLARE v_matricula INT;
+            DECLARE c_matriculas CURSOR FOR SELECT id FROM matriculas WHERE curso_id = p_curso_id;
+            DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_fin = 1;
+
+            OPEN c_matriculas;
+            recorrer: LOOP
+                FETCH c_matriculas INTO v_matricula;
+                IF v_fin = 1 THEN
+                    LEAVE recorrer;
+                END IF;
+                CALL ajustar_resumen_matricula(v_matricula, p_signo);
+            END LOOP;
+            CLOSE c_matriculas;
+        END
+    """
+}
+
+# Los borrados en cascada no disparan triggers: al borrar una matrícula o un
+# curso se resta su aporte en el BEFORE DELETE (las notas todavía existen).
+# Al borrar un alumno su resumen se borra por la FK en cascada.
+TRIGGERS_RESUMEN_ALUMNOS = {
+    'trg_resumen_matriculas_ai': """
+        CREATE TRIGGER trg_resumen_matriculas_ai AFTER INSERT ON matriculas FOR EACH ROW
+        CALL ajustar_resumen_matricula(NEW.id, 1)
+    """,
+    'trg_resumen_matriculas_bu': """
+        CREATE TRIGGER trg_resumen_matriculas_bu BEFORE UPDATE ON matriculas FOR EACH ROW
+        CALL ajustar_resumen_matricula(OLD.id, -1)
+    """,
+    'trg_resumen_matriculas_au': """
+        CREATE TRIGGER trg_resumen_matriculas_au AFTER UPDATE ON matriculas FOR EACH ROW
+        CALL ajustar_resumen_matricula(NEW.id, 1)
+    """,
+    'trg_resumen_matriculas_bd': """
+        CREATE TRIGGER trg_resumen_matriculas_bd BEFORE DELETE ON matriculas FOR EACH ROW
+        CALL ajustar_resumen_matricula(OLD.id, -1)
+    """,
+    'trg_resumen_notas_bi': """
+        CREATE TRIGGER trg_resumen_notas_bi BEFORE INSERT ON notas FOR EACH ROW
+        CALL ajustar_resumen_matricula(NEW.matricula_id, -1)
+    """,
+    'trg_resumen_notas_ai': """
+        CREATE TRIGGER trg_resumen_notas_ai AFTER INSERT ON notas FOR EACH ROW
+        CALL ajustar_resumen_matricula(NEW.matricula_id, 1)
+    """,
+    'trg_resumen_notas_bu': """
+        CREATE TRIGGER trg_resumen_notas_bu BEFORE UPDATE ON notas FOR EACH ROW
+        BEGIN
+            CALL ajustar_resumen_matricula(OLD.matricula_id, -1);
+            IF NEW.matricula_id <> OLD.matricula_id THEN
+                CALL ajustar_resumen_matricula(NEW.matricula_id, -1);
+            END IF;
+        END
+    """,
+    'trg_resumen_notas_au': """
+        CREATE TRIGGER trg_resumen_notas_au AFTER UPDATE ON notas FOR EACH ROW
+        BEGIN
+            CALL ajustar_resumen_matricula(NEW.matricula_id, 1);
+            IF NEW.matricula_id <> OLD.matricula_id THEN
+                CALL ajustar_resumen_matricula(OLD.matricula_id, 1);
+            END IF;
+        END
+    """,
+    'trg_resumen_notas_bd': """
+        CREATE TRIGGER trg_resumen_notas_bd BEFORE DELETE ON notas FOR EACH ROW
+        CALL ajustar_resumen_matricula(OLD.matricula_id, -1)
+    """,
+    'trg_resumen_notas_ad': """
+        CREATE TRIGGER trg_resumen_notas_ad AFTER DELETE ON notas FOR EACH ROW
+        CALL ajustar_resumen_matricula(OLD.matricula_id, 1)
+    """,
+    'trg_resumen_cursos_bu': """
+        CREATE TRIGGER trg_resumen_cursos_bu BEFORE UPDATE ON cursos FOR EACH ROW
+        BEGIN
+            IF NEW.creditos <> OLD.creditos THEN
+                CALL ajustar_resumen_curso(OLD.id, -1);
+            END IF;
+        END
+    """,
+    'trg_resumen_cursos_au': """
+        CREATE TRIGGER trg_resumen_cursos_au AFTER UPDATE ON cursos FOR EACH ROW
+        BEGIN
+            IF NEW.creditos <> OLD.creditos THEN
+                CALL ajustar_resumen_curso(NEW.id, 1);
+            END IF;
+        END
+    """,
+    'trg_resumen_cursos_bd': """
+        CREATE TRIGGER trg_resumen_cursos_bd BEFORE DELETE ON cursos FOR EACH ROW
+        CALL ajustar_resumen_curso(OLD.id, -1)
+    """
+}
+
+def crear_procedimientos(cursor, procedimientos):
+    """Crea (o reemplaza) los procedimientos almacenados indicados"""
+    for nombre, definicion in procedimientos.items():
+        cursor.execute(f"DROP PROCEDURE IF EXISTS {nombre}")
+        cursor.execute(definicion)
+
+def crear_triggers(cursor, triggers):
+    """Crea (o reemplaza) los triggers indicados"""
+    for nombre, definicion in triggers.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+        cursor.execute(definicion)
+
 def init_database():
     """Inicializa la base de datos y crea las tablas necesarias"""
     
@@ -34,6 +389,18 @@ def init_database():
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
             
+            # Tokens revocados con /api/logout, compartidos por todos los workers.
+            # La fila jti='*' guarda en antes_de_ms el último revoke_all_tokens
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS tokens_revocados (
+                    jti VARCHAR(64) PRIMARY KEY,
+                    expira_en BIGINT NULL,
+                    antes_de_ms BIGINT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_expira (expira_en)
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            
             # Tabla de Alumnos
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS alumnos (
@@ -46,12 +413,17 @@ def init_database():
                     telefono VARCHAR(15),
                     fecha_ingreso DATE,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
                     INDEX idx_dni (dni),
                     INDEX idx_codigo (codigo),
-                    INDEX idx_nombre_apellido (nombre, apellido)
+                    INDEX idx_nombre_apellido (nombre, apellido),
+                    INDEX idx_apellido_nombre_id (apellido, nombre, id)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
             
+            # Índice para la paginación por cursor (bases creadas antes de agregarlo)
+            crear_indice_si_no_existe(cursor, 'alumnos', 'idx_apellido_nombre_id', 'apellido, nombre, id')
+            
             # Tabla de Cursos
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS cursos (
@@ -61,6 +433,7 @@ def init_database():
                     creditos INT NOT NULL,
                     descripcion TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
                     INDEX idx_codigo_curso (codigo_curso)
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
@@ -74,6 +447,7 @@ def init_database():
                     semestre VARCHAR(10) NOT NULL,
                     anio INT NOT NULL,
                     fecha_matricula TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
                     FOREIGN KEY (alumno_id) REFERENCES alumnos(id) ON DELETE CASCADE,
                     FOREIGN KEY (curso_id) REFERENCES cursos(id) ON DELETE CASCADE,
                     UNIQUE KEY unique_matricula (alumno_id, curso_id, semestre, anio),
@@ -93,7 +467,9 @@ def init_database():
                     peso DECIMAL(3,2) DEFAULT 1.00,
                     fecha_evaluacion DATE,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
                     FOREIGN KEY (matricula_id) REFERENCES matriculas(id) ON DELETE CASCADE,
+                    UNIQUE KEY unique_nota (matricula_id, tipo_evaluacion),
                     INDEX idx_matricula (matricula_id),
                     INDEX idx_tipo_evaluacion (tipo_evaluacion),
                     CHECK (nota >= 0 AND nota <= 20),
@@ -101,6 +477,73 @@ def init_database():
                 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """)
             
+            # Columna updated_at (bases creadas antes de agregarla)
+            for tabla in ('alumnos', 'cursos', 'matriculas', 'notas'):
+                crear_columna_si_no_existe(cursor, tabla, 'updated_at', COLUMNA_UPDATED_AT)
+            
+            # Una nota por tipo de evaluación y matrícula (clave de ON DUPLICATE KEY
+            # en POST /api/notas/lote); falla si la base ya tiene repetidas
+            try:
+                crear_indice_si_no_existe(cursor, 'notas', 'unique_nota', 'matricula_id, tipo_evaluacion', unico=True)
+            except pymysql.err.IntegrityError as e:
+                print(f"⚠️  No se pudo crear unique_nota (notas repetidas por matrícula y tipo): {e}")
+            
+            # Matrículas de cada alumno en cada curso (contador para total_alumnos)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS curso_alumnos (
+                    curso_id INT NOT NULL,
+                    alumno_id INT NOT NULL,
+                    matriculas INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (curso_id, alumno_id),
+                    FOREIGN KEY (curso_id) REFERENCES cursos(id) ON DELETE CASCADE,
+                    FOREIGN KEY (alumno_id) REFERENCES alumnos(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            
+            # Tabla resumen de estadísticas por curso (mantenida por triggers)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS curso_estadisticas (
+                    curso_id INT PRIMARY KEY,
+                    total_alumnos INT NOT NULL DEFAULT 0,
+                    total_evaluaciones INT NOT NULL DEFAULT 0,
+                    suma_notas DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    FOREIGN KEY (curso_id) REFERENCES cursos(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            
+            crear_triggers(cursor, TRIGGERS_ESTADISTICAS)
+            
+            # Tablas resumen por alumno (mantenidas por triggers)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS alumno_resumen (
+                    alumno_id INT PRIMARY KEY,
+                    cursos_matriculados INT NOT NULL DEFAULT 0,
+                    creditos_matriculados INT NOT NULL DEFAULT 0,
+                    cursos_con_notas INT NOT NULL DEFAULT 0,
+                    creditos_con_notas INT NOT NULL DEFAULT 0,
+                    suma_promedio_creditos DECIMAL(18,6) NOT NULL DEFAULT 0,
+                    cursos_aprobados INT NOT NULL DEFAULT 0,
+                    creditos_aprobados INT NOT NULL DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    FOREIGN KEY (alumno_id) REFERENCES alumnos(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS alumno_resumen_semestre (
+                    alumno_id INT NOT NULL,
+                    anio INT NOT NULL,
+                    semestre VARCHAR(10) NOT NULL,
+                    cursos INT NOT NULL DEFAULT 0,
+                    creditos INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (alumno_id, anio, semestre),
+                    FOREIGN KEY (alumno_id) REFERENCES alumnos(id) ON DELETE CASCADE
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """)
+            
+            crear_procedimientos(cursor, PROCEDIMIENTOS_RESUMEN)
+            crear_triggers(cursor, TRIGGERS_RESUMEN_ALUMNOS)
+            
             connection.commit()
             print("✅ Base de datos y tablas creadas exitosamente")
             
@@ -129,6 +572,16 @@ def init_database():
             connection.commit()
             print("✅ Datos de ejemplo insertados")
             
+            # Recalcular la tabla resumen con los datos existentes
+            from app.models.curso import Curso
+            Curso.reconstruir_estadisticas(cursor)
+            connection.commit()
+            print("✅ Estadísticas de cursos reconstruidas")
+            
+            Alumno.reconstruir_resumenes(cursor)
+            connection.commit()
+            print("✅ Resúmenes académicos de alumnos reconstruidos")
+            
     except Exception as e:
         print(f"❌ Error al inicializar la base de datos: {e}")
         connection.rollback()
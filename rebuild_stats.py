@@ -0,0 +1,13 @@
+from app.models.alumno import Alumno
+from app.models.curso import Curso
+
+def rebuild_stats():
+    """Reconstruye las tablas resumen desde las tablas de datos"""
+    Curso.reconstruir_estadisticas()
+    print("✅ Estadísticas de cursos reconstruidas (curso_estadisticas)")
+    Alumno.reconstruir_resumenes()
+    print("✅ Resúmenes académicos reconstruidos (alumno_resumen, alumno_resumen_semestre)")
+
+if __name__ == '__main__':
+    print("Reconstruyendo tablas resumen...")
+    rebuild_stats()
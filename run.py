@@ -1,12 +1,36 @@
 from app import create_app
+import argparse
 import os
+import shutil
+import tempfile
+from app.utils.database import get_pool
+from app.utils.metrics import metrics
 
 app = create_app()
 
-if __name__ == '__main__':
-    port = int(os.getenv('PORT', 5000))
-    debug = os.getenv('FLASK_DEBUG', 'True') == 'True'
-    
+def parse_args():
+    parser = argparse.ArgumentParser(description='Servidor de la API Sistema de Gestión de Alumnos')
+    parser.add_argument('--dev', action='store_true',
+                        help='Servidor de desarrollo de Flask (reloader y debugger)')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 5000)))
+    parser.add_argument('--workers', type=int,
+                        default=int(os.getenv('SERVER_WORKERS', 0)) or None,
+                        help='Procesos worker (por defecto 2 x CPUs + 1, sin pasar de DB_MAX_CONNECTIONS)')
+    parser.add_argument('--threads', type=int, default=int(os.getenv('SERVER_THREADS', 4)),
+                        help='Hilos por worker')
+    parser.add_argument('--max-requests', type=int, default=int(os.getenv('SERVER_MAX_REQUESTS', 10000)),
+                        help='Reciclar cada worker tras N peticiones (0 = nunca)')
+    parser.add_argument('--max-requests-jitter', type=int,
+                        default=int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 1000)))
+    parser.add_argument('--keepalive', type=int, default=int(os.getenv('SERVER_KEEPALIVE', 5)),
+                        help='Segundos que se mantiene abierta una conexión keep-alive')
+    parser.add_argument('--timeout', type=int, default=int(os.getenv('SERVER_TIMEOUT', 60)))
+    parser.add_argument('--graceful-timeout', type=int, default=int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30)))
+    parser.add_argument('--backlog', type=int, default=int(os.getenv('SERVER_BACKLOG', 2048)))
+    return parser.parse_args()
+
+def print_banner(port, modo, concurrencia):
     print(f"""
     ╔══════════════════════════════════════════════════════════╗
     ║  🚀 API Sistema de Gestión de Alumnos                   ║
@@ -15,11 +39,14 @@ if __name__ == '__main__':
     ║  Documentación: http://localhost:{port}/                ║
     ║  Health Check: http://localhost:{port}/health           ║
     ╚══════════════════════════════════════════════════════════╝
-    
+
+    ⚙️  Modo: {modo}
+    {concurrencia}
+
     📌 Usuario de prueba:
        username: admin
        password: admin123
-    
+
     🔗 Endpoints principales:
        POST /api/login
        POST /api/alumno/registrar
@@ -27,5 +54,133 @@ if __name__ == '__main__':
        GET  /api/cursos/estadisticas
        POST /api/simular-promedio
     """)
-    
-    app.run(host='0.0.0.0', port=port, debug=debug)
+
+def conexiones_por_worker(threads):
+    """
+    Máximo de conexiones del pool de cada worker (DB_POOL_MAX_SIZE)
+
+    Sin DB_POOL_MAX_SIZE se usa un hilo más que SERVER_THREADS: cada hilo usa
+    una conexión a la vez y la extra es para el recálculo en segundo plano de
+    la caché de estadísticas.
+    """
+    return int(os.getenv('DB_POOL_MAX_SIZE', 0)) or threads + 1
+
+def dimensionar_conexiones(args):
+    """
+    Ajusta workers y pools al presupuesto de conexiones DB_MAX_CONNECTIONS
+
+    Cada worker abre hasta DB_POOL_MAX_SIZE conexiones al primario y otras
+    tantas (DB_REPLICA_POOL_MAX_SIZE) a cada réplica, y cada instancia MySQL
+    acepta max_connections (151 por defecto). Sin SERVER_WORKERS se usan
+    2 x CPUs + 1 workers, o menos si no entran en el presupuesto; con una
+    configuración explícita que no entra, el arranque falla.
+
+    Returns:
+        Conexiones máximas por instancia (primario y cada réplica)
+    """
+    presupuesto = int(os.getenv('DB_MAX_CONNECTIONS', 150))
+    pool_max = conexiones_por_worker(args.threads)
+    # El pool se crea en cada worker después del fork y lee el entorno
+    os.environ['DB_POOL_MAX_SIZE'] = str(pool_max)
+    por_worker = pool_max
+    if os.getenv('DB_REPLICA_HOSTS', '').strip():
+        por_worker = max(pool_max, int(os.getenv('DB_REPLICA_POOL_MAX_SIZE', 0)) or pool_max)
+
+    if args.workers is None:
+        args.workers = max(1, min((os.cpu_count() or 1) * 2 + 1, presupuesto // por_worker))
+    if args.workers * por_worker > presupuesto:
+        raise SystemExit(
+            f'❌ {args.workers} workers x {por_worker} conexiones = {args.workers * por_worker} '
+            f'> DB_MAX_CONNECTIONS ({presupuesto}): baja SERVER_WORKERS o DB_POOL_MAX_SIZE '
+            f'(y DB_REPLICA_POOL_MAX_SIZE), o sube DB_MAX_CONNECTIONS si max_connections de MySQL lo permite'
+        )
+    return args.workers * por_worker
+
+def run_dev(args):
+    """Servidor de desarrollo de Flask (un proceso, reloader y debugger)"""
+    debug = os.getenv('FLASK_DEBUG', 'True') == 'True'
+    print_banner(args.port, f'desarrollo (debug={debug})', '🔢 Concurrencia: 1 proceso, un hilo por petición')
+    app.run(host=args.host, port=args.port, debug=debug)
+
+def run_production(args):
+    """
+    Servidor pre-fork con gunicorn: la app se crea una vez en el proceso
+    maestro (preload) y cada worker atiende con varios hilos.
+
+    - kill -HUP <pid maestro>: recarga los workers sin cortar conexiones
+    - kill -TERM <pid maestro>: apagado ordenado (espera graceful_timeout)
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        # gunicorn no funciona en Windows: servidor de Werkzeug multihilo, sin debug
+        print_banner(args.port, 'producción (sin gunicorn: Werkzeug multihilo)',
+                     '⚠️  Instala gunicorn para usar varios procesos worker')
+        app.run(host=args.host, port=args.port, debug=False, use_reloader=False, threaded=True)
+        return
+
+    conexiones = dimensionar_conexiones(args)
+
+    class StandaloneApplication(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        'bind': f'{args.host}:{args.port}',
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'preload_app': True,
+        'max_requests': args.max_requests,
+        'max_requests_jitter': args.max_requests_jitter,
+        'keepalive': args.keepalive,
+        'timeout': args.timeout,
+        'graceful_timeout': args.graceful_timeout,
+        'backlog': args.backlog,
+        'accesslog': os.getenv('SERVER_ACCESS_LOG') or None,
+        # Cada worker abre sus DB_POOL_MIN_SIZE conexiones al arrancar, no en
+        # su primera petición
+        'post_fork': lambda server, worker: get_pool(),
+        # Último volcado de métricas del worker antes de salir
+        'worker_exit': lambda server, worker: metrics.volcar()
+    }
+
+    # Con varios workers /metrics suma los de todos: si no hay
+    # METRICS_MULTIPROC_DIR se usa un directorio temporal por ejecución
+    directorio_temporal = None
+    if app.config['METRICS_ENABLED'] and args.workers > 1 and metrics.directorio is None:
+        directorio_temporal = tempfile.mkdtemp(prefix='metrics-')
+        metrics.usar_directorio(directorio_temporal)
+
+    pool_max = int(os.environ['DB_POOL_MAX_SIZE'])
+    concurrencia = (
+        f'🔢 Concurrencia: {args.workers} workers x {args.threads} hilos = '
+        f'{args.workers * args.threads} peticiones simultáneas\n'
+        f'    🗄️  Conexiones MySQL máximas por instancia: {conexiones} '
+        f'(DB_MAX_CONNECTIONS={os.getenv("DB_MAX_CONNECTIONS", 150)})'
+    )
+    if args.threads > pool_max:
+        concurrencia += f'\n    ⚠️  SERVER_THREADS ({args.threads}) > DB_POOL_MAX_SIZE ({pool_max}): habrá esperas por conexión'
+    print_banner(args.port, f'producción (gunicorn, pid maestro {os.getpid()})', concurrencia)
+
+    try:
+        StandaloneApplication(app, options).run()
+    finally:
+        if directorio_temporal:
+            shutil.rmtree(directorio_temporal, ignore_errors=True)
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.dev:
+        run_dev(args)
+    else:
+        run_production(args)
@@ -13,6 +13,14 @@ case "$1" in
     python run.py
     ;;
   
+  # Iniciar el servidor de desarrollo (reloader y debugger)
+  "start-dev")
+    echo "🛠️  Iniciando servidor Flask (desarrollo)..."
+    cd /Users/dru/Documents/Repositories/flask-alumno
+    source venv/bin/activate
+    python run.py --dev
+    ;;
+  
   # Reiniciar la base de datos
   "reset-db")
     echo "🔄 Reiniciando base de datos..."
@@ -22,6 +30,14 @@ case "$1" in
     echo "✅ Base de datos reiniciada"
     ;;
   
+  # Reconstruir tablas resumen (estadísticas de cursos)
+  "rebuild-stats")
+    echo "🔁 Reconstruyendo tablas resumen..."
+    cd /Users/dru/Documents/Repositories/flask-alumno
+    source venv/bin/activate
+    python rebuild_stats.py
+    ;;
+  
   # Limpiar tabla de alumnos
   "clean-alumnos")
     echo "🧹 Limpiando tabla de alumnos..."
@@ -89,33 +105,22 @@ case "$1" in
     fi
     ;;
   
-  # Generar más datos de prueba
+  # Generar datos sintéticos (ver python generate_data.py --help)
   "generate-data")
-    echo "🔢 Generando más datos de prueba..."
-    python3 << 'EOF'
-import csv
-import random
-
-nombres = ["Juan", "María", "Carlos", "Ana", "Luis", "Carmen", "Pedro", "Laura", "Miguel", "Isabel"]
-apellidos = ["García", "Rodríguez", "Martínez", "López", "González", "Pérez", "Sánchez", "Ramírez", "Torres", "Flores"]
-
-with open('/Users/dru/Documents/Repositories/flask-alumno/data/alumnos_extra.csv', 'w', newline='') as f:
-    writer = csv.writer(f)
-    writer.writerow(['codigo', 'dni', 'nombre', 'apellido', 'email', 'telefono', 'fecha_ingreso'])
-    
-    for i in range(51, 201):  # Genera 150 alumnos más (del 51 al 200)
-        codigo = f"A202400{i:02d}" if i < 100 else f"A2024{i:03d}"
-        dni = f"{10000000 + i:08d}"
-        nombre = random.choice(nombres)
-        apellido = random.choice(apellidos)
-        email = f"{nombre.lower()}.{apellido.lower()}{i}@email.com"
-        telefono = f"98765{i:04d}"
-        fecha = f"2024-02-{(i % 28) + 1:02d}"
-        
-        writer.writerow([codigo, dni, nombre, apellido, email, telefono, fecha])
-
-print("✅ Archivo alumnos_extra.csv generado con 150 alumnos adicionales")
-EOF
+    echo "🔢 Generando datos sintéticos..."
+    python generate_data.py "${@:2}"
+    ;;
+  
+  # Pruebas de carga sin JMeter (ver python -m benchmarks.load_test run --help)
+  "load-test")
+    echo "🚦 Ejecutando pruebas de carga..."
+    python -m benchmarks.load_test "${@:2}"
+    ;;
+  
+  # Micro-benchmarks contra la línea base (ver python -m benchmarks.microbench run --help)
+  "microbench")
+    echo "⏱️  Ejecutando micro-benchmarks..."
+    python -m benchmarks.microbench run --comparar "${@:2}"
     ;;
   
   # Backup de la base de datos
@@ -146,8 +151,10 @@ EOF
     echo "Uso: bash scripts_utils.sh <comando>"
     echo ""
     echo "Comandos disponibles:"
-    echo "  start              - Iniciar el servidor Flask"
+    echo "  start              - Iniciar el servidor (gunicorn, producción)"
+    echo "  start-dev          - Iniciar el servidor de desarrollo de Flask"
     echo "  reset-db           - Reiniciar la base de datos (DROP & CREATE)"
+    echo "  rebuild-stats      - Reconstruir tablas resumen (cursos y alumnos)"
     echo "  clean-alumnos      - Limpiar tabla de alumnos (TRUNCATE)"
     echo "  db-stats           - Ver estadísticas de la BD"
     echo "  last-alumnos       - Ver últimos 10 alumnos registrados"
@@ -155,7 +162,9 @@ EOF
     echo "  install            - Instalar/actualizar dependencias"
     echo "  test               - Ejecutar tests de endpoints"
     echo "  logs               - Ver logs del servidor"
-    echo "  generate-data      - Generar más datos de prueba (150 alumnos)"
+    echo "  generate-data      - Generar datos sintéticos (acepta opciones de generate_data.py)"
+    echo "  load-test          - Pruebas de carga sin JMeter (run / compare)"
+    echo "  microbench         - Micro-benchmarks comparados con la línea base"
     echo "  backup             - Crear backup de la BD"
     echo "  restore <archivo>  - Restaurar backup"
     echo "  help               - Mostrar esta ayuda"
@@ -163,7 +172,7 @@ EOF
     echo "Ejemplos:"
     echo "  bash scripts_utils.sh start"
     echo "  bash scripts_utils.sh reset-db"
-    echo "  bash scripts_utils.sh generate-data"
+    echo "  bash scripts_utils.sh generate-data --alumnos 100000 --truncar"
     echo ""
     ;;
 esac
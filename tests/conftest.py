@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """App con la configuración por defecto (sin las variables JSON_* del entorno)"""
+    for variable in ('JSON_PROVIDER', 'JSON_DECIMAL', 'JSON_DATE_FORMAT'):
+        monkeypatch.delenv(variable, raising=False)
+    from app import create_app
+    return create_app()
@@ -0,0 +1,18 @@
+import pytest
+
+from app.utils.admission import parse_clase, presupuesto_hilos, validar_limites
+
+
+@pytest.mark.parametrize('hilos', [1, 2, 4, 8, 16])
+def test_auto_no_excede_el_presupuesto(hilos):
+    clases = {nombre: parse_clase(nombre, 'auto:auto:2', hilos) for nombre in ('pesado', 'auth', 'normal')}
+    validar_limites(clases, hilos)
+    for nombre, clase in clases.items():
+        assert clase.limite >= 1
+        assert clase.limite + clase.max_cola <= presupuesto_hilos(nombre, hilos)
+
+
+def test_configuracion_que_excede_los_hilos_falla():
+    clases = {'pesado': parse_clase('pesado', '8:32:2', 4)}
+    with pytest.raises(ValueError, match='ADMISSION_PESADO'):
+        validar_limites(clases, 4)
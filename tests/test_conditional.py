@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from app.utils.conditional import calcular_etag, respuesta_condicional
+
+# updated_at es TIMESTAMP(6): los microsegundos no entran en Last-Modified
+UPDATED_AT = datetime(2024, 3, 1, 9, 30, 15, 123456)
+
+
+def _responder(app, headers=None):
+    etag = calcular_etag('alumno:1', UPDATED_AT)
+    with app.test_request_context('/api/alumno/1', headers=headers or {}):
+        return respuesta_condicional(etag, UPDATED_AT, lambda: ({'success': True}, 200))
+
+
+def test_last_modified_sin_microsegundos(app):
+    response = _responder(app)
+    assert response.status_code == 200
+    assert response.headers['Last-Modified'] == 'Fri, 01 Mar 2024 09:30:15 GMT'
+
+
+def test_if_modified_since_con_el_last_modified_recibido(app):
+    last_modified = _responder(app).headers['Last-Modified']
+    response = _responder(app, {'If-Modified-Since': last_modified})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_if_modified_since_anterior(app):
+    response = _responder(app, {'If-Modified-Since': 'Fri, 01 Mar 2024 09:30:14 GMT'})
+    assert response.status_code == 200
+
+
+def test_if_none_match(app):
+    etag = _responder(app).headers['ETag']
+    assert _responder(app, {'If-None-Match': etag}).status_code == 304
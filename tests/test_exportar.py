@@ -0,0 +1,35 @@
+from unittest import mock
+
+import app.utils.auth as auth
+from app.models.alumno import Alumno
+
+FILA = {columna: None for columna in Alumno.COLUMNAS_EXPORT}
+
+
+def test_exportar_retiene_la_admision_y_la_conexion_hasta_terminar(app):
+    pesado = app.extensions['admission'].clases['pesado']
+    conexion_devuelta = []
+
+    def exportar(tamano_lote):
+        try:
+            yield [FILA]
+            yield [FILA]
+        finally:
+            conexion_devuelta.append(True)
+
+    token = auth.generate_token(1, 'admin')
+    with mock.patch.object(Alumno, 'exportar', exportar), \
+            mock.patch.object(auth, 'execute_query', return_value=[]):
+        response = app.test_client().get('/api/alumnos/export', buffered=False,
+                                         headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200
+        # La respuesta ya volvió, pero el cuerpo todavía no se envió
+        assert pesado.en_curso == 1
+        assert not conexion_devuelta
+
+        cuerpo = b''.join(response.response)
+        response.close()
+
+    assert cuerpo.count(b'\r\n') == 3
+    assert pesado.en_curso == 0
+    assert conexion_devuelta == [True]
@@ -0,0 +1,69 @@
+"""
+JSON exacto de /api/historial/<id> y /api/cursos/estadisticas con la
+configuración por defecto: notas y promedios como números y fechas como
+texto, igual que antes del proveedor JSON propio.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import mock
+
+from flask import jsonify
+
+from benchmarks.microbench import ConexionFija
+
+FILAS_HISTORIAL = [{
+    'alumno_id': 1, 'alumno_codigo': 'A20240001', 'nombre': 'Juan', 'apellido': 'Perez',
+    'dni': '12345678', 'matricula_id': 1, 'curso_id': 3, 'codigo_curso': 'CS101',
+    'curso_nombre': 'Algoritmos', 'creditos': 4, 'semestre': '2024-1', 'anio': 2024,
+    'fecha_matricula': datetime(2024, 3, 1, 9, 0)
+}]
+
+NOTAS_HISTORIAL = [
+    {'matricula_id': 1, 'tipo_evaluacion': 'Parcial 1', 'nota': Decimal('15.50'),
+     'peso': Decimal('0.40'), 'fecha_evaluacion': date(2024, 4, 20)},
+    {'matricula_id': 1, 'tipo_evaluacion': 'Final', 'nota': Decimal('12.00'),
+     'peso': Decimal('0.60'), 'fecha_evaluacion': None}
+]
+
+CURSOS = [
+    {'id': 3, 'codigo_curso': 'CS101', 'nombre': 'Algoritmos', 'creditos': 4, 'descripcion': None,
+     'total_alumnos': 2, 'total_evaluaciones': 5, 'promedio_general': Decimal('13.4567')},
+    {'id': 4, 'codigo_curso': 'CS102', 'nombre': 'Redes', 'creditos': 3, 'descripcion': 'Sin notas',
+     'total_alumnos': 0, 'total_evaluaciones': 0, 'promedio_general': None}
+]
+
+
+def test_historial_con_configuracion_por_defecto(app):
+    from app.routes.alumno import _armar_historial
+
+    with app.test_request_context('/api/historial/1'), \
+            mock.patch('app.models.alumno.get_db_connection',
+                       lambda **kwargs: ConexionFija([FILAS_HISTORIAL, NOTAS_HISTORIAL])):
+        response, estado = _armar_historial(1)
+
+    assert estado == 200
+    assert response.get_data(as_text=True) == (
+        '{"alumno":{"alumno_id":1,"apellido":"Perez","codigo":"A20240001","dni":"12345678",'
+        '"nombre":"Juan"},"historial":[{"anio":2024,"codigo_curso":"CS101","creditos":4,'
+        '"curso_id":3,"fecha_matricula":"2024-03-01 09:00:00","nombre":"Algoritmos","notas":['
+        '{"fecha_evaluacion":"2024-04-20","nota":15.5,"peso":0.4,"tipo_evaluacion":"Parcial 1"},'
+        '{"fecha_evaluacion":null,"nota":12.0,"peso":0.6,"tipo_evaluacion":"Final"}],'
+        '"semestre":"2024-1"}],"promedios":[{"anio":2024,"curso_id":3,"promedio_ponderado":13.4,'
+        '"semestre":"2024-1","suma_pesos":1.0}],"success":true,"total_cursos":1}\n'
+    )
+
+
+def test_estadisticas_con_configuracion_por_defecto(app):
+    from app.routes.curso import _calcular_estadisticas_cursos
+
+    with app.test_request_context('/api/cursos/estadisticas'), \
+            mock.patch('app.models.curso.Curso.obtener_con_matriculas', lambda: CURSOS):
+        texto = jsonify(_calcular_estadisticas_cursos()).get_data(as_text=True)
+
+    assert texto == (
+        '[{"codigo":"CS101","creditos":4,"curso_id":3,"descripcion":null,"estadisticas":'
+        '{"promedio_general":13.46,"total_alumnos_matriculados":2,"total_evaluaciones_realizadas":5},'
+        '"nombre":"Algoritmos"},{"codigo":"CS102","creditos":3,"curso_id":4,"descripcion":"Sin notas",'
+        '"estadisticas":{"promedio_general":0,"total_alumnos_matriculados":0,'
+        '"total_evaluaciones_realizadas":0},"nombre":"Redes"}]\n'
+    )
@@ -0,0 +1,25 @@
+from unittest import mock
+
+import pytest
+
+import app.utils.auth as auth
+
+
+@pytest.mark.parametrize('ruta', ['/health/pool', '/health/replicas', '/health/jwt-cache', '/health/admission'])
+def test_estadisticas_internas_requieren_token(app, ruta):
+    assert app.test_client().get(ruta).status_code == 401
+
+
+def test_estadisticas_internas_solo_para_admin(app):
+    cliente = app.test_client()
+    with mock.patch.object(auth, 'execute_query', return_value=[]):
+        otro = auth.generate_token(2, 'docente')
+        admin = auth.generate_token(1, 'admin')
+        assert cliente.get('/health/jwt-cache', headers={'Authorization': f'Bearer {otro}'}).status_code == 403
+        response = cliente.get('/health/jwt-cache', headers={'Authorization': f'Bearer {admin}'})
+    assert response.status_code == 200
+    assert 'hits' in response.get_json()['jwt_cache']
+
+
+def test_health_sigue_abierto(app):
+    assert app.test_client().get('/health').get_json() == {'status': 'healthy'}
@@ -0,0 +1,14 @@
+from unittest import mock
+
+import app.utils.database as database
+
+
+def test_scrape_no_crea_el_pool(app):
+    with mock.patch.object(database, '_pool', None), \
+            mock.patch.object(database, '_nuevo_pool') as nuevo_pool:
+        response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    nuevo_pool.assert_not_called()
+    texto = response.get_data(as_text=True)
+    assert 'db_pool_connections_in_use' not in texto
+    assert 'cache_estadisticas_stale_total' in texto
@@ -0,0 +1,55 @@
+from app.utils.pool import ConnectionPool
+
+
+class CursorRegistrado:
+    def __init__(self, sentencias):
+        self.sentencias = sentencias
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def execute(self, query, params=None):
+        self.sentencias.append(query)
+
+
+class ConexionRegistrada:
+    def __init__(self):
+        self.open = True
+        self.sentencias = []
+
+    def cursor(self, *args, **kwargs):
+        return CursorRegistrado(self.sentencias)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+
+def test_variable_marcada_se_limpia_al_devolver_la_conexion():
+    pool = ConnectionPool(ConexionRegistrada, min_size=0, max_size=1, pre_ping=False)
+    conexion = pool.acquire()
+    conexion.marcar_variable('omitir_resumen_alumnos')
+    conexion.close()
+    assert conexion.raw.sentencias == ['SET @omitir_resumen_alumnos = NULL']
+
+    # Sin marcas no hay viaje extra a la base
+    conexion = pool.acquire()
+    conexion.close()
+    assert conexion.raw.sentencias == ['SET @omitir_resumen_alumnos = NULL']
+
+
+def test_variable_olvidada_no_se_limpia_de_nuevo():
+    pool = ConnectionPool(ConexionRegistrada, min_size=0, max_size=1, pre_ping=False)
+    conexion = pool.acquire()
+    conexion.marcar_variable('omitir_resumen_alumnos')
+    conexion.olvidar_variable('omitir_resumen_alumnos')
+    conexion.close()
+    assert conexion.raw.sentencias == []
@@ -0,0 +1,75 @@
+from unittest import mock
+
+import pytest
+from flask import jsonify
+
+import app.utils.auth as auth
+
+
+class TablaRevocados:
+    """tokens_revocados en memoria, compartida como la tabla real entre workers"""
+
+    def __init__(self):
+        self.filas = {}
+
+    def execute_query(self, query, params=None, fetch=False, fetch_one=False):
+        if query.startswith('SELECT'):
+            return [dict(fila, jti=jti) for jti, fila in self.filas.items() if jti in params]
+        if query.startswith('INSERT') and 'antes_de_ms' in query:
+            self.filas[params[0]] = {'antes_de_ms': params[1]}
+        elif query.startswith('INSERT'):
+            self.filas[params[0]] = {'antes_de_ms': None}
+        elif 'jti <>' in query:
+            self.filas = {jti: f for jti, f in self.filas.items() if jti == params[0]}
+        return None
+
+
+@pytest.fixture
+def cliente(app):
+    tabla = TablaRevocados()
+
+    @app.route('/protegida')
+    @auth.token_required
+    def protegida():
+        return jsonify({'success': True})
+
+    auth.token_cache.clear()
+    with mock.patch.object(auth, 'execute_query', tabla.execute_query), \
+            mock.patch.object(auth, 'transaction', mock.MagicMock()):
+        yield app.test_client()
+    auth.token_cache.clear()
+
+
+def _get(cliente, token):
+    return cliente.get('/protegida', headers={'Authorization': f'Bearer {token}'})
+
+
+def test_revocacion_de_otro_worker_rige_al_vencer_el_ttl(cliente):
+    token = auth.generate_token(1, 'admin')
+    assert _get(cliente, token).status_code == 200
+
+    # Otro worker revoca el token: este lo sigue aceptando desde su caché
+    auth.revoke_token(token, auth.jwt.decode(token, auth.JWT_SECRET, algorithms=['HS256']))
+    auth.token_cache.put(token, auth.jwt.decode(token, auth.JWT_SECRET, algorithms=['HS256']))
+    assert _get(cliente, token).status_code == 200
+
+    with mock.patch.object(auth.time, 'monotonic', return_value=auth.time.monotonic() + auth.token_cache.ttl):
+        response = _get(cliente, token)
+    assert response.status_code == 401
+    assert response.get_json() == {'error': 'Token revocado'}
+
+
+def test_logout_revoca_en_el_worker_que_lo_atiende(cliente):
+    token = auth.generate_token(1, 'admin')
+    assert _get(cliente, token).status_code == 200
+    assert cliente.post('/api/logout', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+    assert _get(cliente, token).status_code == 401
+
+
+def test_revoke_all_no_revoca_los_tokens_posteriores(cliente):
+    anterior = auth.generate_token(1, 'admin')
+    auth.revoke_all_tokens()
+    auth.time.sleep(0.002)  # iat_ms tiene resolución de milisegundos
+    posterior = auth.generate_token(1, 'admin')
+    assert _get(cliente, anterior).status_code == 401
+    assert _get(cliente, posterior).status_code == 200